@@ -0,0 +1,38 @@
+"""add running all-time-high columns to daily_stock_data (ceiling ATH mode)
+
+Revision ID: 2c7f5e9a4d16
+Revises: 9d4f1b6e3a27
+Create Date: 2026-10-17 22:41:19.603518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c7f5e9a4d16'
+down_revision: Union[str, Sequence[str], None] = '9d4f1b6e3a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# قیمت‌های سقف روت ceiling؛ high_usd = high / dollar_rate
+PRICES = ("high", "adjust_high", "high_usd", "adjust_high_usd")
+
+
+def upgrade():
+    # بیشینهٔ جاری قیمت تا همین ردیف + j_date آخرین ردیفی که به آن رسیده
+    for price in PRICES:
+        op.add_column("daily_stock_data", sa.Column(f"ath_{price}", sa.Double(), nullable=True))
+        op.add_column("daily_stock_data", sa.Column(f"ath_{price}_j_date", sa.Text(), nullable=True))
+
+    # پر کردن اولیه در اولین اجرای cron_jobs.daily.update_running_ath انجام می‌شود
+    # (ردیف‌های ath_adjust_high IS NULL = ردیف‌های جدید)
+
+
+def downgrade():
+    for price in reversed(PRICES):
+        op.drop_column("daily_stock_data", f"ath_{price}_j_date")
+        op.drop_column("daily_stock_data", f"ath_{price}")
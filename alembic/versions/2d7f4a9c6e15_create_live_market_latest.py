@@ -0,0 +1,245 @@
+"""create live_market_latest (one row per ticker) and read it in mv_live_sector_report
+
+Revision ID: 2d7f4a9c6e15
+Revises: 5e2b9c7d1a83
+Create Date: 2026-10-17 18:40:11.207316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7f4a9c6e15'
+down_revision: Union[str, Sequence[str], None] = '5e2b9c7d1a83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# آخرین ردیف هر نماد؛ run_live_saver هر بار با ON CONFLICT ("Ticker") آن را به‌روز می‌کند.
+# ساختار دقیقاً مثل live_market_data است (شامل ستون‌های generated ticker_key / sector_key).
+CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS live_market_latest
+    (LIKE live_market_data INCLUDING DEFAULTS INCLUDING GENERATED);
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'live_market_latest_pkey') THEN
+        ALTER TABLE live_market_latest ADD CONSTRAINT live_market_latest_pkey PRIMARY KEY ("Ticker");
+    END IF;
+END
+$$;
+
+CREATE INDEX IF NOT EXISTS ix_live_market_latest_download ON live_market_latest ("Download");
+CREATE INDEX IF NOT EXISTS ix_live_market_latest_sector_key ON live_market_latest (sector_key);
+"""
+
+# پر کردن اولیه از تاریخچه (ستون‌های generated قابل درج نیستند، پس لیست ستون‌ها از کاتالوگ ساخته می‌شود)
+BACKFILL_SQL = """
+DO $$
+DECLARE
+    cols text;
+BEGIN
+    SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+      INTO cols
+      FROM information_schema.columns
+     WHERE table_schema = 'public'
+       AND table_name = 'live_market_data'
+       AND is_generated = 'NEVER';
+
+    EXECUTE format(
+        'INSERT INTO live_market_latest (%1$s)
+         SELECT DISTINCT ON ("Ticker") %1$s
+           FROM live_market_data
+          ORDER BY "Ticker", "Download" DESC
+         ON CONFLICT ("Ticker") DO NOTHING',
+        cols
+    );
+END
+$$;
+"""
+
+
+# ویوهای joined صندوق‌ها (همان لیست 5e2b9c7d1a83) برای prev_close
+FUND_VIEWS = [
+    "daily_joined_fund_balanced",
+    "daily_joined_fund_fixincome",
+    "daily_joined_fund_gold",
+    "daily_joined_fund_index_stock",
+    "daily_joined_fund_leverage",
+    "daily_joined_fund_other",
+    "daily_joined_fund_segment",
+    "daily_joined_fund_stock",
+    "daily_joined_fund_zafran",
+]
+
+MV_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_live_sector_report_ts_level_key ON mv_live_sector_report (ts, level, key);",
+    "CREATE INDEX IF NOT EXISTS ix_mv_live_sector_report_ts ON mv_live_sector_report (ts DESC);",
+    "CREATE INDEX IF NOT EXISTS ix_mv_live_sector_report_level ON mv_live_sector_report (level);",
+    "CREATE INDEX IF NOT EXISTS ix_mv_live_sector_report_key ON mv_live_sector_report (key);",
+    "CREATE INDEX IF NOT EXISTS ix_mv_live_sector_report_total_value ON mv_live_sector_report (total_value DESC);",
+]
+
+
+def _live_sector_report_sql(live_table: str) -> str:
+    """mv_live_sector_report همان تعریف 5e2b9c7d1a83، با snapshot آخر از live_table."""
+    close_union = "\n      UNION ALL\n".join(
+        f"""      SELECT ticker_key, close::numeric AS close, date_miladi::date AS d
+      FROM {view}
+      WHERE close IS NOT NULL AND close <> 0
+        AND date_miladi::date <= (SELECT d FROM last_daily)"""
+        for view in ["daily_joined_data"] + FUND_VIEWS
+    )
+    return rf"""
+    CREATE MATERIALIZED VIEW mv_live_sector_report AS
+    WITH
+    latest_live AS (
+      SELECT max("Download") AS ts
+      FROM {live_table}
+    ),
+
+    last_daily AS (
+      SELECT max(date_miladi)::date AS d
+      FROM daily_joined_data
+    ),
+
+    /* close union (stocks + all funds) -> prev_close ؛ ticker_key ستون ذخیره‌شده است */
+    daily_close_union AS (
+{close_union}
+    ),
+
+    daily_last_close AS (
+      SELECT DISTINCT ON (ticker_key)
+        ticker_key,
+        close AS prev_close
+      FROM daily_close_union
+      ORDER BY ticker_key, d DESC
+    ),
+
+    base AS (
+      SELECT
+        l."Download" AS ts,
+        l."Ticker"   AS stock_ticker,
+        COALESCE(NULLIF(trim(l."Sector"), ''), 'unknown') AS sector_live,
+
+        COALESCE(l."Value",  0)::numeric  AS value,
+        COALESCE(l."Volume", 0)::numeric  AS volume,
+        COALESCE(l."Final", l."Close")::numeric AS last_price,
+
+        COALESCE(l."Vol_Buy_R",  0)::numeric AS vol_buy_r,
+        COALESCE(l."Vol_Sell_R", 0)::numeric AS vol_sell_r,
+        COALESCE(l."Vol_Buy_I",  0)::numeric AS vol_buy_i,
+        COALESCE(l."Vol_Sell_I", 0)::numeric AS vol_sell_i,
+
+        l.ticker_key
+      FROM {live_table} l
+      JOIN latest_live x ON l."Download" = x.ts
+      WHERE l."Ticker" !~ '[24]'
+    ),
+
+    base2 AS (
+      SELECT
+        b.*,
+        d.prev_close,
+        COALESCE(
+          NULLIF(trim(m.sector_key), ''),
+          CASE
+            WHEN b.sector_live = 'صندوق سرمایه گذاری قابل معامله'
+              THEN 'صندوق سرمایه گذاری قابل معامله | ' || COALESCE(NULLIF(trim(m.etf_bucket), ''), 'other')
+            ELSE COALESCE(NULLIF(trim(b.sector_live), ''), 'other')
+          END
+        ) AS sector_key_final
+      FROM base b
+      LEFT JOIN daily_last_close d
+        ON d.ticker_key = b.ticker_key
+      LEFT JOIN mv_symbol_market_map m
+        ON m.ticker_key = b.ticker_key
+    ),
+
+    sector_rows AS (
+      SELECT
+        ts,
+        'sector'::text AS level,
+        sector_key_final AS key,
+        1 AS sort_order,
+        COUNT(*) AS symbols_count,
+        SUM(value)  AS total_value,
+        SUM(volume) AS total_volume,
+        AVG(
+          CASE
+            WHEN prev_close IS NULL OR prev_close = 0 OR last_price IS NULL THEN NULL
+            WHEN last_price > prev_close THEN 1 ELSE 0
+          END
+        ) AS green_ratio,
+        AVG(
+          CASE
+            WHEN prev_close IS NULL OR prev_close = 0 OR last_price IS NULL THEN NULL
+            ELSE 100.0 * (last_price - prev_close) / prev_close
+          END
+        ) AS eqw_avg_ret_pct,
+        SUM((vol_buy_r - vol_sell_r) * last_price) AS net_real_value,
+        SUM((vol_buy_i - vol_sell_i) * last_price) AS net_legal_value
+      FROM base2
+      GROUP BY ts, sector_key_final
+    ),
+
+    market_row AS (
+      SELECT
+        ts,
+        'market'::text AS level,
+        '__ALL__'::text AS key,
+        0 AS sort_order,
+        COUNT(*) AS symbols_count,
+        SUM(value)  AS total_value,
+        SUM(volume) AS total_volume,
+        AVG(
+          CASE
+            WHEN prev_close IS NULL OR prev_close = 0 OR last_price IS NULL THEN NULL
+            WHEN last_price > prev_close THEN 1 ELSE 0
+          END
+        ) AS green_ratio,
+        AVG(
+          CASE
+            WHEN prev_close IS NULL OR prev_close = 0 OR last_price IS NULL THEN NULL
+            ELSE 100.0 * (last_price - prev_close) / prev_close
+          END
+        ) AS eqw_avg_ret_pct,
+        SUM((vol_buy_r - vol_sell_r) * last_price) AS net_real_value,
+        SUM((vol_buy_i - vol_sell_i) * last_price) AS net_legal_value
+      FROM base2
+      GROUP BY ts
+    ),
+
+    unioned AS (
+      SELECT * FROM market_row
+      UNION ALL
+      SELECT * FROM sector_rows
+    )
+
+    SELECT
+      ts, level, key, sort_order, symbols_count, total_value, total_volume,
+      green_ratio, eqw_avg_ret_pct, net_real_value, net_legal_value
+    FROM unioned;
+    """
+
+
+def _recreate_live_sector_report(live_table: str):
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_live_sector_report;")
+    op.execute(_live_sector_report_sql(live_table))
+    for sql in MV_INDEXES:
+        op.execute(sql)
+
+
+def upgrade():
+    op.execute(CREATE_TABLE_SQL)
+    op.execute(BACKFILL_SQL)
+    # snapshot آخر = ردیف‌های live_market_latest با max("Download")؛ هزینه O(تعداد نماد) به‌جای کل تاریخچه
+    _recreate_live_sector_report("live_market_latest")
+
+
+def downgrade():
+    _recreate_live_sector_report("live_market_data")
+    op.execute("DROP TABLE IF EXISTS live_market_latest;")
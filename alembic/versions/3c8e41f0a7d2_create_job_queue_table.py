@@ -0,0 +1,54 @@
+"""create job_queue table
+
+Revision ID: 3c8e41f0a7d2
+Revises: 7d3e5a1c9b20
+Create Date: 2026-10-17 14:36:05.218740
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c8e41f0a7d2'
+down_revision: Union[str, Sequence[str], None] = '7d3e5a1c9b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "job_queue",
+        sa.Column("id", sa.BigInteger(), primary_key=True, autoincrement=True),
+        sa.Column("kind", sa.Text(), nullable=False),
+        sa.Column("dedupe_key", sa.Text(), nullable=True),
+        sa.Column("payload", postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("status", sa.Text(), nullable=False, server_default=sa.text("'queued'")),
+        sa.Column("progress", sa.Text(), nullable=True),
+        sa.Column("result", postgresql.JSONB(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.Column("worker", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_job_queue_status_id", "job_queue", ["status", "id"])
+    # حداکثر یک کار فعال برای هر (kind, dedupe_key)
+    op.create_index(
+        "ux_job_queue_active_dedupe",
+        "job_queue",
+        ["kind", "dedupe_key"],
+        unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade():
+    op.drop_index("ux_job_queue_active_dedupe", table_name="job_queue")
+    op.drop_index("ix_job_queue_status_id", table_name="job_queue")
+    op.drop_table("job_queue")
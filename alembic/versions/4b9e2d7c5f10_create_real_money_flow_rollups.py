@@ -0,0 +1,57 @@
+"""create real-money-flow rollups (market / sector × daily / weekly)
+
+Revision ID: 4b9e2d7c5f10
+Revises: 8c4d2f6a1b39
+Create Date: 2026-10-17 21:02:37.418650
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b9e2d7c5f10'
+down_revision: Union[str, Sequence[str], None] = '8c4d2f6a1b39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # جریان پول حقیقی کل بازار در هر دوره (timeframe = daily | weekly)
+    op.create_table(
+        "real_money_flow_market",
+        sa.Column("timeframe", sa.Text(), nullable=False),
+        sa.Column("period_end", sa.Date(), nullable=False),
+        sa.Column("j_date", sa.Text(), nullable=True),
+        sa.Column("flow_rial", sa.Numeric(), nullable=False, server_default=sa.text("0")),
+        sa.Column("flow_dollar", sa.Numeric(), nullable=False, server_default=sa.text("0")),
+        sa.PrimaryKeyConstraint("timeframe", "period_end", name="real_money_flow_market_pkey"),
+    )
+
+    # جریان پول حقیقی هر صنعت در هر دوره
+    op.create_table(
+        "real_money_flow_sector",
+        sa.Column("timeframe", sa.Text(), nullable=False),
+        sa.Column("period_end", sa.Date(), nullable=False),
+        sa.Column("sector", sa.Text(), nullable=False),
+        sa.Column("j_date", sa.Text(), nullable=True),
+        sa.Column("flow_rial", sa.Numeric(), nullable=False, server_default=sa.text("0")),
+        sa.Column("flow_dollar", sa.Numeric(), nullable=False, server_default=sa.text("0")),
+        sa.PrimaryKeyConstraint("timeframe", "period_end", "sector", name="real_money_flow_sector_pkey"),
+    )
+
+    # بروزرسانی افزایشی فقط دوره‌های جدید را از ویوها می‌خواند؛ بدون این ایندکس‌ها کل جدول scan می‌شود
+    op.execute("CREATE INDEX IF NOT EXISTS ix_daily_stock_data_date_miladi ON daily_stock_data (date_miladi);")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_weekly_stock_data_week_end ON weekly_stock_data (week_end);")
+
+    # پر کردن اولیه در اولین اجرای cron_jobs.daily.update_real_money_flow_rollups انجام می‌شود
+    # (جدول خالی = high-water mark ندارد = کل تاریخچه)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_weekly_stock_data_week_end;")
+    op.execute("DROP INDEX IF EXISTS ix_daily_stock_data_date_miladi;")
+    op.drop_table("real_money_flow_sector")
+    op.drop_table("real_money_flow_market")
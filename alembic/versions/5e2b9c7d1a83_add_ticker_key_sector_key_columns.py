@@ -0,0 +1,803 @@
+"""add persisted ticker_key / sector_key columns and use them in MVs
+
+Revision ID: 5e2b9c7d1a83
+Revises: 3c8e41f0a7d2
+Create Date: 2026-10-17 16:12:40.531207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b9c7d1a83'
+down_revision: Union[str, Sequence[str], None] = '3c8e41f0a7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# ---------------------------
+# توابع نرمال‌سازی (IMMUTABLE تا در ستون generated و ایندکس قابل استفاده باشند)
+# ---------------------------
+# fa_ticker_key: دقیقاً همان عبارتی که قبلاً در MV ها تکرار می‌شد (حذف همهٔ فاصله‌ها)
+# fa_sector_key: همان نرمال‌سازی sankey / normalize_persian پایتون (حذف کشیدگی، فاصله‌ها می‌مانند)
+FUNCTIONS_SQL = r"""
+CREATE OR REPLACE FUNCTION public.fa_ticker_key(t text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE RETURNS NULL ON NULL INPUT
+AS $fn$
+  SELECT regexp_replace(
+    replace(replace(replace(trim(lower(t)), 'ي','ی'),'ك','ک'), chr(8204), ''),
+    '\s+','', 'g'
+  )
+$fn$;
+
+CREATE OR REPLACE FUNCTION public.fa_sector_key(t text)
+RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE RETURNS NULL ON NULL INPUT
+AS $fn$
+  SELECT replace(replace(replace(replace(trim(lower(t)), 'ي','ی'),'ك','ک'), chr(8204), ''), 'ـ', '')
+$fn$;
+"""
+
+# جداول صندوق‌ها که در MV ها با سهام UNION می‌شوند: (view, source_table)
+FUND_VIEWS = [
+    ("daily_joined_fund_balanced",    "daily_fund_balanced"),
+    ("daily_joined_fund_fixincome",   "daily_fund_fixincome"),
+    ("daily_joined_fund_gold",        "daily_fund_gold"),
+    ("daily_joined_fund_index_stock", "daily_fund_index_stock"),
+    ("daily_joined_fund_leverage",    "daily_fund_leverage"),
+    ("daily_joined_fund_other",       "daily_fund_other"),
+    ("daily_joined_fund_segment",     "daily_fund_segment"),
+    ("daily_joined_fund_stock",       "daily_fund_stock"),
+    ("daily_joined_fund_zafran",      "daily_fund_zafran"),
+]
+
+# (table, key column, function, source column, index columns)
+KEY_COLUMNS = [
+    ("live_market_data",   "ticker_key", "fa_ticker_key", '"Ticker"',     ("ticker_key", '"Download"')),
+    ("live_market_data",   "sector_key", "fa_sector_key", '"Sector"',     ("sector_key", '"Download"')),
+    ("symboldetail",       "ticker_key", "fa_ticker_key", "stock_ticker", ("ticker_key",)),
+    ("symboldetail",       "sector_key", "fa_sector_key", "sector",       ("sector_key",)),
+    ("orderbook_snapshot", "ticker_key", "fa_ticker_key", '"Symbol"',     ("ticker_key", '"Timestamp"')),
+    ("orderbook_snapshot", "sector_key", "fa_sector_key", '"Sector"',     ("sector_key", '"Timestamp"')),
+    ("haghighi",           "ticker_key", "fa_ticker_key", "symbol",       ("ticker_key", "recdate")),
+    ("daily_stock_data",   "ticker_key", "fa_ticker_key", "stock_ticker", ("ticker_key", "date_miladi")),
+    ("weekly_stock_data",  "ticker_key", "fa_ticker_key", "stock_ticker", ("ticker_key", "week_end")),
+] + [
+    (table, "ticker_key", "fa_ticker_key", "stock_ticker", ("ticker_key", "date_miladi"))
+    for _, table in FUND_VIEWS
+]
+
+# ویوهای صندوق با جدول اندیکاتور اختصاصی (بقیه بدون اندیکاتور؛ مثل 5c1a85cd8cae)
+FUND_INDICATOR_TABLES = {
+    "daily_joined_fund_gold":        "daily_indicators_fund_gold",
+    "daily_joined_fund_leverage":    "daily_indicators_fund_leverage",
+    "daily_joined_fund_index_stock": "daily_indicators_fund_index_stock",
+    "daily_joined_fund_segment":     "daily_indicators_fund_segment",
+}
+
+# MV هایی که به ویوهای joined وابسته‌اند و این migration بازنویسی‌شان نمی‌کند؛
+# تعریف و ایندکس‌هایشان از کاتالوگ خوانده و بعد از ساخت دوبارهٔ ویوها عیناً دوباره ساخته می‌شوند
+DEPENDENT_MVS = ["mv_sector_daily_latest", "mv_market_daily_latest"]
+
+
+def _index_name(table: str, cols) -> str:
+    return "ix_" + table + "_" + "_".join(c.strip('"').lower() for c in cols)
+
+
+def _add_key_column(table, column, func, source, index_cols):
+    # بعضی جداول صندوق‌ها توسط cron ساخته می‌شوند؛ اگر نبودند رد می‌شویم
+    op.execute(f"""
+    DO $$
+    BEGIN
+        IF to_regclass('public.{table}') IS NULL THEN
+            RETURN;
+        END IF;
+        ALTER TABLE public.{table}
+            ADD COLUMN IF NOT EXISTS {column} text GENERATED ALWAYS AS ({func}({source})) STORED;
+        CREATE INDEX IF NOT EXISTS {_index_name(table, index_cols)}
+            ON public.{table} ({", ".join(index_cols)});
+    END
+    $$;
+    """)
+
+
+# ---------------------------
+# ویوهای joined (همان تعریف 847ba7f6043f / 5c1a85cd8cae)
+# ticker_key جدول پایه از طریق dsd.* / d.* به ویو می‌رسد؛ چون جایش وسط لیست ستون‌هاست
+# CREATE OR REPLACE ممکن نیست، پس ویو حذف و با همین SQL صریح دوباره ساخته می‌شود.
+# ---------------------------
+DAILY_JOINED_DATA_SQL = """
+CREATE VIEW public.daily_joined_data AS
+SELECT
+    dsd.*,
+
+    di.ema_20, di.ema_50, di.ema_100,
+    di.rsi, di.macd, di.macd_signal, di.macd_hist,
+    di.tenkan, di.kijun, di.senkou_a, di.senkou_b, di.chikou,
+    di.signal_ichimoku_buy, di.signal_ichimoku_sell,
+    di.signal_ema_cross_buy, di.signal_ema_cross_sell,
+    di.signal_rsi_buy, di.signal_rsi_sell,
+    di.signal_macd_buy, di.signal_macd_sell,
+    di.signal_ema50_100_buy, di.signal_ema50_100_sell,
+    di.atr_22, di.renko_22,
+
+    di.tenkan_d,
+    di.kijun_d,
+    di.senkou_a_d,
+    di.senkou_b_d,
+
+    di.signal_ichimoku_buy_d   AS signal_ichimoku_buy_usd,
+    di.signal_ichimoku_sell_d  AS signal_ichimoku_sell_usd,
+    di.signal_ema_cross_buy_d  AS signal_ema_cross_buy_usd,
+    di.signal_ema_cross_sell_d AS signal_ema_cross_sell_usd,
+    di.signal_rsi_buy_d        AS signal_rsi_buy_usd,
+    di.signal_rsi_sell_d       AS signal_rsi_sell_usd,
+    di.signal_macd_buy_d       AS signal_macd_buy_usd,
+    di.signal_macd_sell_d      AS signal_macd_sell_usd,
+    di.signal_ema50_100_buy_d  AS signal_ema50_100_buy_usd,
+    di.signal_ema50_100_sell_d AS signal_ema50_100_sell_usd,
+    di.renko_22_d              AS renko_22_usd,
+
+    h.inscode,
+    h.buy_i_volume, h.buy_n_volume, h.buy_i_value, h.buy_n_value,
+    h.buy_n_count, h.sell_i_volume, h.buy_i_count, h.sell_n_volume,
+    h.sell_i_value, h.sell_n_value, h.sell_n_count, h.sell_i_count,
+    h.buy_i_value_usd, h.buy_n_value_usd, h.sell_i_value_usd, h.sell_n_value_usd,
+
+    sd.name_en, sd.sector, sd.sector_code, sd.subsector, sd.market AS market2,
+    sd.panel, sd.share_number, sd.base_vol, sd."instrumentID",
+
+    (dsd.adjust_close * sd.share_number) AS marketcap,
+    (dsd.adjust_close * sd.share_number) / dsd.dollar_rate AS marketcap_usd,
+
+    si.symbol_id
+FROM daily_stock_data dsd
+LEFT JOIN daily_indicators di
+    ON dsd.stock_ticker = di.stock_ticker
+   AND dsd.date_miladi  = di.date_miladi
+LEFT JOIN haghighi h
+    ON dsd.stock_ticker = h.symbol
+   AND dsd.date_miladi  = h.recdate
+LEFT JOIN symboldetail sd
+    ON dsd.stock_ticker = sd.stock_ticker
+LEFT JOIN symbol_identity si
+    ON si.stock_ticker = dsd.stock_ticker;
+"""
+
+FUND_VIEW_INDICATOR_COLUMNS = """
+    di.ema_20, di.ema_50, di.ema_100,
+    di.rsi, di.macd, di.macd_signal, di.macd_hist,
+    di.tenkan, di.kijun, di.senkou_a, di.senkou_b, di.chikou,
+    di.signal_ichimoku_buy, di.signal_ichimoku_sell,
+    di.signal_ema_cross_buy, di.signal_ema_cross_sell,
+    di.signal_rsi_buy, di.signal_rsi_sell,
+    di.signal_macd_buy, di.signal_macd_sell,
+    di.signal_ema50_100_buy, di.signal_ema50_100_sell,
+    di.atr_22, di.renko_22,
+
+    di.ema_20_d,  di.ema_50_d,  di.ema_100_d,
+    di.rsi_d,     di.macd_d,    di.macd_signal_d, di.macd_hist_d,
+    di.tenkan_d,  di.kijun_d,   di.senkou_a_d,    di.senkou_b_d,   di.chikou_d,
+    di.signal_ichimoku_buy_d   AS signal_ichimoku_buy_usd,
+    di.signal_ichimoku_sell_d  AS signal_ichimoku_sell_usd,
+    di.signal_ema_cross_buy_d  AS signal_ema_cross_buy_usd,
+    di.signal_ema_cross_sell_d AS signal_ema_cross_sell_usd,
+    di.signal_rsi_buy_d        AS signal_rsi_buy_usd,
+    di.signal_rsi_sell_d       AS signal_rsi_sell_usd,
+    di.signal_macd_buy_d       AS signal_macd_buy_usd,
+    di.signal_macd_sell_d      AS signal_macd_sell_usd,
+    di.signal_ema50_100_buy_d  AS signal_ema50_100_buy_usd,
+    di.signal_ema50_100_sell_d AS signal_ema50_100_sell_usd,
+    di.atr_22_d,
+    di.renko_22_d              AS renko_22_usd,
+"""
+
+FUND_VIEW_SQL = """
+CREATE VIEW public.{view} AS
+SELECT
+    'D'::text AS time_frame,
+    d.*,
+{indicator_columns}
+    h.inscode,
+    h.buy_i_volume, h.buy_n_volume, h.buy_i_value, h.buy_n_value,
+    h.buy_n_count, h.sell_i_volume, h.buy_i_count, h.sell_n_volume,
+    h.sell_i_value, h.sell_n_value, h.sell_n_count, h.sell_i_count,
+    h.buy_i_value_usd, h.buy_n_value_usd, h.sell_i_value_usd, h.sell_n_value_usd,
+
+    sd.name_en, sd.sector, sd.sector_code, sd.subsector, sd.market AS market2,
+    sd.panel, sd.share_number, sd.base_vol, sd."instrumentID",
+
+    (d.adjust_close * sd.share_number) AS marketcap,
+    (d.adjust_close * sd.share_number) / NULLIF(d.dollar_rate,0) AS marketcap_usd,
+
+    si.symbol_id
+FROM {table} d
+{indicator_join}LEFT JOIN haghighi h
+    ON d.stock_ticker = h.symbol
+   AND d.date_miladi  = h.recdate
+LEFT JOIN symboldetail sd
+    ON d.stock_ticker = sd.stock_ticker
+LEFT JOIN symbol_identity si
+    ON si.stock_ticker = d.stock_ticker;
+"""
+
+
+def _fund_view_sql(view: str, table: str) -> str:
+    indicator_table = FUND_INDICATOR_TABLES.get(view)
+    if indicator_table is None:
+        return FUND_VIEW_SQL.format(view=view, table=table, indicator_columns="", indicator_join="")
+    return FUND_VIEW_SQL.format(
+        view=view,
+        table=table,
+        indicator_columns=FUND_VIEW_INDICATOR_COLUMNS,
+        indicator_join=(
+            f"LEFT JOIN {indicator_table} di\n"
+            "    ON d.stock_ticker = di.stock_ticker\n"
+            "   AND d.date_miladi  = di.date_miladi\n"
+        ),
+    )
+
+
+def _exists(name: str) -> bool:
+    return op.get_bind().execute(sa.text("SELECT to_regclass(:name)"), {"name": f"public.{name}"}).scalar() is not None
+
+
+def _save_mvs(names):
+    """تعریف و ایندکس‌های MV های موجود، برای ساخت دوبارهٔ عین همان بعد از حذف ویوی پایه."""
+    saved = []
+    for name in names:
+        row = op.get_bind().execute(sa.text("""
+            SELECT pg_get_viewdef(c.oid),
+                   ARRAY(SELECT indexdef FROM pg_indexes WHERE schemaname = 'public' AND tablename = c.relname)
+            FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relname = :name AND c.relkind = 'm'
+        """), {"name": name}).first()
+        if row is not None:
+            saved.append((name, row[0], list(row[1])))
+    return saved
+
+
+def _restore_mvs(saved):
+    for name, definition, indexes in saved:
+        op.execute(f"CREATE MATERIALIZED VIEW public.{name} AS {definition}")
+        for index_sql in indexes:
+            op.execute(index_sql)
+
+
+def _drop_mvs():
+    """MV های وابسته به ویوهای joined (سه‌تای اول را همین migration از نو می‌سازد)."""
+    for mv in ["mv_sector_relative_strength", "mv_sector_baseline", "mv_live_sector_report"] + DEPENDENT_MVS:
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {mv};")
+
+
+def _joined_views():
+    """(view, CREATE SQL) ویوهای joined موجود."""
+    views = []
+    if _exists("daily_joined_data"):
+        views.append(("daily_joined_data", DAILY_JOINED_DATA_SQL))
+    for view, table in FUND_VIEWS:
+        if _exists(view) and _exists(table):
+            views.append((view, _fund_view_sql(view, table)))
+    return views
+
+
+def _drop_views(views):
+    # بدون CASCADE: وابستهٔ ناشناخته‌ای که در _drop_mvs نیامده باشد migration را متوقف می‌کند
+    # (به‌جای اینکه بی‌صدا حذف شود)
+    for view, _ in views:
+        op.execute(f"DROP VIEW public.{view};")
+
+
+def _create_views(views):
+    for _, create_sql in views:
+        op.execute(create_sql)
+
+
+# ---------------------------
+# MV ها با کلیدهای ذخیره‌شده (بقیهٔ منطق بدون تغییر)
+# ---------------------------
+def _live_sector_report_sql() -> str:
+    close_union = "\n      UNION ALL\n".join(
+        f"""      SELECT ticker_key, close::numeric AS close, date_miladi::date AS d
+      FROM {view}
+      WHERE close IS NOT NULL AND close <> 0
+        AND date_miladi::date <= (SELECT d FROM last_daily)"""
+        for view in ["daily_joined_data"] + [v for v, _ in FUND_VIEWS]
+    )
+    return rf"""
+    CREATE MATERIALIZED VIEW mv_live_sector_report AS
+    WITH
+    latest_live AS (
+      SELECT max("Download") AS ts
+      FROM live_market_data
+    ),
+
+    last_daily AS (
+      SELECT max(date_miladi)::date AS d
+      FROM daily_joined_data
+    ),
+
+    /* close union (stocks + all funds) -> prev_close ؛ ticker_key ستون ذخیره‌شده است */
+    daily_close_union AS (
+{close_union}
+    ),
+
+    daily_last_close AS (
+      SELECT DISTINCT ON (ticker_key)
+        ticker_key,
+        close AS prev_close
+      FROM daily_close_union
+      ORDER BY ticker_key, d DESC
+    ),
+
+    base AS (
+      SELECT
+        l."Download" AS ts,
+        l."Ticker"   AS stock_ticker,
+        COALESCE(NULLIF(trim(l."Sector"), ''), 'unknown') AS sector_live,
+
+        COALESCE(l."Value",  0)::numeric  AS value,
+        COALESCE(l."Volume", 0)::numeric  AS volume,
+        COALESCE(l."Final", l."Close")::numeric AS last_price,
+
+        COALESCE(l."Vol_Buy_R",  0)::numeric AS vol_buy_r,
+        COALESCE(l."Vol_Sell_R", 0)::numeric AS vol_sell_r,
+        COALESCE(l."Vol_Buy_I",  0)::numeric AS vol_buy_i,
+        COALESCE(l."Vol_Sell_I", 0)::numeric AS vol_sell_i,
+
+        l.ticker_key
+      FROM live_market_data l
+      JOIN latest_live x ON l."Download" = x.ts
+      WHERE l."Ticker" !~ '[24]'
+    ),
+
+    base2 AS (
+      SELECT
+        b.*,
+        d.prev_close,
+        COALESCE(
+          NULLIF(trim(m.sector_key), ''),
+          CASE
+            WHEN b.sector_live = 'صندوق سرمایه گذاری قابل معامله'
+              THEN 'صندوق سرمایه گذاری قابل معامله | ' || COALESCE(NULLIF(trim(m.etf_bucket), ''), 'other')
+            ELSE COALESCE(NULLIF(trim(b.sector_live), ''), 'other')
+          END
+        ) AS sector_key_final
+      FROM base b
+      LEFT JOIN daily_last_close d
+        ON d.ticker_key = b.ticker_key
+      LEFT JOIN mv_symbol_market_map m
+        ON m.ticker_key = b.ticker_key
+    ),
+
+    sector_rows AS (
+      SELECT
+        ts,
+        'sector'::text AS level,
+        sector_key_final AS key,
+        1 AS sort_order,
+        COUNT(*) AS symbols_count,
+        SUM(value)  AS total_value,
+        SUM(volume) AS total_volume,
+        AVG(
+          CASE
+            WHEN prev_close IS NULL OR prev_close = 0 OR last_price IS NULL THEN NULL
+            WHEN last_price > prev_close THEN 1 ELSE 0
+          END
+        ) AS green_ratio,
+        AVG(
+          CASE
+            WHEN prev_close IS NULL OR prev_close = 0 OR last_price IS NULL THEN NULL
+            ELSE 100.0 * (last_price - prev_close) / prev_close
+          END
+        ) AS eqw_avg_ret_pct,
+        SUM((vol_buy_r - vol_sell_r) * last_price) AS net_real_value,
+        SUM((vol_buy_i - vol_sell_i) * last_price) AS net_legal_value
+      FROM base2
+      GROUP BY ts, sector_key_final
+    ),
+
+    market_row AS (
+      SELECT
+        ts,
+        'market'::text AS level,
+        '__ALL__'::text AS key,
+        0 AS sort_order,
+        COUNT(*) AS symbols_count,
+        SUM(value)  AS total_value,
+        SUM(volume) AS total_volume,
+        AVG(
+          CASE
+            WHEN prev_close IS NULL OR prev_close = 0 OR last_price IS NULL THEN NULL
+            WHEN last_price > prev_close THEN 1 ELSE 0
+          END
+        ) AS green_ratio,
+        AVG(
+          CASE
+            WHEN prev_close IS NULL OR prev_close = 0 OR last_price IS NULL THEN NULL
+            ELSE 100.0 * (last_price - prev_close) / prev_close
+          END
+        ) AS eqw_avg_ret_pct,
+        SUM((vol_buy_r - vol_sell_r) * last_price) AS net_real_value,
+        SUM((vol_buy_i - vol_sell_i) * last_price) AS net_legal_value
+      FROM base2
+      GROUP BY ts
+    ),
+
+    unioned AS (
+      SELECT * FROM market_row
+      UNION ALL
+      SELECT * FROM sector_rows
+    )
+
+    SELECT
+      ts, level, key, sort_order, symbols_count, total_value, total_volume,
+      green_ratio, eqw_avg_ret_pct, net_real_value, net_legal_value
+    FROM unioned;
+    """
+
+
+def _relative_strength_sql() -> str:
+    fund_union = "\n\n      UNION ALL\n".join(
+        f"""      SELECT '{table.replace("daily_", "")}', date_miladi::date, stock_ticker, COALESCE(NULLIF(trim(sector),''),'other'), close::numeric, COALESCE(is_temp,false), ticker_key
+      FROM {view}
+      WHERE COALESCE(is_temp,false)=false AND close IS NOT NULL"""
+        for view, table in FUND_VIEWS
+    )
+    return rf"""
+    CREATE MATERIALIZED VIEW mv_sector_relative_strength AS
+    WITH
+    sym_etf_raw AS (
+      SELECT
+        ticker_key,
+        NULLIF(trim(subsector), '') AS subsector_raw,
+        NULLIF(trim(instrument_type), '') AS instrument_type
+      FROM public.symboldetail
+      WHERE sector = 'صندوق سرمايه گذاري قابل معامله'
+        AND market <> 'بازار مشتقه'
+    ),
+    sym_etf_norm AS (
+      SELECT
+        ticker_key,
+        instrument_type,
+        regexp_replace(
+          regexp_replace(
+            replace(replace(replace(trim(lower(COALESCE(subsector_raw,''))), 'ي','ی'),'ك','ک'), chr(8204), ''),
+            '\s*:\s*', ' : ', 'g'
+          ),
+          '\s+', ' ', 'g'
+        ) AS subsector_clean
+      FROM sym_etf_raw
+    ),
+    etf_bucket_map AS (
+      SELECT
+        ticker_key,
+        CASE
+          WHEN subsector_clean ILIKE '%املاک%' AND subsector_clean ILIKE '%مستغلات%'
+            THEN 'املاک و مستغلات'
+          WHEN (subsector_clean ILIKE '%سهام%' OR subsector_clean ILIKE '%سهامي%')
+           AND (subsector_clean ILIKE '%شاخص%' OR subsector_clean ILIKE '%شاخصي%')
+            THEN 'سهامی شاخصی'
+          WHEN subsector_clean ILIKE '%اهرم%' THEN 'اهرمـی'
+          WHEN subsector_clean ILIKE '%بخشی%' THEN 'بخشی'
+          WHEN subsector_clean ILIKE '%درآمد ثابت%'
+            OR subsector_clean ILIKE '%در امد ثابت%'
+            OR subsector_clean ILIKE '%در اوراق بهادار با درآمد ثابت%'
+            OR subsector_clean ILIKE '%در اوارق بهادار با درآمد ثابت%'
+            OR subsector_clean ILIKE '%در اوراق بهادار با%درآمد ثابت%'
+            THEN 'درآمد ثابت'
+          WHEN subsector_clean ILIKE '%مختلط%' THEN 'مختلط'
+          WHEN subsector_clean ILIKE '%طلا%' OR subsector_clean ILIKE '%سکه%' THEN 'طلا'
+          WHEN subsector_clean ILIKE '%کالا%' OR subsector_clean ILIKE '%commodity%' THEN 'کالایی'
+          WHEN subsector_clean ILIKE '%سهام%' OR subsector_clean ILIKE '%سهامی%' OR subsector_clean ILIKE '%سهامي%'
+            THEN 'سهامی'
+          ELSE NULL
+        END AS bucket_from_subsector,
+        CASE
+          WHEN (subsector_clean IS NULL OR trim(subsector_clean) = '') AND instrument_type = 'fund_gold'
+            THEN 'طلا'
+          WHEN (subsector_clean IS NULL OR trim(subsector_clean) = '') AND instrument_type = 'fund_zafran'
+            THEN 'زعفران'
+          ELSE NULL
+        END AS bucket_from_instrument
+      FROM sym_etf_norm
+      GROUP BY 1,2,3
+    ),
+
+    daily_union AS (
+      SELECT
+        'stock'::text AS src,
+        d.date_miladi::date AS date_miladi,
+        d.stock_ticker,
+        COALESCE(NULLIF(trim(d.sector), ''), 'other') AS sector_raw,
+        d.close::numeric AS close,
+        COALESCE(d.is_temp,false) AS is_temp,
+        d.ticker_key
+      FROM daily_joined_data d
+      WHERE COALESCE(d.is_temp,false) = false
+        AND d.close IS NOT NULL
+
+      UNION ALL
+{fund_union}
+    ),
+
+    labeled AS (
+      SELECT
+        u.date_miladi,
+        u.stock_ticker,
+        u.close,
+        u.src,
+        CASE
+          WHEN u.src <> 'stock' THEN
+            'صندوق سرمایه گذاری قابل معامله | ' ||
+            COALESCE(
+              COALESCE(eb.bucket_from_subsector, eb.bucket_from_instrument),
+              CASE
+                WHEN u.src = 'fund_gold' THEN 'طلا'
+                WHEN u.src = 'fund_zafran' THEN 'زعفران'
+                ELSE NULL
+              END,
+              'other'
+            )
+          ELSE u.sector_raw
+        END AS sector_final
+      FROM daily_union u
+      LEFT JOIN etf_bucket_map eb
+        ON eb.ticker_key = u.ticker_key
+    ),
+
+    base AS (
+      SELECT
+        date_miladi,
+        sector_final AS sector,
+        stock_ticker,
+        close,
+        LAG(close) OVER (PARTITION BY stock_ticker ORDER BY date_miladi) AS prev_close
+      FROM labeled
+    ),
+    rets AS (
+      SELECT
+        date_miladi,
+        sector,
+        stock_ticker,
+        CASE
+          WHEN prev_close IS NULL OR prev_close = 0 THEN NULL
+          ELSE (close - prev_close) / prev_close
+        END AS ret_1d
+      FROM base
+    ),
+    sector_daily AS (
+      SELECT date_miladi, sector, AVG(ret_1d) AS sector_ret_1d
+      FROM rets
+      WHERE ret_1d IS NOT NULL
+      GROUP BY 1,2
+    ),
+
+    market_only_stocks AS (
+      SELECT
+        d.date_miladi::date AS date_miladi,
+        d.stock_ticker,
+        d.close::numeric AS close,
+        LAG(d.close::numeric) OVER (PARTITION BY d.stock_ticker ORDER BY d.date_miladi::date) AS prev_close
+      FROM daily_joined_data d
+      WHERE COALESCE(d.is_temp,false) = false
+        AND d.close IS NOT NULL
+    ),
+    market_rets AS (
+      SELECT
+        date_miladi,
+        CASE
+          WHEN prev_close IS NULL OR prev_close = 0 THEN NULL
+          ELSE (close - prev_close) / prev_close
+        END AS ret_1d
+      FROM market_only_stocks
+    ),
+    market_daily AS (
+      SELECT date_miladi, AVG(ret_1d) AS market_ret_1d
+      FROM market_rets
+      WHERE ret_1d IS NOT NULL
+      GROUP BY 1
+    ),
+
+    joined AS (
+      SELECT s.date_miladi, s.sector, s.sector_ret_1d, m.market_ret_1d
+      FROM sector_daily s
+      JOIN market_daily m USING (date_miladi)
+    ),
+
+    roll AS (
+      SELECT
+        date_miladi,
+        sector,
+        sector_ret_1d,
+        market_ret_1d,
+        EXP(SUM(LN(1 + sector_ret_1d)) OVER w5)  - 1 AS sector_cumret_5d,
+        EXP(SUM(LN(1 + market_ret_1d)) OVER w5)  - 1 AS market_cumret_5d,
+        EXP(SUM(LN(1 + sector_ret_1d)) OVER w20) - 1 AS sector_cumret_20d,
+        EXP(SUM(LN(1 + market_ret_1d)) OVER w20) - 1 AS market_cumret_20d,
+        EXP(SUM(LN(1 + sector_ret_1d)) OVER w60) - 1 AS sector_cumret_60d,
+        EXP(SUM(LN(1 + market_ret_1d)) OVER w60) - 1 AS market_cumret_60d
+      FROM joined
+      WINDOW
+        w5  AS (PARTITION BY sector ORDER BY date_miladi ROWS BETWEEN 4  PRECEDING AND CURRENT ROW),
+        w20 AS (PARTITION BY sector ORDER BY date_miladi ROWS BETWEEN 19 PRECEDING AND CURRENT ROW),
+        w60 AS (PARTITION BY sector ORDER BY date_miladi ROWS BETWEEN 59 PRECEDING AND CURRENT ROW)
+    )
+    SELECT
+      date_miladi,
+      sector,
+      sector_ret_1d,
+      market_ret_1d,
+      sector_cumret_5d,
+      market_cumret_5d,
+      ((1 + sector_cumret_5d)  / NULLIF(1 + market_cumret_5d,  0)) - 1 AS rs_5d,
+      sector_cumret_20d,
+      market_cumret_20d,
+      ((1 + sector_cumret_20d) / NULLIF(1 + market_cumret_20d, 0)) - 1 AS rs_20d,
+      sector_cumret_60d,
+      market_cumret_60d,
+      ((1 + sector_cumret_60d) / NULLIF(1 + market_cumret_60d, 0)) - 1 AS rs_60d
+    FROM roll
+    ORDER BY date_miladi DESC, rs_20d DESC;
+    """
+
+
+def _sector_baseline_sql() -> str:
+    daily_union = "\n\n      UNION ALL\n".join(
+        f"""      SELECT date_miladi, ticker_key, value, marketcap, is_temp
+      FROM {view}"""
+        for view in ["daily_joined_data"] + [v for v, _ in FUND_VIEWS]
+    )
+    return rf"""
+    CREATE MATERIALIZED VIEW mv_sector_baseline AS
+    WITH
+    daily_union AS (
+{daily_union}
+    ),
+
+    daily0 AS (
+      SELECT
+        date_miladi::date AS d,
+        ticker_key,
+        COALESCE(value, 0)::numeric     AS value,
+        COALESCE(marketcap, 0)::numeric AS marketcap
+      FROM daily_union
+      WHERE COALESCE(is_temp,false) = false
+    ),
+
+    daily1 AS (
+      SELECT
+        d0.d,
+        COALESCE(NULLIF(trim(m.sector_key), ''), NULLIF(trim(m.sector), ''), 'other') AS sector,
+        d0.value,
+        d0.marketcap
+      FROM daily0 d0
+      LEFT JOIN mv_symbol_market_map m
+        ON m.ticker_key = d0.ticker_key
+    ),
+
+    daily_sector AS (
+      SELECT d, sector, SUM(value)::numeric AS total_value, SUM(marketcap)::numeric AS marketcap
+      FROM daily1
+      GROUP BY 1,2
+    ),
+
+    haghighi0 AS (
+      SELECT
+        h.recdate::date AS d,
+        h.ticker_key,
+        (COALESCE(h.buy_i_value, 0) - COALESCE(h.sell_i_value, 0))::numeric AS net_real_value
+      FROM haghighi h
+      WHERE COALESCE(h.is_temp,false) = false
+    ),
+
+    haghighi1 AS (
+      SELECT
+        h0.d,
+        COALESCE(NULLIF(trim(m.sector_key), ''), NULLIF(trim(m.sector), ''), 'other') AS sector,
+        h0.net_real_value
+      FROM haghighi0 h0
+      LEFT JOIN mv_symbol_market_map m
+        ON m.ticker_key = h0.ticker_key
+    ),
+
+    haghighi_sector AS (
+      SELECT d, sector, SUM(net_real_value)::numeric AS net_real_value
+      FROM haghighi1
+      GROUP BY 1,2
+    ),
+
+    base AS (
+      SELECT
+        ds.d,
+        ds.sector,
+        ds.total_value,
+        ds.marketcap,
+        COALESCE(hs.net_real_value, 0)::numeric AS net_real_value
+      FROM daily_sector ds
+      LEFT JOIN haghighi_sector hs
+        ON hs.d = ds.d AND hs.sector = ds.sector
+    )
+
+    SELECT
+      sector,
+      d AS date_miladi,
+      total_value,
+      marketcap,
+      net_real_value,
+      AVG(total_value)             OVER w5  AS avg_value_5d,
+      AVG(total_value)             OVER w20 AS avg_value_20d,
+      AVG(total_value)             OVER w60 AS avg_value_60d,
+      STDDEV_SAMP(total_value)     OVER w20 AS std_value_20d,
+      AVG(net_real_value)          OVER w5  AS avg_real_5d,
+      AVG(net_real_value)          OVER w20 AS avg_real_20d,
+      STDDEV_SAMP(net_real_value)  OVER w20 AS std_net_real_20d
+    FROM base
+    WINDOW
+      w5  AS (PARTITION BY sector ORDER BY d ROWS BETWEEN 4  PRECEDING AND CURRENT ROW),
+      w20 AS (PARTITION BY sector ORDER BY d ROWS BETWEEN 19 PRECEDING AND CURRENT ROW),
+      w60 AS (PARTITION BY sector ORDER BY d ROWS BETWEEN 59 PRECEDING AND CURRENT ROW);
+    """
+
+
+MV_INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_live_sector_report_ts_level_key ON mv_live_sector_report (ts, level, key);",
+    "CREATE INDEX IF NOT EXISTS ix_mv_live_sector_report_ts ON mv_live_sector_report (ts DESC);",
+    "CREATE INDEX IF NOT EXISTS ix_mv_live_sector_report_level ON mv_live_sector_report (level);",
+    "CREATE INDEX IF NOT EXISTS ix_mv_live_sector_report_key ON mv_live_sector_report (key);",
+    "CREATE INDEX IF NOT EXISTS ix_mv_live_sector_report_total_value ON mv_live_sector_report (total_value DESC);",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_sector_relative_strength_date_sector ON mv_sector_relative_strength (date_miladi, sector);",
+    "CREATE INDEX IF NOT EXISTS ix_mv_sector_relative_strength_date ON mv_sector_relative_strength (date_miladi DESC);",
+    "CREATE INDEX IF NOT EXISTS ix_mv_sector_relative_strength_rs20 ON mv_sector_relative_strength (rs_20d DESC);",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_sector_baseline_sector_date ON mv_sector_baseline (sector, date_miladi);",
+    "CREATE INDEX IF NOT EXISTS idx_mv_sector_baseline_date_desc ON mv_sector_baseline (date_miladi DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_mv_sector_baseline_sector_date_desc ON mv_sector_baseline (sector, date_miladi DESC);",
+]
+
+
+def upgrade():
+    op.execute(FUNCTIONS_SQL)
+
+    # 1) ستون‌های generated + ایندکس btree
+    for table, column, func, source, index_cols in KEY_COLUMNS:
+        _add_key_column(table, column, func, source, index_cols)
+
+    # 2) ویوهای joined از نو (ticker_key از طریق dsd.* / d.*)؛ MV های وابسته قبلش حذف می‌شوند
+    saved = _save_mvs(DEPENDENT_MVS)
+    _drop_mvs()
+    views = _joined_views()
+    _drop_views(views)
+    _create_views(views)
+    _restore_mvs(saved)
+
+    # 3) MV ها: join/فیلتر روی ستون‌های ذخیره‌شده به‌جای regexp_replace روی هر سطر
+    op.execute(_live_sector_report_sql())
+    op.execute(_relative_strength_sql())
+    op.execute(_sector_baseline_sql())
+    for sql in MV_INDEXES:
+        op.execute(sql)
+
+
+def downgrade():
+    # مثل بقیهٔ migration های MV: سه MV بازنویسی‌شده حذف می‌شوند (با upgrade مهاجرت‌های قبلی
+    # دوباره ساخته می‌شوند)؛ بقیهٔ MV های وابسته بعد از حذف ستون‌ها عیناً برمی‌گردند.
+    saved = _save_mvs(DEPENDENT_MVS)
+    _drop_mvs()
+    views = _joined_views()
+    _drop_views(views)
+
+    for table, column, _, _, index_cols in KEY_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS {_index_name(table, index_cols)};")
+        op.execute(f"ALTER TABLE IF EXISTS public.{table} DROP COLUMN IF EXISTS {column};")
+
+    # dsd.* / d.* دیگر ticker_key ندارد
+    _create_views(views)
+    _restore_mvs(saved)
+
+    op.execute("DROP FUNCTION IF EXISTS public.fa_ticker_key(text);")
+    op.execute("DROP FUNCTION IF EXISTS public.fa_sector_key(text);")
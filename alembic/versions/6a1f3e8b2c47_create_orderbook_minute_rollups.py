@@ -0,0 +1,97 @@
+"""create per-minute orderbook rollups (symbol / sector)
+
+Revision ID: 6a1f3e8b2c47
+Revises: 2d7f4a9c6e15
+Create Date: 2026-10-17 19:25:48.904113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a1f3e8b2c47'
+down_revision: Union[str, Sequence[str], None] = '2d7f4a9c6e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# همان جمع ۵ سطحی price×volume کوئری‌های orderbook_*_timeseries
+BACKFILL_SYMBOL_SQL = """
+INSERT INTO orderbook_minute_symbol (day, minute, symbol, sector, total_buy, total_sell)
+SELECT
+    "Timestamp"::date,
+    date_trunc('minute', "Timestamp"),
+    "Symbol",
+    max("Sector"),
+    COALESCE(SUM(
+        COALESCE("BuyPrice1", 0) * COALESCE("BuyVolume1", 0) +
+        COALESCE("BuyPrice2", 0) * COALESCE("BuyVolume2", 0) +
+        COALESCE("BuyPrice3", 0) * COALESCE("BuyVolume3", 0) +
+        COALESCE("BuyPrice4", 0) * COALESCE("BuyVolume4", 0) +
+        COALESCE("BuyPrice5", 0) * COALESCE("BuyVolume5", 0)
+    ), 0),
+    COALESCE(SUM(
+        COALESCE("SellPrice1", 0) * COALESCE("SellVolume1", 0) +
+        COALESCE("SellPrice2", 0) * COALESCE("SellVolume2", 0) +
+        COALESCE("SellPrice3", 0) * COALESCE("SellVolume3", 0) +
+        COALESCE("SellPrice4", 0) * COALESCE("SellVolume4", 0) +
+        COALESCE("SellPrice5", 0) * COALESCE("SellVolume5", 0)
+    ), 0)
+FROM orderbook_snapshot
+WHERE "Timestamp" IS NOT NULL AND "Symbol" IS NOT NULL
+GROUP BY 1, 2, 3
+ON CONFLICT (day, minute, symbol) DO NOTHING;
+"""
+
+BACKFILL_SECTOR_SQL = """
+INSERT INTO orderbook_minute_sector (day, minute, sector, total_buy, total_sell)
+SELECT day, minute, sector, SUM(total_buy), SUM(total_sell)
+FROM orderbook_minute_symbol
+WHERE sector IS NOT NULL
+GROUP BY 1, 2, 3
+ON CONFLICT (day, minute, sector) DO NOTHING;
+"""
+
+
+def upgrade():
+    # per-(day, minute, symbol)
+    op.create_table(
+        "orderbook_minute_symbol",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("minute", sa.DateTime(), nullable=False),
+        sa.Column("symbol", sa.Text(), nullable=False),
+        sa.Column("sector", sa.Text(), nullable=True),
+        sa.Column("sector_key", sa.Text(), sa.Computed("fa_sector_key(sector)", persisted=True)),
+        sa.Column("total_buy", sa.Numeric(), nullable=False, server_default=sa.text("0")),
+        sa.Column("total_sell", sa.Numeric(), nullable=False, server_default=sa.text("0")),
+        sa.PrimaryKeyConstraint("day", "minute", "symbol", name="orderbook_minute_symbol_pkey"),
+    )
+    op.create_index(
+        "ix_orderbook_minute_symbol_day_sector_key",
+        "orderbook_minute_symbol",
+        ["day", "sector_key", "minute"],
+    )
+
+    # per-(day, minute, sector)
+    op.create_table(
+        "orderbook_minute_sector",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("minute", sa.DateTime(), nullable=False),
+        sa.Column("sector", sa.Text(), nullable=False),
+        sa.Column("total_buy", sa.Numeric(), nullable=False, server_default=sa.text("0")),
+        sa.Column("total_sell", sa.Numeric(), nullable=False, server_default=sa.text("0")),
+        sa.PrimaryKeyConstraint("day", "minute", "sector", name="orderbook_minute_sector_pkey"),
+    )
+
+    # تاریخچهٔ موجود یک‌بار rollup می‌شود؛ از این به بعد run_live_orderbool در زمان ingest می‌نویسد
+    op.execute(BACKFILL_SYMBOL_SQL)
+    op.execute(BACKFILL_SECTOR_SQL)
+
+
+def downgrade():
+    op.drop_table("orderbook_minute_sector")
+    op.drop_index("ix_orderbook_minute_symbol_day_sector_key", table_name="orderbook_minute_symbol")
+    op.drop_table("orderbook_minute_symbol")
@@ -0,0 +1,38 @@
+"""create data_version table
+
+Revision ID: 7d3e5a1c9b20
+Revises: 1fd4acfd46f5
+Create Date: 2026-10-17 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3e5a1c9b20'
+down_revision: Union[str, Sequence[str], None] = '1fd4acfd46f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.create_table(
+        "data_version",
+        sa.Column("source", sa.Text(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default=sa.text("0")),
+        sa.Column("updated_at", sa.DateTime(), nullable=True, server_default=sa.func.now()),
+    )
+
+    # منابعی که جاب‌ها bump می‌کنند
+    op.execute("""
+        INSERT INTO data_version (source, version)
+        VALUES ('live', 0), ('daily', 0)
+        ON CONFLICT (source) DO NOTHING;
+    """)
+
+
+def downgrade():
+    op.drop_table("data_version")
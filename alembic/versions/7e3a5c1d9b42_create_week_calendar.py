@@ -0,0 +1,51 @@
+"""create week_calendar dimension (week_start / week_end / jalali labels / trading days)
+
+Revision ID: 7e3a5c1d9b42
+Revises: 4b9e2d7c5f10
+Create Date: 2026-10-17 21:48:05.130277
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e3a5c1d9b42'
+down_revision: Union[str, Sequence[str], None] = '4b9e2d7c5f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# همان هفته‌بندی سازندهٔ هفتگی (W-FRI با label/closed=left): جمعه تا پنجشنبه.
+# برچسب‌های جلالی را سازندهٔ هفتگی (jdatetime) برای ردیف‌های خالی پر می‌کند.
+BACKFILL_SQL = """
+INSERT INTO week_calendar (week_start, week_end, trading_days)
+SELECT ws, ws + 6, count(DISTINCT d)
+FROM (
+    SELECT date_miladi AS d,
+           date_miladi - ((EXTRACT(DOW FROM date_miladi)::int + 2) % 7) AS ws
+    FROM daily_stock_data
+    WHERE date_miladi IS NOT NULL
+) t
+GROUP BY ws
+ON CONFLICT (week_end) DO NOTHING;
+"""
+
+
+def upgrade():
+    op.create_table(
+        "week_calendar",
+        sa.Column("week_end", sa.Date(), nullable=False),
+        sa.Column("week_start", sa.Date(), nullable=False),
+        sa.Column("j_week_start", sa.CHAR(10), nullable=True),
+        sa.Column("j_week_end", sa.CHAR(10), nullable=True),
+        sa.Column("trading_days", sa.Integer(), nullable=False, server_default=sa.text("0")),
+        sa.PrimaryKeyConstraint("week_end", name="week_calendar_pkey"),
+    )
+    op.execute(BACKFILL_SQL)
+
+
+def downgrade():
+    op.drop_table("week_calendar")
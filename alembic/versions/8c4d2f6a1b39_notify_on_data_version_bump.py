@@ -0,0 +1,44 @@
+"""notify on data_version bump (LISTEN/NOTIFY for live push)
+
+Revision ID: 8c4d2f6a1b39
+Revises: 6a1f3e8b2c47
+Create Date: 2026-10-17 20:52:03.617480
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4d2f6a1b39'
+down_revision: Union[str, Sequence[str], None] = '6a1f3e8b2c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    # هر bump (از هر جاب) بعد از commit روی کانال data_version اعلان می‌شود؛ payload = source
+    op.execute("""
+    CREATE OR REPLACE FUNCTION public.notify_data_version()
+    RETURNS trigger
+    LANGUAGE plpgsql
+    AS $fn$
+    BEGIN
+        PERFORM pg_notify('data_version', NEW.source);
+        RETURN NEW;
+    END
+    $fn$;
+    """)
+    op.execute("DROP TRIGGER IF EXISTS trg_data_version_notify ON data_version;")
+    op.execute("""
+    CREATE TRIGGER trg_data_version_notify
+    AFTER INSERT OR UPDATE ON data_version
+    FOR EACH ROW EXECUTE FUNCTION public.notify_data_version();
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS trg_data_version_notify ON data_version;")
+    op.execute("DROP FUNCTION IF EXISTS public.notify_data_version();")
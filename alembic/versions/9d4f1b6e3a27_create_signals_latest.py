@@ -0,0 +1,53 @@
+"""create signals_latest snapshot (one row per freq / currency / ticker)
+
+Revision ID: 9d4f1b6e3a27
+Revises: 7e3a5c1d9b42
+Create Date: 2026-10-17 22:31:54.602118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4f1b6e3a27'
+down_revision: Union[str, Sequence[str], None] = '7e3a5c1d9b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SIGNAL_COLUMNS = (
+    "sig_ich_buy", "sig_ich_sell", "sig_ema_buy", "sig_ema_sell", "sig_rsi_buy", "sig_rsi_sell",
+    "sig_macd_buy", "sig_macd_sell", "sig_ema50100_buy", "sig_ema50100_sell", "renko",
+)
+
+
+def upgrade():
+    # جاب‌های اندیکاتور بعد از هر اجرا بازنویسی می‌کنند (cron_jobs/signals_snapshot.py)
+    op.create_table(
+        "signals_latest",
+        sa.Column("freq", sa.Text(), nullable=False),
+        sa.Column("currency", sa.Text(), nullable=False),
+        sa.Column("stock_ticker", sa.Text(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("name", sa.Text(), nullable=True),
+        sa.Column("sector", sa.Text(), nullable=True),
+        sa.Column("price", sa.Double(), nullable=True),
+        *[sa.Column(c, sa.Double(), nullable=False, server_default=sa.text("0")) for c in SIGNAL_COLUMNS],
+        sa.Column("ich_position", sa.Text(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=False, server_default=sa.text("now()")),
+        sa.PrimaryKeyConstraint("freq", "currency", "stock_ticker", name="signals_latest_pkey"),
+    )
+    # فیلتر (freq, currency[, sector]) و مرتب‌سازی ORDER BY sector, symbol روت
+    op.create_index(
+        "ix_signals_latest_freq_currency_sector",
+        "signals_latest",
+        ["freq", "currency", "sector", "stock_ticker"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_signals_latest_freq_currency_sector", table_name="signals_latest")
+    op.drop_table("signals_latest")
@@ -1,14 +1,15 @@
 # backend/api/OrderbookData.py
+from datetime import date
 from enum import Enum
-from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi import APIRouter, Query, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-import pandas as pd
 
 from backend.api.metadata import get_db
 from backend.users.dependencies import require_permissions
-from backend.utils.sql_loader import load_sql
+from backend.utils.sql_loader import sql_registry
 from backend.utils.response import create_response  # ← ساختار پاسخ واحد
+from backend.utils.response_formats import ResponseFormat, resolve_format, columnar_response
 
 router = APIRouter(prefix="/orderbook", tags=["📊 Orderbook"])
 
@@ -18,29 +19,33 @@ class Mode(str, Enum):
 
 @router.get("/timeseries", summary="تایم‌سری ورود/خروج سفارش‌ها (سکتوری/درون‌سکتور)")
 async def get_orderbook_timeseries(
+    request: Request,
     mode: Mode = Query(Mode.sector, description="sector یا intra-sector"),
     sector: str | None = Query(None, description="نام صنعت، فقط در حالت intra-sector لازم است"),
+    day: date | None = Query(None, description="روز (میلادی)؛ پیش‌فرض آخرین روز موجود"),
+    format: ResponseFormat | None = Query(None, description="json | columnar | arrow (یا از هدر Accept)"),
     db: AsyncSession = Depends(get_db),
     _=Depends(require_permissions("Report.OrderBook.TimeSeries","ALL"))  # ← پرمیشن
 ):
+    import pandas as pd  # lazy: pandas فقط هنگام اجرای روت لود می‌شود
     # اعتبارسنجی ورودی
     if mode == Mode.intra and not sector:
         raise HTTPException(status_code=400, detail="sector is required in intra-sector mode")
 
     # انتخاب کوئری
     if mode == Mode.sector:
-        sql = load_sql("orderbook_timeseries_sector")
-        params = {}
+        sql_name = "orderbook_timeseries_sector"
+        params = {"day": day}
         group_col = "sector"
         success_msg = "✅ Orderbook timeseries (sector)"
     else:
-        sql = load_sql("orderbook_timeseries_intrasector")
-        params = {"sector": sector}
+        sql_name = "orderbook_timeseries_intrasector"
+        params = {"day": day, "sector": sector}
         group_col = "Symbol"
         success_msg = f"✅ Orderbook timeseries (intra-sector: {sector})"
 
-    # اجرای Async
-    result = await db.execute(text(sql), params)
+    # اجرای Async (rollup دقیقه‌ای فقط برای یک روز)
+    result = await sql_registry.execute(db, sql_name, params)
     rows = result.mappings().all()
     if not rows:
         return create_response(
@@ -61,11 +66,13 @@ async def get_orderbook_timeseries(
     df = df.fillna(0)
 
     # فقط ستون‌های لازم برای LineChart در فرانت
-    out = (
-        df[["minute", group_col, "net_value"]]
-        .rename(columns={group_col: "name"})
-        .to_dict(orient="records")
-    )
+    out = df[["minute", group_col, "net_value"]].rename(columns={group_col: "name"})
+
+    fmt = resolve_format(request, format)
+    if fmt != ResponseFormat.json:
+        return columnar_response(fmt, ["minute", "name", "net_value"], out, success_msg)
+
+    out = out.to_dict(orient="records")
 
     return create_response(
         data=out,
@@ -1,14 +1,16 @@
 # backend/api/candlestick.py
-from fastapi import APIRouter, Query, Depends, HTTPException
+from fastapi import APIRouter, Query, Depends, HTTPException, Request
 from enum import Enum
+from typing import Optional
+from datetime import date
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend.api.metadata import get_db          # ← همون get_db پروژه شما
 from backend.users.dependencies import require_permissions
 from backend.utils.response import create_response
+from backend.utils.response_formats import ResponseFormat, resolve_format, columnar_response
 from backend.utils.logger import logger
-
-import math  # ✅ اضافه شد
+from backend.utils.response_cache import conditional_report, SOURCE_DAILY
 
 router = APIRouter(tags=["📈 Candlestick"])
 
@@ -21,80 +23,213 @@ class Currency(str, Enum):
     dollar = "dollar"
 
 
-# ✅ اضافه شد: تبدیل امن به float (جلوگیری از NaN/Inf برای JSON)
-def safe_float(x, default=0.0) -> float:
-    if x is None:
-        return default
-    try:
-        v = float(x)
-    except Exception:
-        return default
-    if math.isnan(v) or math.isinf(v):
-        return default
-    return v
+class Resample(str, Enum):
+    auto = "auto"      # اگر تعداد کندل‌ها از max_points بیشتر شد: تقسیم به max_points دستهٔ هم‌اندازه
+    none = "none"      # بدون تجمیع (max_points نادیده گرفته می‌شود)
+    week = "week"      # تجمیع تقویمی هفتگی
+    month = "month"    # تجمیع تقویمی ماهانه
+
+
+# ترتیب ستون‌ها در خروجی خام ECharts
+CANDLE_COLUMNS = ("date", "open", "close", "low", "high", "volume")
+
+# ستون‌های OHLCV بر اساس ارز
+_PRICE_COLUMNS = {
+    Currency.rial: ("adjust_open", "adjust_close", "adjust_low", "adjust_high", "value"),
+    Currency.dollar: ("adjust_open_usd", "adjust_close_usd", "adjust_low_usd", "adjust_high_usd", "value_usd"),
+}
+
+
+def _source_table(timeframe: Timeframe):
+    if timeframe == Timeframe.daily:
+        return "daily_joined_data", "date_miladi"
+    return "weekly_joined_data", "week_end"
+
+
+# ستون کندل موقت (روز جاری که از دیتای لایو ساخته شده و تا پایان روز عوض می‌شود)
+_TEMP_COLUMN = {
+    Timeframe.daily: "is_temp",
+    Timeframe.weekly: None,     # جدول هفتگی سطر موقت ندارد
+}
+
+
+def _next_cursor(rows, since: date) -> date:
+    """
+    تاریخ آخرین کندل قطعی (غیرموقت) پاسخ؛ کندل موقت بعد از cursor می‌ماند
+    تا در درخواست بعدی دوباره (با مقدار به‌روز یا نسخهٔ قطعی‌اش) برگردد.
+    """
+    cursor = since
+    for row in rows:
+        if row[6]:
+            break
+        cursor = date.fromisoformat(row[0].replace("/", "-"))
+    return cursor
+
+
+def _candles_sql(
+    table: str,
+    date_col: str,
+    currency: Currency,
+    where: str,
+    bucket: Optional[str],
+    temp_col: Optional[str] = None,
+) -> str:
+    """
+    کوئری کندل‌ها؛ اگر bucket داده شود OHLCV هر دسته داخل خود SQL تجمیع می‌شود:
+    open = اولین، close = آخرین، low = کمینه، high = بیشینه، volume = جمع، تاریخ = آخرین روز دسته.
+    با temp_col ستون هفتم is_temp هم برگردانده می‌شود (فقط حالت بدون تجمیع).
+    """
+    o, c, l, h, v = _PRICE_COLUMNS[currency]
+    if bucket is None:
+        temp = f",\n                   COALESCE({temp_col}, FALSE) AS is_temp" if temp_col else ""
+        return f"""
+            SELECT to_char({date_col}, 'YYYY/MM/DD') AS date,
+                   {o}::float8 AS open,
+                   {c}::float8 AS close,
+                   {l}::float8 AS low,
+                   {h}::float8 AS high,
+                   {v}::float8 AS volume{temp}
+            FROM {table}
+            WHERE {where}
+            ORDER BY {date_col}
+        """
+    return f"""
+        WITH src AS (
+            SELECT {date_col} AS d, {o} AS o, {c} AS c, {l} AS l, {h} AS h, {v} AS v,
+                   row_number() OVER (ORDER BY {date_col}) - 1 AS rn,
+                   count(*) OVER () AS n
+            FROM {table}
+            WHERE {where}
+        ),
+        bucketed AS (
+            SELECT *, {bucket} AS b FROM src
+        )
+        SELECT to_char(MAX(d), 'YYYY/MM/DD') AS date,
+               (array_agg(o ORDER BY d))[1]::float8 AS open,
+               (array_agg(c ORDER BY d DESC))[1]::float8 AS close,
+               MIN(l)::float8 AS low,
+               MAX(h)::float8 AS high,
+               SUM(v)::float8 AS volume
+        FROM bucketed
+        GROUP BY b
+        ORDER BY MIN(d)
+    """
+
+
+def _bucket_expr(resample: Resample, max_points: Optional[int]) -> Optional[str]:
+    if resample in (Resample.week, Resample.month):
+        return f"date_trunc('{resample.value}', d)"
+    if resample == Resample.auto and max_points:
+        # دسته‌های هم‌تعداد؛ تا وقتی n <= max_points هر کندل دستهٔ خودش است
+        return "CASE WHEN n <= :max_points THEN rn ELSE (rn * :max_points) / n END"
+    return None
+
+
+async def _last_bar_date(db: AsyncSession, params: dict):
+    """validator ارزان برای ETag: آخرین تاریخ نماد (index روی stock_ticker + تاریخ)"""
+    table, date_col = _source_table(params["timeframe"])
+    result = await db.execute(
+        text(f"SELECT MAX({date_col}) FROM {table} WHERE stock_ticker = :stock"),
+        {"stock": params["stock"]},
+    )
+    return result.scalar()
 
 
 @router.get("/candlestick/rawdata", summary="خامِ دیتای کندل برای ECharts")
+@conditional_report("candlestick.rawdata", sources=(SOURCE_DAILY,), validator=_last_bar_date)
 async def get_rawdata_for_echarts(
+    request: Request,
     stock: str = Query(..., description="نماد، مثلا: فملی"),
     timeframe: Timeframe = Query(Timeframe.daily, description="daily یا weekly"),
     currency: Currency = Query(Currency.rial, description="rial یا dollar"),
+    date_from: Optional[date] = Query(None, alias="from", description="از تاریخ (YYYY-MM-DD)"),
+    date_to: Optional[date] = Query(None, alias="to", description="تا تاریخ (YYYY-MM-DD)"),
+    since: Optional[date] = Query(
+        None, description="همگام‌سازی افزایشی: فقط کندل‌های بعد از این تاریخ (مقدار next_cursor پاسخ قبلی)"
+    ),
+    max_points: Optional[int] = Query(None, ge=10, le=20000, description="بیشینهٔ تعداد کندل خروجی (با resample=auto)"),
+    resample: Resample = Query(Resample.auto, description="auto | none | week | month"),
+    format: Optional[ResponseFormat] = Query(None, description="json | columnar | arrow (یا از هدر Accept)"),
     db: AsyncSession = Depends(get_db),
     _ = Depends(require_permissions("Report.CandlestickRaw","ALL"))   # ✅ پرمیشن
 ):
     try:
-        table = "daily_joined_data" if timeframe == Timeframe.daily else "weekly_joined_data"
-        date_col = "date_miladi" if timeframe == Timeframe.daily else "week_end"
-
-        if currency == Currency.rial:
-            # همان ستون‌های ریالی
-            sql = text(f"""
-                SELECT {date_col} AS date,
-                       adjust_open AS open,
-                       adjust_close AS close,
-                       adjust_low AS low,
-                       adjust_high AS high,
-                       value AS volume
-                FROM {table}
-                WHERE stock_ticker = :stock
-                ORDER BY {date_col}
-            """)
+        table, date_col = _source_table(timeframe)
+
+        if date_from and date_to and date_from > date_to:
+            raise HTTPException(status_code=400, detail="from نباید بعد از to باشد")
+
+        # بازهٔ زمانی روی (stock_ticker, تاریخ) فیلتر می‌شود؛ بدون from/to کل تاریخچه
+        conditions = ["stock_ticker = :stock"]
+        params = {"stock": stock}
+        if date_from:
+            conditions.append(f"{date_col} >= :date_from")
+            params["date_from"] = date_from
+        if date_to:
+            conditions.append(f"{date_col} <= :date_to")
+            params["date_to"] = date_to
+
+        if since:
+            # حالت cursor: کندل‌های خام بعد از cursor (بدون تجمیع) + کندل خود cursor اگر موقت باشد
+            temp_col = _TEMP_COLUMN[timeframe]
+            if temp_col:
+                conditions.append(f"({date_col} > :since OR ({date_col} = :since AND {temp_col} IS TRUE))")
+            else:
+                conditions.append(f"{date_col} > :since")
+                temp_col = "NULL::boolean"
+            params["since"] = since
+            bucket = None
         else:
-            # حالت دلاری (ستون‌های دلاری پکیج شما)
-            sql = text(f"""
-                SELECT {date_col} AS date,
-                       adjust_open_usd AS open,
-                       adjust_close_usd AS close,
-                       adjust_low_usd AS low,
-                       adjust_high_usd AS high,
-                       value_usd AS volume
-                FROM {table}
-                WHERE stock_ticker = :stock
-                ORDER BY {date_col}
-            """)
-
-        result = await db.execute(sql, {"stock": stock})
-        rows = result.mappings().all()
+            bucket, temp_col = _bucket_expr(resample, max_points), None
+            if bucket is not None and ":max_points" in bucket:
+                params["max_points"] = max_points
+
+        sql = text(_candles_sql(table, date_col, currency, " AND ".join(conditions), bucket, temp_col))
 
+        result = await db.execute(sql, params)
         # به فرمت خام ECharts: [date, open, close, low, high, volume]
-        raw = []
-        for r in rows:
-            d = r["date"]
-            # تاریخ را به "YYYY/MM/DD" تبدیل کنیم
-            ds = d.strftime("%Y/%m/%d") if hasattr(d, "strftime") else str(d)
-            raw.append([ds,
-                        safe_float(r["open"]),    # ✅ تغییر شد
-                        safe_float(r["close"]),   # ✅ تغییر شد
-                        safe_float(r["low"]),     # ✅ تغییر شد
-                        safe_float(r["high"]),    # ✅ تغییر شد
-                        safe_float(r["volume"])]) # ✅ تغییر شد
-
-        logger.info(f"[Candlestick] {stock=} {timeframe=} {currency=} rows={len(raw)}")
-        return create_response(200, "دادهٔ کندل با موفقیت برگردانده شد", raw)
+        # تاریخ در SQL به "YYYY/MM/DD" تبدیل شده و NaN/Inf در سریالایزر به null تبدیل می‌شود
+        raw = result.all()
+
+        logger.info(
+            f"[Candlestick] {stock=} {timeframe=} {currency=} {date_from=} {date_to=} "
+            f"{max_points=} {resample=} {since=} rows={len(raw)}"
+        )
+        fmt = resolve_format(request, format)
+
+        if since:
+            next_cursor = _next_cursor(raw, since).isoformat()
+            bars = [tuple(row[:6]) for row in raw]
+            if fmt != ResponseFormat.json:
+                response = columnar_response(fmt, CANDLE_COLUMNS, bars, "دادهٔ کندل با موفقیت برگردانده شد")
+                response.headers["X-Next-Cursor"] = next_cursor
+                return response
+            response = create_response(
+                status="success",
+                message="دادهٔ کندل با موفقیت برگردانده شد",
+                data={"since": since.isoformat(), "next_cursor": next_cursor, "bars": bars},
+                status_code=200,
+            )
+            response.headers["X-Next-Cursor"] = next_cursor
+            return response
+
+        if fmt != ResponseFormat.json:
+            return columnar_response(fmt, CANDLE_COLUMNS, raw, "دادهٔ کندل با موفقیت برگردانده شد")
+        return create_response(
+            status="success",
+            message="دادهٔ کندل با موفقیت برگردانده شد",
+            data=raw,
+            status_code=200,
+        )
 
     except HTTPException:
         raise
     except Exception as e:
         logger.exception("❌ خطا در دریافت دادهٔ کندل")
         # پاسخ واحد با کد 500
-        return create_response(500, "خطا در دریافت دادهٔ کندل", {"error": str(e)})
\ No newline at end of file
+        return create_response(
+            status="error",
+            message="خطا در دریافت دادهٔ کندل",
+            data={"error": str(e)},
+            status_code=500,
+        )
\ No newline at end of file
@@ -7,80 +7,112 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from backend.api.metadata import get_db
 from backend.users.dependencies import require_permissions
+from backend.utils.ceiling_index import PRICES, ceiling_index, price_key
 from backend.utils.response import create_response
+from backend.utils.response_cache import cached_report, SOURCE_DAILY
+from backend.utils.symbol_search import symbol_index
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/targets", tags=["🎯 Ceiling Targets"])
 
-DAILY_SRC = "daily_joined_data"
-
 
 # -------------------- Helpers --------------------
 
 
-def _resolve_price_col(adjusted: bool, currency: Literal["rial", "usd"]) -> str:
+def _parse_iso_date(s: Optional[str], field: str) -> Optional[dt_date]:
     """
-    ستون قیمت برای محاسبه سقف:
-      - ریالی: high یا adjust_high
-      - دلاری: high_usd یا adjust_high_usd
+    ورودی YYYY-MM-DD (string) -> datetime.date
     """
-    col = "adjust_high" if adjusted else "high"
-    if currency == "usd":
-        col += "_usd"
-    return col
+    if not s:
+        return None
+    try:
+        return dt_date.fromisoformat(s.strip())
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"{field} must be in YYYY-MM-DD format")
 
 
-def _resolve_now_col(adjusted: bool, currency: Literal["rial", "usd"]) -> str:
+def _ath_sql(price: str) -> str:
+    """
+    حالت ATH: قیمت هر نماد در آخرین روز دیتابیس + سقف تاریخی جاری آخرین ردیف پرشده
+    (ستون‌های ath_* که cron_jobs.daily.update_running_ath نگه می‌دارد) به‌جای رتبه‌بندی کل تاریخچه.
     """
-    ستون قیمت فعلی (برای محاسبه فاصله تا سقف):
-      - ریالی: close یا adjust_close
-      - دلاری: close_usd یا adjust_close_usd
+    px = PRICES[price]
+    return f"""
+    WITH lastday AS (
+      SELECT max(date_miladi) AS dmax FROM daily_stock_data
+    ),
+    base AS (
+      SELECT d.stock_ticker, d.j_date AS price_j_date, {px} AS price_now
+      FROM daily_stock_data d, lastday ld
+      WHERE d.date_miladi = ld.dmax
+        AND {px} IS NOT NULL AND {px} <> 'NaN'::float8
+    )
+    SELECT b.stock_ticker, b.price_now, b.price_j_date, a.ath, a.ath_j_date
+    FROM base b
+    LEFT JOIN LATERAL (
+      -- ردیف temp امروز هنوز پر نشده؛ آخرین ردیف پرشدهٔ همان نماد (ایندکس stock_ticker, date_miladi)
+      SELECT d2.ath_{price} AS ath, d2.ath_{price}_j_date AS ath_j_date
+      FROM daily_stock_data d2
+      WHERE d2.stock_ticker = b.stock_ticker
+        AND d2.ath_{price} IS NOT NULL
+      ORDER BY d2.date_miladi DESC
+      LIMIT 1
+    ) a ON TRUE
     """
-    col = "adjust_close" if adjusted else "close"
-    if currency == "usd":
-        col += "_usd"
-    return col
 
 
-def _resolve_sector_join(sector: Optional[str]) -> str:
-    """
-    اگر sector داده شود، join به symboldetail انجام می‌دهیم.
+async def _ceilings(
+    db: AsyncSession,
+    start_dt: Optional[dt_date],
+    end_dt: Optional[dt_date],
+    sector: Optional[str],
+    adjusted: bool,
+    currency: str,
+):
     """
-    if not sector:
-        return ""
-    # توجه: نام جدول symboldetail و ستون‌ها باید مطابق DB شما باشد
-    return """
-    JOIN symboldetail sd
-      ON sd."insCode" = b.inscode
-    WHERE sd."industry" = :sector
+    (نماد، قیمت فعلی، j_date قیمت، سقف، j_date سقف) برای هر نماد.
+      - با start_date: ایندکس درون‌حافظه‌ای range-max (backend/utils/ceiling_index.py)
+      - بدون آن (ATH): ستون‌های سقف تاریخی جاری
     """
+    price = price_key(adjusted, currency)
 
+    if start_dt:
+        index = await ceiling_index.ensure(db)
+        w = index.window(price, start_dt, end_dt)
+        rows = list(zip(w.tickers, w.price_now, w.price_j_date, w.ceiling_price, w.ceiling_j_date))
+    else:
+        rows = []
+        for r in (await db.execute(text(_ath_sql(price)))).all():
+            ticker, now, now_j, ath, ath_j = r
+            # سقف تا دیروز (ath) یا قیمت امروز؛ تساوی → تاریخ جدیدتر
+            if ath is not None and ath == ath and ath > now:
+                rows.append((ticker, now, now_j, ath, ath_j))
+            else:
+                rows.append((ticker, now, now_j, now, now_j))
 
-def _safe_num(col: str) -> str:
-    """NaN را به NULL تبدیل می‌کند"""
-    return f"CASE WHEN {col}::text = 'NaN' THEN NULL ELSE {col} END"
+    if sector:
+        index = await symbol_index.ensure(db)
+        in_sector = set(index.tickers_in_sector(sector))
+        rows = [r for r in rows if r[0] in in_sector]
+    return rows
 
 
-def _not_nan(col: str) -> str:
-    """فقط سطرهای غیر NaN"""
-    return f"NOT ({col}::text = 'NaN')"
+def _gap_pct(price_now: float, ceiling: float) -> Optional[float]:
+    return 100.0 * (ceiling - price_now) / price_now if price_now > 0 else None
 
 
-def _parse_iso_date(s: Optional[str], field: str) -> Optional[dt_date]:
-    """
-    ورودی YYYY-MM-DD (string) -> datetime.date برای asyncpg
-    """
-    if not s:
-        return None
-    try:
-        return dt_date.fromisoformat(s.strip())
-    except Exception:
-        raise HTTPException(status_code=400, detail=f"{field} must be in YYYY-MM-DD format")
+def _status(price_now: float, ceiling: float) -> str:
+    if price_now > 1.05 * ceiling:
+        return "Up ATH"
+    if price_now >= 0.95 * ceiling:
+        return "On ATH"
+    return "Below ATH"
 
 
 # -------------------- Main Endpoint --------------------
 
 @router.get("/ceiling", summary="Gap-to-Ceiling (ATH یا بازه start/end)")
+@cached_report("ceiling.targets", sources=(SOURCE_DAILY,))
 async def ceiling_targets(
     start_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="YYYY-MM-DD"),
@@ -98,8 +130,6 @@ async def ceiling_targets(
     }]
     """
     try:
-        price_col = _resolve_price_col(adjusted, currency)
-
         if end_date and not start_date:
             return create_response(
                 status="error",
@@ -108,179 +138,25 @@ async def ceiling_targets(
                 data=[],
             )
 
-        # ✅ تبدیل string به date برای asyncpg
         start_dt = _parse_iso_date(start_date, "start_date")
         end_dt = _parse_iso_date(end_date, "end_date")
 
-        # -------------------- حالت 1: بازه --------------------
-        if start_date:
-            sector_join = (
-                "JOIN (SELECT DISTINCT stock_ticker FROM symboldetail "
-                "WHERE sector = :sector) s USING (stock_ticker)"
-                if sector
-                else ""
-            )
-
-            sql = f"""
-            WITH params AS (
-              SELECT
-                CAST(:start_date AS date)                        AS start_date,
-                COALESCE(CAST(:end_date AS date), CURRENT_DATE)  AS end_wish
-            ),
-            end_anchor AS (
-              -- اگر end_wish از آخرین تاریخ دیتابیس جلوتر بود، آن را به max(date_miladi) محدود می‌کنیم
-              SELECT LEAST(p.end_wish,
-                           (SELECT max(date_miladi) FROM {DAILY_SRC})) AS end_date
-              FROM params p
-            ),
-            base AS (
-              -- آخرین قیمت هر نماد در تاریخ end_date (فقط جایی که قیمت NaN نباشد)
-              SELECT DISTINCT ON (dj.stock_ticker)
-                dj.stock_ticker,
-                dj.j_date AS price_j_date,
-                {_safe_num(f'dj.{price_col}')} AS price_now
-              FROM {DAILY_SRC} dj, end_anchor ea
-              WHERE dj.date_miladi = ea.end_date
-                AND {_not_nan(f'dj.{price_col}')}
-              ORDER BY
-                dj.stock_ticker,
-                dj.{price_col} DESC,
-                dj.date_miladi DESC
-            ),
-            ranked AS (
-              -- پیدا کردن سقف (بیشترین high / adjust_high) در بازه start_date تا end_date
-              SELECT
-                dj.stock_ticker,
-                dj.j_date,
-                dj.date_miladi,
-                {_safe_num(f'dj.{price_col}')} AS px,
-                ROW_NUMBER() OVER (
-                  PARTITION BY dj.stock_ticker
-                  ORDER BY dj.{price_col} DESC, dj.date_miladi DESC
-                ) AS rn
-              FROM {DAILY_SRC} dj
-              JOIN end_anchor ea ON TRUE
-              WHERE dj.date_miladi BETWEEN CAST(:start_date AS date) AND ea.end_date
-                AND {_not_nan(f'dj.{price_col}')}
-            ),
-            wnd AS (
-              SELECT stock_ticker, px AS ceiling_price, j_date AS ceiling_j_date
-              FROM ranked
-              WHERE rn = 1
-            )
-            SELECT
-              b.stock_ticker,
-              b.price_now,
-              b.price_j_date,
-              w.ceiling_price,
-              w.ceiling_j_date,
-              (w.ceiling_price - b.price_now) AS gap_abs,
-              CASE WHEN b.price_now > 0
-                   THEN 100.0 * (w.ceiling_price - b.price_now)/b.price_now
-                   ELSE NULL END AS gap_pct,
-              CASE
-                 WHEN w.ceiling_price IS NULL OR b.price_now IS NULL THEN NULL
-                 ELSE (b.price_now >= w.ceiling_price - 1e-9)
-              END AS hit,
-              CASE
-                 WHEN w.ceiling_price IS NULL OR b.price_now IS NULL THEN NULL
-                 WHEN b.price_now >  1.05 * w.ceiling_price THEN 'Up ATH'
-                 WHEN b.price_now >= 0.95 * w.ceiling_price THEN 'On ATH'
-                 ELSE 'Below ATH'
-              END AS status
-            FROM base b
-            JOIN wnd  w USING (stock_ticker)
-            {sector_join}
-            ORDER BY gap_pct DESC NULLS LAST;
-            """
-
-            params = {
-                "start_date": start_dt,   # ✅ date
-                "end_date": end_dt,       # ✅ date یا None
-            }
-            if sector:
-                params["sector"] = sector
-
-            rows = (await db.execute(text(sql), params)).mappings().all()
-            return create_response(data=[dict(r) for r in rows])
-
-        # -------------------- حالت 2: ATH --------------------
-        sector_join = (
-            "JOIN (SELECT DISTINCT stock_ticker FROM symboldetail "
-            "WHERE sector = :sector) s USING (stock_ticker)"
-            if sector
-            else ""
-        )
-
-        sql = f"""
-        WITH lastday AS (
-          SELECT max(date_miladi) AS dmax FROM {DAILY_SRC}
-        ),
-        base AS (
-          -- آخرین قیمت هر نماد در آخرین روز دیتابیس (فقط جایی که قیمت NaN نباشد)
-          SELECT DISTINCT ON (dj.stock_ticker)
-            dj.stock_ticker,
-            dj.j_date AS price_j_date,
-            {_safe_num(f'dj.{price_col}')} AS price_now
-          FROM {DAILY_SRC} dj, lastday ld
-          WHERE dj.date_miladi = ld.dmax
-            AND {_not_nan(f'dj.{price_col}')}
-          ORDER BY
-            dj.stock_ticker,
-            dj.{price_col} DESC,
-            dj.date_miladi DESC
-        ),
-        ranked AS (
-          -- ATH: بیشترین high / adjust_high کل تاریخ
-          SELECT
-            dj.stock_ticker,
-            dj.j_date,
-            dj.date_miladi,
-            {_safe_num(f'dj.{price_col}')} AS px,
-            ROW_NUMBER() OVER (
-              PARTITION BY dj.stock_ticker
-              ORDER BY dj.{price_col} DESC, dj.date_miladi DESC
-            ) AS rn
-          FROM {DAILY_SRC} dj
-          WHERE {_not_nan(f'dj.{price_col}')}
-        ),
-        ath AS (
-          SELECT stock_ticker, px AS ceiling_price, j_date AS ceiling_j_date
-          FROM ranked
-          WHERE rn = 1
-        )
-        SELECT
-          b.stock_ticker,
-          b.price_now,
-          b.price_j_date,
-          a.ceiling_price,
-          a.ceiling_j_date,
-          (a.ceiling_price - b.price_now) AS gap_abs,
-          CASE WHEN b.price_now > 0
-               THEN 100.0 * (a.ceiling_price - b.price_now)/b.price_now
-               ELSE NULL END AS gap_pct,
-          CASE
-             WHEN a.ceiling_price IS NULL OR b.price_now IS NULL THEN NULL
-             ELSE (b.price_now >= a.ceiling_price - 1e-9)
-          END AS hit,
-          CASE
-             WHEN a.ceiling_price IS NULL OR b.price_now IS NULL THEN NULL
-             WHEN b.price_now >  1.05 * a.ceiling_price THEN 'Up ATH'
-             WHEN b.price_now >= 0.95 * a.ceiling_price THEN 'On ATH'
-             ELSE 'Below ATH'
-          END AS status
-        FROM base b
-        JOIN ath a USING (stock_ticker)
-        {sector_join}
-        ORDER BY gap_pct DESC NULLS LAST;
-        """
-
-        params = {}
-        if sector:
-            params["sector"] = sector
-
-        rows = (await db.execute(text(sql), params)).mappings().all()
-        return create_response(data=[dict(r) for r in rows])
+        data = []
+        for ticker, now, now_j, ceiling, ceiling_j in await _ceilings(db, start_dt, end_dt, sector, adjusted, currency):
+            data.append({
+                "stock_ticker": ticker,
+                "price_now": now,
+                "price_j_date": now_j,
+                "ceiling_price": ceiling,
+                "ceiling_j_date": ceiling_j,
+                "gap_abs": ceiling - now,
+                "gap_pct": _gap_pct(now, ceiling),
+                "hit": now >= ceiling - 1e-9,
+                "status": _status(now, ceiling),
+            })
+        # ORDER BY gap_pct DESC NULLS LAST
+        data.sort(key=lambda r: (r["gap_pct"] is None, -(r["gap_pct"] or 0.0)))
+        return create_response(data=data)
 
     except HTTPException:
         raise
@@ -295,6 +171,7 @@ async def ceiling_targets(
 
 
 @router.get("/ceiling/funnel", summary="Funnel buckets of gap-to-ceiling (range-based)")
+@cached_report("ceiling.funnel", sources=(SOURCE_DAILY,))
 async def ceiling_funnel(
     start_date: Optional[str] = Query(None),
     end_date: Optional[str] = Query(None),
@@ -305,9 +182,8 @@ async def ceiling_funnel(
     _=Depends(require_permissions("Report.Ceiling.View", "ALL")),
     db: AsyncSession = Depends(get_db),
 ):
+    import numpy as np  # lazy: numpy فقط هنگام اجرای روت لود می‌شود
     try:
-        price_col = _resolve_price_col(adjusted, currency)
-
         if end_date and not start_date:
             return create_response(
                 status="error",
@@ -316,151 +192,21 @@ async def ceiling_funnel(
                 data=[],
             )
 
-        # ✅ تبدیل string به date برای asyncpg
         start_dt = _parse_iso_date(start_date, "start_date")
         end_dt = _parse_iso_date(end_date, "end_date")
 
-        if start_date:
-            sector_join = (
-                "JOIN (SELECT DISTINCT stock_ticker FROM symboldetail "
-                "WHERE sector = :sector) s USING (stock_ticker)"
-                if sector
-                else ""
-            )
-
-            sql = f"""
-            WITH params AS (
-              SELECT
-                CAST(:start_date AS date)                        AS start_date,
-                COALESCE(CAST(:end_date AS date), CURRENT_DATE)  AS end_wish
-            ),
-            end_anchor AS (
-              SELECT LEAST(p.end_wish,
-                           (SELECT max(date_miladi) FROM {DAILY_SRC})) AS end_date
-              FROM params p
-            ),
-            base AS (
-              -- آخرین قیمت هر نماد در end_date (فقط غیر NaN)
-              SELECT DISTINCT ON (dj.stock_ticker)
-                dj.stock_ticker,
-                {_safe_num(f'dj.{price_col}')} AS price_now
-              FROM {DAILY_SRC} dj, end_anchor ea
-              WHERE dj.date_miladi = ea.end_date
-                AND {_not_nan(f'dj.{price_col}')}
-              ORDER BY
-                dj.stock_ticker,
-                dj.{price_col} DESC,
-                dj.date_miladi DESC
-            ),
-            ranked AS (
-              -- سقف در بازه
-              SELECT
-                dj.stock_ticker,
-                {_safe_num(f'dj.{price_col}')} AS px,
-                ROW_NUMBER() OVER (
-                  PARTITION BY dj.stock_ticker
-                  ORDER BY dj.{price_col} DESC, dj.date_miladi DESC
-                ) AS rn
-              FROM {DAILY_SRC} dj
-              JOIN end_anchor ea ON TRUE
-              WHERE dj.date_miladi BETWEEN CAST(:start_date AS date) AND ea.end_date
-                AND {_not_nan(f'dj.{price_col}')}
-            ),
-            wnd AS (
-              SELECT stock_ticker, px AS ceiling_price
-              FROM ranked
-              WHERE rn = 1
-            )
-            SELECT
-              b.stock_ticker,
-              CASE WHEN b.price_now > 0
-                   THEN 100.0 * (w.ceiling_price - b.price_now)/b.price_now
-                   ELSE NULL END AS gap_pct
-            FROM base b
-            JOIN wnd  w USING (stock_ticker)
-            {sector_join};
-            """
-
-            params = {
-                "start_date": start_dt,  # ✅ date
-                "end_date": end_dt,      # ✅ date یا None
-            }
-            if sector:
-                params["sector"] = sector
-
-            rows = (await db.execute(text(sql), params)).mappings().all()
-        else:
-            sector_join = (
-                "JOIN (SELECT DISTINCT stock_ticker FROM symboldetail "
-                "WHERE sector = :sector) s USING (stock_ticker)"
-                if sector
-                else ""
-            )
-
-            sql = f"""
-            WITH lastday AS (
-              SELECT max(date_miladi) AS dmax FROM {DAILY_SRC}
-            ),
-            base AS (
-              -- آخرین قیمت هر نماد در آخرین روز دیتابیس (فقط غیر NaN)
-              SELECT DISTINCT ON (dj.stock_ticker)
-                dj.stock_ticker,
-                {_safe_num(f'dj.{price_col}')} AS price_now
-              FROM {DAILY_SRC} dj, lastday ld
-              WHERE dj.date_miladi = ld.dmax
-                AND {_not_nan(f'dj.{price_col}')}
-              ORDER BY
-                dj.stock_ticker,
-                dj.{price_col} DESC,
-                dj.date_miladi DESC
-            ),
-            ranked AS (
-              -- ATH
-              SELECT
-                dj.stock_ticker,
-                {_safe_num(f'dj.{price_col}')} AS px,
-                ROW_NUMBER() OVER (
-                  PARTITION BY dj.stock_ticker
-                  ORDER BY dj.{price_col} DESC, dj.date_miladi DESC
-                ) AS rn
-              FROM {DAILY_SRC} dj
-              WHERE {_not_nan(f'dj.{price_col}')}
-            ),
-            ath AS (
-              SELECT stock_ticker, px AS ceiling_price
-              FROM ranked
-              WHERE rn = 1
-            )
-            SELECT
-              b.stock_ticker,
-              CASE WHEN b.price_now > 0
-                   THEN 100.0 * (a.ceiling_price - b.price_now)/b.price_now
-                   ELSE NULL END AS gap_pct
-            FROM base b
-            JOIN ath a USING (stock_ticker)
-            {sector_join};
-            """
-
-            params = {}
-            if sector:
-                params["sector"] = sector
-
-            rows = (await db.execute(text(sql), params)).mappings().all()
-
-        gaps = [r["gap_pct"] for r in rows if r["gap_pct"] is not None]
+        rows = await _ceilings(db, start_dt, end_dt, sector, adjusted, currency)
+        now = np.fromiter((r[1] for r in rows), dtype=float, count=len(rows))
+        ceiling = np.fromiter((r[3] for r in rows), dtype=float, count=len(rows))
+        positive = now > 0
+        gaps = 100.0 * (ceiling[positive] - now[positive]) / now[positive]
 
+        # سطل i: gap <= thresholds[i] (اولین آستانه)، آخرین سطل: بزرگ‌تر از همه
         thresholds = sorted(bins)
-        buckets = [0] * (len(thresholds) + 1)
-        for g in gaps:
-            v = float(g)
-            placed = False
-            for i, th in enumerate(thresholds):
-                if v <= th:
-                    buckets[i] += 1
-                    placed = True
-                    break
-            if not placed:
-                buckets[-1] += 1
+        buckets = np.bincount(
+            np.searchsorted(np.asarray(thresholds, dtype=float), gaps, side="left"),
+            minlength=len(thresholds) + 1,
+        ).tolist()
 
         if thresholds:
             labels = [f"≤{thresholds[0]}%"]
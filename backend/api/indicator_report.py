@@ -17,6 +17,7 @@ from sqlalchemy import text
 from backend.api.metadata import get_db
 from backend.users.dependencies import require_permissions
 from backend.utils.response import create_response
+from backend.utils.symbol_search import symbol_index
 
 
 router = APIRouter(prefix="/report", tags=["📈 Indicator Report"])
@@ -86,7 +87,7 @@ async def get_indicator_table(
     ),
     search: str | None = Query(
         None,
-        description="جست‌وجو داخل نام نماد یا نام شرکت (ILIKE)."
+        description="جست‌وجو داخل نماد، نام یا نام لاتین شرکت (ایندکس symboldetail)."
     ),
     sort_by: str = Query(
         "signal_volume",
@@ -147,8 +148,10 @@ async def get_indicator_table(
         params["sectors"] = list(sectors)
 
     if search:
-        where_clauses.append(f"({COLUMN_MAP['symbol']} ILIKE :q OR {COLUMN_MAP['security_name']} ILIKE :q)")
-        params["q"] = f"%{search}%"
+        # نمادهای منطبق از ایندکس symboldetail (نرمال‌سازی ي/ك، نیم‌فاصله، کشیدگی) به‌جای ILIKE روی ویو
+        index = await symbol_index.ensure(db)
+        where_clauses.append(f"{COLUMN_MAP['symbol']} = ANY(:search_tickers)")
+        params["search_tickers"] = index.matching_tickers(search)
 
     where_sql = " AND ".join(where_clauses)
 
@@ -1,166 +1,71 @@
 # backend/api/industry_returns.py
-from fastapi import APIRouter, Query, Depends, HTTPException
+import math
+
+from fastapi import APIRouter, Query, Depends
 from typing import Optional, List, Dict, Any
 from datetime import date
-from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.api.metadata import get_db
 from backend.users.dependencies import require_permissions
 from backend.utils.response import create_response
-from backend.utils.logger import logger
+from backend.utils.trading_calendar import close_matrix
 
 router = APIRouter(tags=["📊 Industry Analytics"])
 
+
+def _resolved(start: Optional[date], end: Optional[date]) -> Dict[str, Optional[str]]:
+    return {"start_date": str(start) if start else None, "end_date": str(end) if end else None}
+
+
 @router.get(
     "/analytics/industry-returns",
     summary="بازدهی نمادهای یک صنعت بین دو تاریخ (بر مبنای Close)"
 )
 async def industry_returns(
-    industry: str = Query(..., description="نام صنعت (industry) دقیقاً مطابق symbolDetail"),
+    industry: str = Query(..., description="نام صنعت (sector در symbolDetail؛ با نرمال‌سازی فارسی)"),
     start_date: date = Query(..., description="تاریخ شروع (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="تاریخ پایان (اختیاری؛ در صورت عدم ارسال، آخرین تاریخ موجود انتخاب می‌شود)"),
     db: AsyncSession = Depends(get_db),
-    _: None = Depends(require_permissions(["analytics:view"]))
+    _=Depends(require_permissions("Report.IndustryReturns", "ALL"))
 ):
     """
-    محاسبه بازدهی نمادهای یک صنعت روی قیمت Close بین نزدیک‌ترین تاریخ‌های موجود به start_date و end_date.
-    اگر end_date None باشد، آخرین تاریخ موجود انتخاب می‌شود.
+    محاسبه بازدهی نمادهای یک صنعت روی قیمت Close بین نزدیک‌ترین روزهای معاملاتی به start_date و end_date.
+    اگر end_date None باشد، آخرین روز معاملاتی انتخاب می‌شود.
+    تقویم و closeها از ماتریس کش‌شده (backend/utils/trading_calendar.py) خوانده می‌شوند؛ بدون کوئری در مسیر درخواست.
     """
-
-    # نزدیک‌ترین تاریخ شروع
-    q_nearest_start = text("""
-        WITH syms AS (
-            SELECT sd.stock_ticker AS symbol
-            FROM symboldetail sd
-            WHERE sd.industry = :industry
-        )
-        SELECT d.recdate
-        FROM daily_stock_data d
-        JOIN syms s ON s.symbol = d.symbol
-        ORDER BY ABS(d.recdate - :start_date)
-        LIMIT 1;
-    """)
-    res_s = await db.execute(q_nearest_start, {"industry": industry, "start_date": start_date})
-    row_s = res_s.first()
-    if not row_s:
+    matrix = await close_matrix.ensure(db)
+    cols = matrix.columns_in_sector(industry)
+    if not cols:
         return create_response(
-            data={"per_stock": [], "industry_return_eq": None,
-                  "resolved_dates": {"start_date": None, "end_date": None}},
+            data={"per_stock": [], "industry_return_eq": None, "resolved_dates": _resolved(None, None)},
             message=f"داده‌ای برای صنعت «{industry}» پیدا نشد.",
             status_code=200
         )
-    resolved_start_date = row_s[0]
-
-    # نزدیک‌ترین یا آخرین تاریخ پایان
-    if end_date is not None:
-        q_nearest_end = text("""
-            WITH syms AS (
-                SELECT sd.stock_ticker AS symbol
-                FROM symboldetail sd
-                WHERE sd.industry = :industry
-            )
-            SELECT d.recdate
-            FROM daily_stock_data d
-            JOIN syms s ON s.symbol = d.symbol
-            ORDER BY ABS(d.recdate - :end_date)
-            LIMIT 1;
-        """)
-        res_e = await db.execute(q_nearest_end, {"industry": industry, "end_date": end_date})
-        row_e = res_e.first()
-        if row_e:
-            resolved_end_date = row_e[0]
-        else:
-            q_max_end = text("""
-                WITH syms AS (
-                    SELECT sd.stock_ticker AS symbol
-                    FROM symboldetail sd
-                    WHERE sd.industry = :industry
-                )
-                SELECT MAX(d.recdate) AS recdate
-                FROM daily_stock_data d
-                JOIN syms s ON s.symbol = d.symbol;
-            """)
-            res_max = await db.execute(q_max_end, {"industry": industry})
-            resolved_end_date = res_max.scalar()
-    else:
-        q_max_end = text("""
-            WITH syms AS (
-                SELECT sd.stock_ticker AS symbol
-                FROM symboldetail sd
-                WHERE sd.industry = :industry
-            )
-            SELECT MAX(d.recdate) AS recdate
-            FROM daily_stock_data d
-            JOIN syms s ON s.symbol = d.symbol;
-        """)
-        res_max = await db.execute(q_max_end, {"industry": industry})
-        resolved_end_date = res_max.scalar()
 
+    resolved_start_date, resolved_end_date = matrix.resolve(start_date, end_date)
     if not resolved_end_date:
         return create_response(
             data={"per_stock": [], "industry_return_eq": None,
-                  "resolved_dates": {"start_date": str(resolved_start_date), "end_date": None}},
+                  "resolved_dates": _resolved(resolved_start_date, None)},
             message=f"داده‌ای برای تاریخ پایان در صنعت «{industry}» موجود نیست.",
             status_code=200
         )
 
-    if resolved_start_date > resolved_end_date:
-        resolved_start_date, resolved_end_date = resolved_end_date, resolved_start_date
-
-    # گرفتن close‌های دو تاریخ
-    q_closes = text("""
-        WITH syms AS (
-            SELECT sd.stock_ticker AS symbol,
-                   sd.name,
-                   sd.sector,
-                   sd.industry
-            FROM symboldetail sd
-            WHERE sd.industry = :industry
-        ),
-        s_close AS (
-            SELECT d.symbol, d.close AS start_close
-            FROM daily_stock_data d
-            JOIN syms s ON s.symbol = d.symbol
-            WHERE d.recdate = :sdate
-        ),
-        e_close AS (
-            SELECT d.symbol, d.close AS end_close
-            FROM daily_stock_data d
-            JOIN syms s ON s.symbol = d.symbol
-            WHERE d.recdate = :edate
-        )
-        SELECT s.symbol,
-               s.name,
-               s.sector,
-               s.industry,
-               sc.start_close,
-               ec.end_close
-        FROM syms s
-        LEFT JOIN s_close sc ON sc.symbol = s.symbol
-        LEFT JOIN e_close ec ON ec.symbol = s.symbol;
-    """)
-
-    rows = (await db.execute(
-        q_closes,
-        {"industry": industry, "sdate": resolved_start_date, "edate": resolved_end_date}
-    )).mappings().all()
+    start_close, end_close, ret = matrix.returns(resolved_start_date, resolved_end_date)
 
     per_stock: List[Dict[str, Any]] = []
-    for r in rows:
-        start_close = r["start_close"]
-        end_close = r["end_close"]
-        if start_close is None or end_close is None or start_close == 0:
+    for j in cols:
+        if math.isnan(ret[j]):  # close یکی از دو روز نیست یا صفر است
             continue
-        ret_pct = ((end_close / start_close) - 1.0) * 100.0
         per_stock.append({
-            "symbol": r["symbol"],
-            "name": r["name"],
-            "sector": r["sector"],
-            "industry": r["industry"],
-            "start_close": float(start_close),
-            "end_close": float(end_close),
-            "return_pct": ret_pct
+            "symbol": matrix.tickers[j],
+            "name": matrix.names[j],
+            "sector": matrix.sectors[j],
+            "industry": matrix.sectors[j],
+            "start_close": float(start_close[j]),
+            "end_close": float(end_close[j]),
+            "return_pct": float(ret[j])
         })
 
     industry_return_eq = None
@@ -168,10 +73,7 @@ async def industry_returns(
         industry_return_eq = sum(x["return_pct"] for x in per_stock) / len(per_stock)
 
     payload = {
-        "resolved_dates": {
-            "start_date": str(resolved_start_date),
-            "end_date": str(resolved_end_date)
-        },
+        "resolved_dates": _resolved(resolved_start_date, resolved_end_date),
         "per_stock": per_stock,
         "industry_return_eq": industry_return_eq
     }
@@ -183,3 +85,35 @@ async def industry_returns(
     )
 
     return create_response(data=payload, message=msg, status_code=200)
+
+
+@router.get(
+    "/analytics/industry-returns/matrix",
+    summary="بازدهی هم‌وزن و وزنی (ارزش بازار) همهٔ صنایع بین دو تاریخ"
+)
+async def industry_returns_matrix(
+    start_date: date = Query(..., description="تاریخ شروع (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="تاریخ پایان (اختیاری؛ پیش‌فرض آخرین تاریخ موجود)"),
+    db: AsyncSession = Depends(get_db),
+    _=Depends(require_permissions("Report.IndustryReturns", "ALL"))
+):
+    """
+    همهٔ صنایع در یک گذر برداری روی ماتریس close:
+    - return_eq: میانگین سادهٔ بازدهی نمادها
+    - return_cap: میانگین وزنی با ارزش بازار روز شروع (close × share_number)
+    """
+    matrix = await close_matrix.ensure(db)
+    resolved_start_date, resolved_end_date = matrix.resolve(start_date, end_date)
+    if not resolved_start_date or not resolved_end_date:
+        return create_response(
+            data={"resolved_dates": _resolved(None, None), "industries": []},
+            message="داده‌ای برای محاسبه بازدهی صنایع موجود نیست.",
+            status_code=200
+        )
+
+    industries = matrix.industry_matrix(resolved_start_date, resolved_end_date)
+    return create_response(
+        data={"resolved_dates": _resolved(resolved_start_date, resolved_end_date), "industries": industries},
+        message=f"بازدهی {len(industries)} صنعت بین {resolved_start_date} و {resolved_end_date} محاسبه شد.",
+        status_code=200
+    )
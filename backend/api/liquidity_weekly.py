@@ -1,14 +1,16 @@
 # backend/api/liquidity_weekly.py
 # -*- coding: utf-8 -*-
 
-from datetime import date
+from datetime import date, datetime
 from typing import Optional, Dict, List, Tuple
-from fastapi import APIRouter, Query, Depends, HTTPException
+from zoneinfo import ZoneInfo
+from fastapi import APIRouter, Query, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 
 from backend.api.metadata import get_db
 from backend.users.dependencies import require_permissions
+from backend.utils.response_cache import cached_payload, cached_value, conditional_report, SOURCE_DAILY
 
 router = APIRouter(prefix="/liquidity/weekly", tags=["📈 Weekly Liquidity"])
 
@@ -33,42 +35,53 @@ def _metric_sql(metric: str) -> Tuple[str, str]:
         raise HTTPException(status_code=400, detail="Invalid metric. Use: value | value_usd | net_flow | net_flow_usd")
 
 
+def _today() -> date:
+    return datetime.now(ZoneInfo("Asia/Tehran")).date()
+
+
+async def _effective_date_to(db: AsyncSession, params: Dict[str, object]) -> date:
+    """date_to خالی = امروز؛ در ETag لحاظ می‌شود تا پاسخ دیروز برای امروز 304 نشود."""
+    return params.get("date_to") or _today()
+
+
 async def _compute_window(
     db: AsyncSession,
-    base_filters: List[str],
-    params: Dict[str, object],
+    date_from: Optional[date],
+    date_to: date,
     limit_weeks: int,
 ) -> Tuple[Optional[date], Optional[date], List[str]]:
     """
-    هفته‌های مؤثر، با قوانین:
+    هفته‌های مؤثر از week_calendar (lookup بازه‌ای روی PK week_end)، با قوانین:
       - اگر date_from ست باشد: کل بازهٔ date_from..date_to (limit_weeks بی‌اثر)
       - اگر date_from ست نباشد: آخرین limit_weeks هفته تا date_to
+    نتیجه تا bump بعدی نسخهٔ daily در کش گزارش‌ها (cached_value) می‌ماند.
     """
-    q = text(f"""
-        SELECT DISTINCT week_end::date AS w
-        FROM weekly_joined_data
-        WHERE {" AND ".join(base_filters)}
-        ORDER BY w
-    """)
-    rows = (await db.execute(q, params)).mappings().all()
-    weeks_all = [r["w"].isoformat() for r in rows]
-
-    if not weeks_all:
-        return None, None, []
-
-    # حالت 1: date_from مشخص شده → ignore limit_weeks
-    if "date_from" in params and params["date_from"]:
-        weeks_eff = weeks_all
+    params: Dict[str, object] = {"date_to": date_to}
+    if date_from:
+        q = text("""
+            SELECT week_end FROM week_calendar
+            WHERE week_end BETWEEN :date_from AND :date_to AND trading_days > 0
+            ORDER BY week_end
+        """)
+        params["date_from"] = date_from
     else:
-        # حالت 2: date_from خالی → فقط آخرین limit_weeks هفته
-        if limit_weeks > 0 and len(weeks_all) > limit_weeks:
-            weeks_eff = weeks_all[-limit_weeks:]
-        else:
-            weeks_eff = weeks_all
+        # limit_weeks = 0 → بدون محدودیت
+        q = text("""
+            SELECT week_end FROM (
+                SELECT week_end FROM week_calendar
+                WHERE week_end <= :date_to AND trading_days > 0
+                ORDER BY week_end DESC
+                LIMIT :limit_weeks
+            ) t
+            ORDER BY week_end
+        """)
+        params["limit_weeks"] = limit_weeks or None
 
-    wmin = date.fromisoformat(weeks_eff[0])
-    wmax = date.fromisoformat(weeks_eff[-1])
-    return wmin, wmax, weeks_eff
+    async def load():
+        weeks = [r[0].isoformat() for r in (await db.execute(q, params)).all()]
+        return (date.fromisoformat(weeks[0]), date.fromisoformat(weeks[-1]), weeks) if weeks else (None, None, [])
+
+    return await cached_value(db, "liquidity.weekly_pivot.window", params, load, sources=(SOURCE_DAILY,))
 
 
 async def _pie_value_usd_by_sector_range(
@@ -123,195 +136,122 @@ async def _pie_value_usd_by_symbols_of_sector_range(
     return {"week_end": wmax.isoformat(), "unit": "USD", "sector": sector, "items": items}
 
 
-@router.get("/pivot", summary="Pivot هفتگی نقدینگی (sector | total) با خروجی یکپارچه")
-async def get_weekly_liquidity_pivot(
-    mode: str = Query("sector", description="sector | total"),
-    metric: str = Query("value_usd", description="value | value_usd | net_flow | net_flow_usd"),
-    date_to: date = Query(default=date.today(), description="آخرین تاریخ شامل‌شونده"),
-    date_from: Optional[date] = Query(default=None, description="اولین تاریخ شامل‌شونده"),
-    sector: Optional[str] = Query(default=None, description="نام صنعت"),
-    symbol: Optional[str] = Query(default=None, description="نماد (در صورت ست بودن، sector اجباری است)"),
-    limit_weeks: int = Query(12, ge=0, description="تعداد هفته‌های اخیر (0 = بدون محدودیت)"),
-    sort_by: str = Query("value_desc", description="برای sector_totals در حالت total: value_desc | value_asc | name_asc | name_desc"),
-    db: AsyncSession = Depends(get_db),
-    _=Depends(require_permissions("Report.Liquidity.WeeklyPivot","ALL"))
-):
-    """
-    منبع داده: weekly_joined_data
-    خروجی همیشه فقط شامل این 3 کلید است:
-      - sector_totals
-      - total_timeseries = { name, unit, weeks, data }
-      - fix_value_pie
-    و هر سه دقیقاً در یک «بازهٔ مؤثر» محاسبه می‌شوند:
-      - اگر date_from ست باشد: date_from..date_to
-      - اگر date_from ست نباشد: آخرین limit_weeks هفته تا date_to
-    """
-    try:
-        mode = (mode or "").lower().strip()
-        if mode not in {"sector", "total"}:
-            raise HTTPException(status_code=400, detail="Invalid mode. Use 'sector' or 'total'.")
-
-        metric_expr, unit_label = _metric_sql(metric)
-
-        # ===== فیلتر تاریخ پایه =====
-        base_filters = ["week_end <= :date_to"]
-        params: Dict[str, object] = {"date_to": date_to}
-        if date_from:
-            base_filters.append("week_end >= :date_from")
-            params["date_from"] = date_from
+async def _pivot_payload(
+    db: AsyncSession,
+    mode: str,
+    metric: str,
+    sector: Optional[str],
+    symbol: Optional[str],
+    sort_by: str,
+    wmin: date,
+    wmax: date,
+    weeks: List[str],
+) -> Dict:
+    """sector_totals / total_timeseries / fix_value_pie روی بازهٔ مؤثر wmin..wmax"""
+    metric_expr, unit_label = _metric_sql(metric)
 
-        # ===== محاسبه پنجره مؤثر (wmin,wmax,weeks) یکبار و استفاده همه‌جا =====
-        wmin, wmax, weeks = await _compute_window(db, base_filters, params, limit_weeks)
-        if not weeks:
-            # خروجی خالی
-            return {
-                "sector_totals": [],
-                "total_timeseries": {"name": "Total", "unit": unit_label, "weeks": [], "data": []},
-                "fix_value_pie": {"week_end": None, "unit": "USD", "items": []}
-            }
+    # ===================== حالت: TOTAL =====================
+    if mode == "total":
+        # total_timeseries: جمع کل بازار در هر هفته (در بازه مؤثر)
+        q_ts = text(f"""
+            SELECT week_end::date AS week_end,
+                   {metric_expr}  AS total_val
+            FROM weekly_joined_data
+            WHERE week_end BETWEEN :wmin AND :wmax
+            GROUP BY week_end
+            ORDER BY week_end
+        """)
+        rows_ts = (await db.execute(q_ts, {"wmin": wmin, "wmax": wmax})).mappings().all()
+        data_map = {r["week_end"].isoformat(): float(r["total_val"] or 0.0) for r in rows_ts}
+        data = [data_map.get(w, 0.0) for w in weeks]
 
-        # ===================== حالت: TOTAL =====================
-        if mode == "total":
-            # total_timeseries: جمع کل بازار در هر هفته (در بازه مؤثر)
-            q_ts = text(f"""
-                SELECT week_end::date AS week_end,
-                       {metric_expr}  AS total_val
+        # sector_totals: جمع بازه برای صنایع (در بازه مؤثر)
+        q_tot = text(f"""
+            SELECT COALESCE(sector,'نامشخص') AS grp,
+                   SUM(inner_val)             AS gsum
+            FROM (
+                SELECT sector, week_end, {metric_expr} AS inner_val
                 FROM weekly_joined_data
                 WHERE week_end BETWEEN :wmin AND :wmax
-                GROUP BY week_end
-                ORDER BY week_end
-            """)
-            rows_ts = (await db.execute(q_ts, {"wmin": wmin, "wmax": wmax})).mappings().all()
-            data_map = {r["week_end"].isoformat(): float(r["total_val"] or 0.0) for r in rows_ts}
-            data = [data_map.get(w, 0.0) for w in weeks]
-
-            # sector_totals: جمع بازه برای صنایع (در بازه مؤثر)
-            q_tot = text(f"""
-                SELECT COALESCE(sector,'نامشخص') AS grp,
-                       SUM(inner_val)             AS gsum
-                FROM (
-                    SELECT sector, week_end, {metric_expr} AS inner_val
-                    FROM weekly_joined_data
-                    WHERE week_end BETWEEN :wmin AND :wmax
-                    GROUP BY sector, week_end
-                ) t
-                GROUP BY grp
-            """)
-            rows_tot = (await db.execute(q_tot, {"wmin": wmin, "wmax": wmax})).mappings().all()
-            sector_totals = [{"name": r["grp"], "value": float(r["gsum"] or 0.0)} for r in rows_tot]
-
-            # مرتب‌سازی
-            sort_by_norm = (sort_by or "value_desc").lower().strip()
-            if sort_by_norm not in {"value_desc", "value_asc", "name_asc", "name_desc"}:
-                raise HTTPException(status_code=400, detail="Invalid sort_by. Use value_desc | value_asc | name_asc | name_desc")
-            if sort_by_norm == "value_desc":
-                sector_totals.sort(key=lambda x: x["value"], reverse=True)
-            elif sort_by_norm == "value_asc":
-                sector_totals.sort(key=lambda x: x["value"])
-            elif sort_by_norm == "name_asc":
-                sector_totals.sort(key=lambda x: x["name"])
-            elif sort_by_norm == "name_desc":
-                sector_totals.sort(key=lambda x: x["name"], reverse=True)
-
-            # Pie صنایع (value_usd) در همان بازه مؤثر
-            fix_value_pie = await _pie_value_usd_by_sector_range(db, wmin, wmax)
-
-            return {
-                "sector_totals": sector_totals,
-                "total_timeseries": {"name": "Total", "unit": unit_label, "weeks": weeks, "data": data},
-                "fix_value_pie": fix_value_pie
-            }
+                GROUP BY sector, week_end
+            ) t
+            GROUP BY grp
+        """)
+        rows_tot = (await db.execute(q_tot, {"wmin": wmin, "wmax": wmax})).mappings().all()
+        sector_totals = [{"name": r["grp"], "value": float(r["gsum"] or 0.0)} for r in rows_tot]
+
+        # مرتب‌سازی
+        sort_by_norm = (sort_by or "value_desc").lower().strip()
+        if sort_by_norm not in {"value_desc", "value_asc", "name_asc", "name_desc"}:
+            raise HTTPException(status_code=400, detail="Invalid sort_by. Use value_desc | value_asc | name_asc | name_desc")
+        if sort_by_norm == "value_desc":
+            sector_totals.sort(key=lambda x: x["value"], reverse=True)
+        elif sort_by_norm == "value_asc":
+            sector_totals.sort(key=lambda x: x["value"])
+        elif sort_by_norm == "name_asc":
+            sector_totals.sort(key=lambda x: x["name"])
+        elif sort_by_norm == "name_desc":
+            sector_totals.sort(key=lambda x: x["name"], reverse=True)
+
+        # Pie صنایع (value_usd) در همان بازه مؤثر
+        fix_value_pie = await _pie_value_usd_by_sector_range(db, wmin, wmax)
 
-        # ===================== حالت: SECTOR =====================
-        # اگر sector انتخاب نشده: مثل total
-        if not sector:
-            q_ts = text(f"""
-                SELECT week_end::date AS week_end,
-                       {metric_expr}  AS total_val
-                FROM weekly_joined_data
-                WHERE week_end BETWEEN :wmin AND :wmax
-                GROUP BY week_end
-                ORDER BY week_end
-            """)
-            rows_ts = (await db.execute(q_ts, {"wmin": wmin, "wmax": wmax})).mappings().all()
-            data_map = {r["week_end"].isoformat(): float(r["total_val"] or 0.0) for r in rows_ts}
-            data = [data_map.get(w, 0.0) for w in weeks]
-
-            q_tot = text(f"""
-                SELECT COALESCE(sector,'نامشخص') AS grp,
-                       SUM(inner_val)             AS gsum
-                FROM (
-                    SELECT sector, week_end, {metric_expr} AS inner_val
-                    FROM weekly_joined_data
-                    WHERE week_end BETWEEN :wmin AND :wmax
-                    GROUP BY sector, week_end
-                ) t
-                GROUP BY grp
-            """)
-            rows_tot = (await db.execute(q_tot, {"wmin": wmin, "wmax": wmax})).mappings().all()
-            sector_totals = [{"name": r["grp"], "value": float(r["gsum"] or 0.0)} for r in rows_tot]
-
-            fix_value_pie = await _pie_value_usd_by_sector_range(db, wmin, wmax)
+        return {
+            "sector_totals": sector_totals,
+            "total_timeseries": {"name": "Total", "unit": unit_label, "weeks": weeks, "data": data},
+            "fix_value_pie": fix_value_pie
+        }
 
-            return {
-                "sector_totals": sector_totals,
-                "total_timeseries": {"name": "Total", "unit": unit_label, "weeks": weeks, "data": data},
-                "fix_value_pie": fix_value_pie
-            }
+    # ===================== حالت: SECTOR =====================
+    # اگر sector انتخاب نشده: مثل total
+    if not sector:
+        q_ts = text(f"""
+            SELECT week_end::date AS week_end,
+                   {metric_expr}  AS total_val
+            FROM weekly_joined_data
+            WHERE week_end BETWEEN :wmin AND :wmax
+            GROUP BY week_end
+            ORDER BY week_end
+        """)
+        rows_ts = (await db.execute(q_ts, {"wmin": wmin, "wmax": wmax})).mappings().all()
+        data_map = {r["week_end"].isoformat(): float(r["total_val"] or 0.0) for r in rows_ts}
+        data = [data_map.get(w, 0.0) for w in weeks]
 
-        # اگر symbol ست شده باشد:
-        if symbol:
-            # سری زمانی نماد انتخابی در بازه مؤثر
-            q_ts = text(f"""
-                SELECT week_end::date AS week_end,
-                       {metric_expr}  AS total_val
+        q_tot = text(f"""
+            SELECT COALESCE(sector,'نامشخص') AS grp,
+                   SUM(inner_val)             AS gsum
+            FROM (
+                SELECT sector, week_end, {metric_expr} AS inner_val
                 FROM weekly_joined_data
                 WHERE week_end BETWEEN :wmin AND :wmax
-                  AND sector = :sector AND stock_ticker = :symbol
-                GROUP BY week_end
-                ORDER BY week_end
-            """)
-            rows_ts = (await db.execute(q_ts, {"wmin": wmin, "wmax": wmax, "sector": sector, "symbol": symbol})).mappings().all()
-            data_map = {r["week_end"].isoformat(): float(r["total_val"] or 0.0) for r in rows_ts}
-            data = [data_map.get(w, 0.0) for w in weeks]
-
-            # جمع بازه برای نمادهای همین صنعت
-            q_tot = text(f"""
-                SELECT stock_ticker AS sym, SUM(inner_val) AS gsum
-                FROM (
-                    SELECT stock_ticker, week_end, {metric_expr} AS inner_val
-                    FROM weekly_joined_data
-                    WHERE week_end BETWEEN :wmin AND :wmax
-                      AND sector = :sector
-                    GROUP BY stock_ticker, week_end
-                ) t
-                GROUP BY sym
-                ORDER BY gsum DESC NULLS LAST
-            """)
-            rows_tot = (await db.execute(q_tot, {"wmin": wmin, "wmax": wmax, "sector": sector})).mappings().all()
-            sector_totals = [{"name": r["sym"], "value": float(r["gsum"] or 0.0)} for r in rows_tot]
-
-            # Pie نمادهای صنعت (value_usd) در بازه مؤثر
-            fix_value_pie = await _pie_value_usd_by_symbols_of_sector_range(db, wmin, wmax, sector)
+                GROUP BY sector, week_end
+            ) t
+            GROUP BY grp
+        """)
+        rows_tot = (await db.execute(q_tot, {"wmin": wmin, "wmax": wmax})).mappings().all()
+        sector_totals = [{"name": r["grp"], "value": float(r["gsum"] or 0.0)} for r in rows_tot]
 
-            return {
-                "sector_totals": sector_totals,
-                "total_timeseries": {"name": symbol, "unit": unit_label, "weeks": weeks, "data": data},
-                "fix_value_pie": fix_value_pie
-            }
+        fix_value_pie = await _pie_value_usd_by_sector_range(db, wmin, wmax)
+
+        return {
+            "sector_totals": sector_totals,
+            "total_timeseries": {"name": "Total", "unit": unit_label, "weeks": weeks, "data": data},
+            "fix_value_pie": fix_value_pie
+        }
 
-        # فقط sector ست شده (symbol خالی):
-        # سری زمانی جمع همان صنعت
+    # اگر symbol ست شده باشد:
+    if symbol:
+        # سری زمانی نماد انتخابی در بازه مؤثر
         q_ts = text(f"""
             SELECT week_end::date AS week_end,
                    {metric_expr}  AS total_val
             FROM weekly_joined_data
             WHERE week_end BETWEEN :wmin AND :wmax
-              AND sector = :sector
+              AND sector = :sector AND stock_ticker = :symbol
             GROUP BY week_end
             ORDER BY week_end
         """)
-        rows_ts = (await db.execute(q_ts, {"wmin": wmin, "wmax": wmax, "sector": sector})).mappings().all()
+        rows_ts = (await db.execute(q_ts, {"wmin": wmin, "wmax": wmax, "sector": sector, "symbol": symbol})).mappings().all()
         data_map = {r["week_end"].isoformat(): float(r["total_val"] or 0.0) for r in rows_ts}
         data = [data_map.get(w, 0.0) for w in weeks]
 
@@ -331,15 +271,116 @@ async def get_weekly_liquidity_pivot(
         rows_tot = (await db.execute(q_tot, {"wmin": wmin, "wmax": wmax, "sector": sector})).mappings().all()
         sector_totals = [{"name": r["sym"], "value": float(r["gsum"] or 0.0)} for r in rows_tot]
 
-        # Pie نمادهای همان صنعت (value_usd) در بازه مؤثر
+        # Pie نمادهای صنعت (value_usd) در بازه مؤثر
         fix_value_pie = await _pie_value_usd_by_symbols_of_sector_range(db, wmin, wmax, sector)
 
         return {
             "sector_totals": sector_totals,
-            "total_timeseries": {"name": sector, "unit": unit_label, "weeks": weeks, "data": data},
+            "total_timeseries": {"name": symbol, "unit": unit_label, "weeks": weeks, "data": data},
             "fix_value_pie": fix_value_pie
         }
 
+    # فقط sector ست شده (symbol خالی):
+    # سری زمانی جمع همان صنعت
+    q_ts = text(f"""
+        SELECT week_end::date AS week_end,
+               {metric_expr}  AS total_val
+        FROM weekly_joined_data
+        WHERE week_end BETWEEN :wmin AND :wmax
+          AND sector = :sector
+        GROUP BY week_end
+        ORDER BY week_end
+    """)
+    rows_ts = (await db.execute(q_ts, {"wmin": wmin, "wmax": wmax, "sector": sector})).mappings().all()
+    data_map = {r["week_end"].isoformat(): float(r["total_val"] or 0.0) for r in rows_ts}
+    data = [data_map.get(w, 0.0) for w in weeks]
+
+    # جمع بازه برای نمادهای همین صنعت
+    q_tot = text(f"""
+        SELECT stock_ticker AS sym, SUM(inner_val) AS gsum
+        FROM (
+            SELECT stock_ticker, week_end, {metric_expr} AS inner_val
+            FROM weekly_joined_data
+            WHERE week_end BETWEEN :wmin AND :wmax
+              AND sector = :sector
+            GROUP BY stock_ticker, week_end
+        ) t
+        GROUP BY sym
+        ORDER BY gsum DESC NULLS LAST
+    """)
+    rows_tot = (await db.execute(q_tot, {"wmin": wmin, "wmax": wmax, "sector": sector})).mappings().all()
+    sector_totals = [{"name": r["sym"], "value": float(r["gsum"] or 0.0)} for r in rows_tot]
+
+    # Pie نمادهای همان صنعت (value_usd) در بازه مؤثر
+    fix_value_pie = await _pie_value_usd_by_symbols_of_sector_range(db, wmin, wmax, sector)
+
+    return {
+        "sector_totals": sector_totals,
+        "total_timeseries": {"name": sector, "unit": unit_label, "weeks": weeks, "data": data},
+        "fix_value_pie": fix_value_pie
+    }
+
+
+@router.get("/pivot", summary="Pivot هفتگی نقدینگی (sector | total) با خروجی یکپارچه")
+@conditional_report("liquidity.weekly_pivot", sources=(SOURCE_DAILY,), validator=_effective_date_to)
+async def get_weekly_liquidity_pivot(
+    request: Request,
+    mode: str = Query("sector", description="sector | total"),
+    metric: str = Query("value_usd", description="value | value_usd | net_flow | net_flow_usd"),
+    date_to: Optional[date] = Query(default=None, description="آخرین تاریخ شامل‌شونده (پیش‌فرض: امروز)"),
+    date_from: Optional[date] = Query(default=None, description="اولین تاریخ شامل‌شونده"),
+    sector: Optional[str] = Query(default=None, description="نام صنعت"),
+    symbol: Optional[str] = Query(default=None, description="نماد (در صورت ست بودن، sector اجباری است)"),
+    limit_weeks: int = Query(12, ge=0, description="تعداد هفته‌های اخیر (0 = بدون محدودیت)"),
+    sort_by: str = Query("value_desc", description="برای sector_totals در حالت total: value_desc | value_asc | name_asc | name_desc"),
+    db: AsyncSession = Depends(get_db),
+    _=Depends(require_permissions("Report.Liquidity.WeeklyPivot","ALL"))
+):
+    """
+    منبع داده: weekly_joined_data
+    خروجی همیشه فقط شامل این 3 کلید است:
+      - sector_totals
+      - total_timeseries = { name, unit, weeks, data }
+      - fix_value_pie
+    و هر سه دقیقاً در یک «بازهٔ مؤثر» محاسبه می‌شوند:
+      - اگر date_from ست باشد: date_from..date_to
+      - اگر date_from ست نباشد: آخرین limit_weeks هفته تا date_to
+    """
+    try:
+        mode = (mode or "").lower().strip()
+        if mode not in {"sector", "total"}:
+            raise HTTPException(status_code=400, detail="Invalid mode. Use 'sector' or 'total'.")
+
+        _, unit_label = _metric_sql(metric)
+        date_to = date_to or _today()
+
+        # ===== پنجرهٔ مؤثر (wmin,wmax,weeks) از week_calendar؛ یکبار و استفاده همه‌جا =====
+        wmin, wmax, weeks = await _compute_window(db, date_from, date_to, limit_weeks)
+        if not weeks:
+            # خروجی خالی
+            return {
+                "sector_totals": [],
+                "total_timeseries": {"name": "Total", "unit": unit_label, "weeks": [], "data": []},
+                "fix_value_pie": {"week_end": None, "unit": "USD", "items": []}
+            }
+
+        # کش نتیجه با کلید (metric، فیلتر صنعت/نماد، پنجره) — from/to/limit_weeks متفاوت با پنجرهٔ یکسان، یک محاسبه
+        if mode == "total":
+            sector = symbol = None
+        elif not sector:
+            symbol = None
+        key = {
+            "mode": mode, "metric": metric, "sector": sector, "symbol": symbol,
+            "sort_by": sort_by if mode == "total" else None, "wmin": wmin, "wmax": wmax,
+        }
+        return await cached_payload(
+            db,
+            "liquidity.weekly_pivot.payload",
+            key,
+            lambda: _pivot_payload(db, mode, metric, sector, symbol, sort_by, wmin, wmax, weeks),
+            sources=(SOURCE_DAILY,),
+        )
+
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,135 @@
+# backend/api/live_stream.py
+# -*- coding: utf-8 -*-
+"""
+Server-Sent Events برای داشبوردهای لحظه‌ای.
+
+    GET /api/live/stream?topic=market&topic=sector:فلزات اساسی&topic=bumpchart:sector
+
+هر رویداد:  event: <topic>  ،  data: همان JSON پاسخ روت معادل (create_response)
+payload هر topic بعد از هر refresh جاب‌های لایو فقط یکبار ساخته می‌شود (backend/utils/live_push.py).
+"""
+
+import asyncio
+import os
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from backend.users.routes.auth import get_current_user
+from backend.utils.live_push import TopicSpec, UnknownTopic, live_hub
+from backend.utils.response_cache import SOURCE_DAILY, SOURCE_LIVE
+from backend.utils.response_formats import ResponseFormat
+
+router = APIRouter(prefix="/live", tags=["📡 Live Push"])
+
+# هر چند ثانیه یک comment خالی تا proxy ها اتصال را نبندند
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+MAX_TOPICS_PER_STREAM = 10
+
+
+# ---------- producers: همان روت‌های REST، بدون تکرار منطق ----------
+
+def _mode_and_sector(arg: Optional[str]):
+    """«sector» یا «intra-sector:<نام صنعت>»"""
+    mode, _, sector = (arg or "sector").partition(":")
+    if mode not in ("sector", "intra-sector") or (mode == "intra-sector" and not sector.strip()):
+        raise UnknownTopic(f"حالت نامعتبر: {arg}")
+    return mode, sector.strip() or None
+
+
+async def _market(db, arg):
+    from backend.api.sankey import get_sankey_combined
+    resp = await get_sankey_combined(mode="sector", sector=None, top_k=30, min_abs_flow=0, db=db, _=None)
+    return resp.body
+
+
+async def _sector(db, arg):
+    from backend.api.sankey import get_sankey_combined
+    resp = await get_sankey_combined(mode="intra-sector", sector=arg, top_k=30, min_abs_flow=0, db=db, _=None)
+    return resp.body
+
+
+async def _bumpchart(db, arg):
+    from backend.api.orderbook import Mode, get_orderbook_bumpchart_data
+    mode, sector = _mode_and_sector(arg)
+    resp = await get_orderbook_bumpchart_data(mode=Mode(mode), sector=sector, day=None, db=db, _=None)
+    return resp.body
+
+
+async def _orderbook(db, arg):
+    from backend.api.OrderbookData import Mode, get_orderbook_timeseries
+    mode, sector = _mode_and_sector(arg)
+    resp = await get_orderbook_timeseries(
+        request=None, mode=Mode(mode), sector=sector, day=None, format=ResponseFormat.json, db=db, _=None,
+    )
+    return resp.body
+
+
+def _commentary_mode(arg: Optional[str]):
+    if arg not in (None, "public", "pro"):
+        raise UnknownTopic(f"حالت نامعتبر: {arg}")
+
+
+async def _commentary(db, arg):
+    from backend.api.commentary import get_daily_intraday_commentary
+    resp = await get_daily_intraday_commentary(
+        mode=arg or "public", audience="all", sector_snapshot_limit=10, db=db, _=None,
+    )
+    return resp.body
+
+
+live_hub.register("market", TopicSpec(_market, ("Report.Sankey",)))
+live_hub.register("sector", TopicSpec(_sector, ("Report.Sankey",), needs_arg=True))
+live_hub.register("bumpchart", TopicSpec(
+    _bumpchart, ("Report.OrderBook.BumpChart", "ALL"), validate=_mode_and_sector,
+))
+live_hub.register("orderbook", TopicSpec(
+    _orderbook, ("Report.OrderBook.TimeSeries", "ALL"), validate=_mode_and_sector,
+))
+live_hub.register("commentary", TopicSpec(
+    _commentary, ("Commentary.View", "ALL"), sources=(SOURCE_LIVE, SOURCE_DAILY), validate=_commentary_mode,
+))
+
+
+# ---------- SSE ----------
+
+def _sse_event(topic: str, body: bytes) -> bytes:
+    return b"event: " + topic.encode("utf-8") + b"\ndata: " + body.replace(b"\n", b"") + b"\n\n"
+
+
+@router.get("/stream", summary="اشتراک SSE روی topic های لحظه‌ای (market، sector:X، bumpchart:mode، ...)")
+async def live_stream(
+    request: Request,
+    topic: List[str] = Query(..., description="market | sector:<صنعت> | bumpchart:sector | bumpchart:intra-sector:<صنعت> | orderbook:... | commentary"),
+    user=Depends(get_current_user),
+):
+    topics = list(dict.fromkeys(t.strip() for t in topic if t.strip()))
+    if not topics or len(topics) > MAX_TOPICS_PER_STREAM:
+        raise HTTPException(status_code=400, detail=f"بین ۱ تا {MAX_TOPICS_PER_STREAM} topic لازم است")
+
+    for t in topics:
+        try:
+            ok = live_hub.allowed(t, user.permissions)
+        except UnknownTopic as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not ok:
+            raise HTTPException(status_code=403, detail=f"Access denied: insufficient permission ({t})")
+
+    async def events():
+        async with live_hub.subscribe(topics) as queue:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    t, body = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_SECONDS)
+                    yield _sse_event(t, body)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield b": ping\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,22 +1,35 @@
 from fastapi import APIRouter, Query,Depends,HTTPException
 from backend.db.connection import get_engine
 from sqlalchemy import text
-import pandas as pd
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend.db.connection import async_session
+from backend.db.connection import read_session
 from backend.users.dependencies import require_permissions, get_subscription_dependencies
 from backend.users import models, schemas
 from backend.utils.response import create_response
 from backend.utils.logger import logger
+from backend.utils.symbol_search import symbol_index
 
 router = APIRouter()
 
 # 🔧 Helper
+# روت‌های گزارشی /api فقط می‌خوانند → session از pool خواندنی (یا replica)
 async def get_db():
-    async with async_session() as session:
+    async with read_session() as session:
         yield session
 
 
+def _page(items, page: int, size: int) -> dict:
+    total = len(items)
+    offset = (page - 1) * size
+    return {
+        "items": items[offset:offset + size],
+        "total": total,
+        "page": page,
+        "size": size,
+        "pages": (total + size - 1) // size
+    }
+
+
 @router.get("/sectors", summary="دریافت لیست صنایع با صفحه‌بندی")
 async def get_all_sectors(
     db: AsyncSession = Depends(get_db),
@@ -26,41 +39,21 @@ async def get_all_sectors(
     size: int = Query(10, enum=[10, 50, 100])
 ):
     try:
-        # 🔢 تعداد کل صنایع
-        count_result = await db.execute(
-            text("SELECT COUNT(DISTINCT sector) FROM daily_joined_data WHERE sector IS NOT NULL")
-        )
-        total = count_result.scalar_one()
-
-        offset = (page - 1) * size
-        result = await db.execute(
-            text("""
-                SELECT DISTINCT sector
-                FROM daily_joined_data
-                WHERE sector IS NOT NULL
-                ORDER BY sector
-                LIMIT :size OFFSET :offset
-            """),
-            {"size": size, "offset": offset}
-        )
-        sectors = [row[0] for row in result.fetchall()]
+        # صنایع سهام (همان صنایع daily_joined_data) از کش ابعاد symboldetail؛
+        # به‌جای COUNT/SELECT DISTINCT روی کل view برای هر صفحه
+        index = await symbol_index.ensure(db)
+        sectors = index.sectors(instrument_type="saham")
 
         return create_response(
             status="success",
             message="✅ لیست صنایع با موفقیت دریافت شد",
-            data={
-                "items": sectors,
-                "total": total,
-                "page": page,
-                "size": size,
-                "pages": (total + size - 1) // size
-            }
+            data=_page(sectors, page, size)
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"خطا در دریافت صنایع: {str(e)}")
 
-@router.get("/sectorslive", summary="دریافت لیست صنایع از جدول live_market_data با صفحه‌بندی")
+@router.get("/sectorslive", summary="دریافت لیست صنایع بازار (همهٔ نوع ابزارها) با صفحه‌بندی")
 async def get_all_sectors_live_market(
     db: AsyncSession = Depends(get_db),
     _: models.User = Depends(require_permissions("Report.Metadata.Sectors", "ALL")),
@@ -69,39 +62,18 @@ async def get_all_sectors_live_market(
     size: int = Query(10, enum=[10, 50, 100])
 ):
     try:
-        # 🔢 تعداد کل صنایع از جدول live_market_data
-        count_result = await db.execute(
-            text("SELECT COUNT(DISTINCT sector) FROM live_market_data WHERE sector IS NOT NULL")
-        )
-        total = count_result.scalar_one()
-
-        offset = (page - 1) * size
-        result = await db.execute(
-            text("""
-                SELECT DISTINCT sector
-                FROM live_market_data
-                WHERE sector IS NOT NULL
-                ORDER BY sector
-                LIMIT :size OFFSET :offset
-            """),
-            {"size": size, "offset": offset}
-        )
-        sectors = [row[0] for row in result.fetchall()]
+        # دیدهٔ بازار (live_market_data) همهٔ نوع ابزارها را دارد → صنایع همهٔ ردیف‌های symboldetail
+        index = await symbol_index.ensure(db)
+        sectors = index.sectors()
 
         return create_response(
             status="success",
-            message="✅ لیست صنایع از جدول live_market_data با موفقیت دریافت شد",
-            data={
-                "items": sectors,
-                "total": total,
-                "page": page,
-                "size": size,
-                "pages": (total + size - 1) // size
-            }
+            message="✅ لیست صنایع بازار با موفقیت دریافت شد",
+            data=_page(sectors, page, size)
         )
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"خطا در دریافت صنایع از جدول live_market_data: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"خطا در دریافت صنایع بازار: {str(e)}")
 
 @router.get("/stocks", summary="دریافت نمادهای یک صنعت خاص")
 async def get_stocks_in_sector(
@@ -110,16 +82,10 @@ async def get_stocks_in_sector(
         _: models.User = Depends( require_permissions ("Report.Metadata.Stocks","ALL"))  # یا پرمیشن مناسب
 ):
     try:
-        result = await db.execute(
-            text("""
-                SELECT DISTINCT stock_ticker
-                FROM daily_joined_data
-                WHERE sector = :sector
-                ORDER BY stock_ticker
-            """),
-            {"sector": sector}
-        )
-        stocks = [row[0] for row in result.fetchall() if row[0] is not None]
+        # از ایندکس درون‌حافظه‌ای symboldetail (سهام = همان نمادهای daily_joined_data)؛
+        # مقایسهٔ صنعت با نرمال‌سازی فارسی/عربی
+        index = await symbol_index.ensure(db)
+        stocks = index.tickers_in_sector(sector, instrument_type="saham")
 
         return create_response(data=stocks)
 
@@ -134,19 +100,8 @@ async def get_sector_with_stocks(
     _=Depends(require_permissions("Report.Metadata.SectorStocks","ALL"))
 ):
     try:
-        result = await db.execute(
-            text("""
-                SELECT DISTINCT sector, stock_ticker
-                FROM daily_joined_data
-                WHERE sector IS NOT NULL
-                ORDER BY sector, stock_ticker
-            """)
-        )
-        rows = result.fetchall()
-
-        df = pd.DataFrame(rows, columns=["sector", "stock_ticker"])
-        grouped = df.groupby("sector")["stock_ticker"].apply(list).reset_index()
-        result_data = grouped.to_dict(orient="records")
+        index = await symbol_index.ensure(db)
+        result_data = index.sectors_with_tickers(instrument_type="saham")
 
         return create_response(data=result_data)
 
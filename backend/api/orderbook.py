@@ -6,14 +6,12 @@ from collections import defaultdict
 from fastapi import APIRouter, Query, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-import pandas as pd
-from datetime import datetime, time
+from datetime import date, datetime, time
 from zoneinfo import ZoneInfo
-import re
 
 from backend.api.metadata import get_db
 from backend.users.dependencies import require_permissions
-from backend.utils.sql_loader import load_sql
+from backend.utils.sql_loader import sql_registry
 from backend.utils.response import create_response
 
 
@@ -25,46 +23,32 @@ class Mode(str, Enum):
     intra = "intra-sector"
 
 
-def normalize_persian(t: str | None):
-    """Normalize Persian/Arabic characters."""
-    if t is None:
-        return None
-    if not isinstance(t, str):
-        t = str(t)
-    t = t.strip().lower()
-    return (
-        t.replace("ي", "ی")
-         .replace("ك", "ک")
-         .replace("\u200c", "")
-         .replace("ـ", "")
-    )
-
-
 @router.get("/bumpchart", summary="رتبه‌بندی لحظه‌ای خالص سفارش‌ها (Bump Chart)")
 async def get_orderbook_bumpchart_data(
     mode: Mode = Query(Mode.sector),
     sector: str | None = Query(None),
+    day: date | None = Query(None, description="روز (میلادی)؛ پیش‌فرض امروز به وقت تهران"),
     db: AsyncSession = Depends(get_db),
     _=Depends(require_permissions("Report.OrderBook.BumpChart", "ALL")),
 ):
 
+    import pandas as pd  # lazy: pandas فقط هنگام اجرای روت لود می‌شود
     if mode == Mode.intra and not sector:
         raise HTTPException(status_code=400, detail="sector is required in intra-sector mode")
 
-    # نرمالایز فقط ورودی کاربر
-    norm_sector = normalize_persian(sector) if sector else None
-
     # --- Load SQL ---
-    base_sql = load_sql("orderbook_sector_timeseries") if mode == Mode.sector else load_sql("orderbook_intrasector_timeseries")
-    base_sql_clean = re.sub(r";\s*$", "", base_sql.strip())
+    # رجیستری SQL را یکبار در startup خوانده و ; انتهایی را حذف کرده است
+    base_sql_clean = sql_registry.get(
+        "orderbook_sector_timeseries" if mode == Mode.sector else "orderbook_intrasector_timeseries"
+    )
 
     group_col = "sector" if mode == Mode.sector else "Symbol"
 
     # --- Prepare time range (09:00 - 13:00 Tehran) ---
-    now = datetime.now(ZoneInfo("Asia/Tehran"))
-    today = now.date()
-    start_naive = datetime.combine(today, time(9, 0), tzinfo=ZoneInfo("Asia/Tehran")).replace(tzinfo=None)
-    end_naive   = datetime.combine(today, time(13, 0), tzinfo=ZoneInfo("Asia/Tehran")).replace(tzinfo=None)
+    if day is None:
+        day = datetime.now(ZoneInfo("Asia/Tehran")).date()
+    start_naive = datetime.combine(day, time(9, 0))
+    end_naive   = datetime.combine(day, time(13, 0))
 
     sql = f"""
     WITH src AS (
@@ -75,9 +59,10 @@ async def get_orderbook_bumpchart_data(
     WHERE minute >= :start AND minute < :end
     """
 
-    params = {"start": start_naive, "end": end_naive}
+    # SQL فقط rollup دقیقه‌ای همان روز را می‌خواند (نه کل orderbook_snapshot)
+    params = {"day": day, "start": start_naive, "end": end_naive}
 
-    # 🔥 مهم: این‌جا sector خام را بفرست، نه نرمالایز شده!
+    # sector خام فرستاده می‌شود؛ SQL با fa_sector_key روی ستون ذخیره‌شدهٔ sector_key فیلتر می‌کند
     if mode == Mode.intra:
         params["sector"] = sector
 
@@ -89,19 +74,6 @@ async def get_orderbook_bumpchart_data(
 
     df = pd.DataFrame(rows)
 
-    # --- نرمال‌سازی روی df و فیلتر امن ---
-    if mode == Mode.intra and norm_sector:
-        if "sector" in df.columns:
-            df["sector_norm"] = df["sector"].astype(str).apply(normalize_persian)
-            df = df[df["sector_norm"] == norm_sector]
-
-            if df.empty:
-                return create_response(
-                    data=[],
-                    message=f"بعد از نرمال‌سازی هیچ داده‌ای برای «{sector}» یافت نشد",
-                    status_code=200,
-                )
-
     # --- Required columns ---
     need = {"total_buy", "total_sell", "minute", group_col}
     miss = need - set(df.columns)
@@ -142,6 +114,6 @@ async def get_orderbook_bumpchart_data(
 
     return create_response(
         data=payload,
-        message="✅ Bump chart فقط برای امروز (09:00 تا 13:00)",
+        message=f"✅ Bump chart برای {day.isoformat()} (09:00 تا 13:00)",
         status_code=200,
     )
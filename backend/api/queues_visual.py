@@ -10,6 +10,7 @@ from datetime import datetime, date as dt_date
 
 from backend.api.metadata import get_db
 from backend.users.dependencies import require_permissions
+from backend.utils.hierarchy import build_treemap, numeric_column
 
 router = APIRouter(prefix="/queues", tags=["📊 Queues Visuals"])
 
@@ -146,47 +147,32 @@ async def queues_treemap(
           {queue_presence_filter}
     """
 
-    res = await db.execute(_bind_date(leaf_sql), params)
-    rows = res.mappings().all()
-
-    if not rows:
-        return {"date": date_str, "side": side, "metric": metric, "children": [], "color_scale": {"min": 0, "max": 0}}
-
-    leaves: List[Dict[str, Any]] = []
-    color_min, color_max = 0, 0
+    import pandas as pd  # lazy: pandas فقط هنگام اجرای روت لود می‌شود
 
-    for r in rows:
-        v = int(r["box_value"] or 0)
-        if v <= 0:
-            continue
-        if min_value is not None and v < min_value:
-            continue
-
-        c = int(r["color_value"] or 0)
-        color_min = min(color_min, c)
-        color_max = max(color_max, c)
+    res = await db.execute(_bind_date(leaf_sql), params)
+    df = pd.DataFrame(res.mappings().all(), columns=["sector", "stock_ticker", "box_value", "color_value"])
 
-        leaves.append({"sector": r["sector"], "name": r["stock_ticker"], "value": v, "color_value": c})
+    box = numeric_column(df, "box_value", dtype="int64")
+    keep = box > 0
+    if min_value is not None:
+        keep &= box >= min_value
 
-    if not leaves:
+    if not keep.any():
         return {"date": date_str, "side": side, "metric": metric, "children": [], "color_scale": {"min": 0, "max": 0}}
 
-    sector_bucket: Dict[str, Dict[str, Any]] = {}
-    for leaf in leaves:
-        sec = leaf["sector"]
-        if sec not in sector_bucket:
-            sector_bucket[sec] = {"name": sec, "value": 0, "color_value": 0, "children": []}
-
-        sector_bucket[sec]["children"].append({
-            "name": leaf["name"],
-            "value": leaf["value"],
-            "color_value": leaf["color_value"],
-        })
-        sector_bucket[sec]["value"] += leaf["value"]
-        sector_bucket[sec]["color_value"] += leaf["color_value"]
-
-    children = [v for v in sector_bucket.values() if v["value"] > 0]
-    children.sort(key=lambda x: x["value"], reverse=True)
+    df = df[keep]
+    box = box[keep]
+    color = numeric_column(df, "color_value", dtype="int64")
+    color_min = min(0, int(color.min()))
+    color_max = max(0, int(color.max()))
+
+    # همهٔ جعبه‌ها مثبت‌اند، پس جمع هر صنعت هم مثبت است
+    children = build_treemap(
+        df, "sector", "stock_ticker",
+        {"value": box, "color_value": color},
+        totals=("value", "color_value"),
+        sort_by="value",
+    )
 
     return {
         "date": date_str,
@@ -1,73 +1,115 @@
-from fastapi import APIRouter, Query, Depends, HTTPException
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Query, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from backend.api.metadata import get_db
 from backend.users.dependencies import require_permissions
 from backend.utils.response import create_response
 from backend.utils.logger import logger
+from backend.utils.response_cache import cached_report, SOURCE_DAILY
+from backend.utils.response_formats import ResponseFormat, resolve_format, columnar_response
 
 router = APIRouter(prefix="", tags=["💧 Real Money Flow"])
 
 @router.get("/real-money-flow/timeseries", summary="سری‌زمانی جریان پول حقیقی (بازار/صنعت/نماد)")
+@cached_report("real_money_flow.timeseries", sources=(SOURCE_DAILY,))
 async def get_real_money_flow_timeseries(
+    request: Request,
     timeframe: str = Query("daily", enum=["daily", "weekly"]),
     level: str = Query("sector", enum=["market", "sector", "ticker"]),
     sector: str | None = Query(None, description="نام صنعت برای فیلتر سطح 'sector'"),
     ticker: str | None = Query(None, description="نماد برای سطح 'ticker' الزامی است"),
     currency: str = Query("rial", enum=["rial", "dollar"]),
+    date_from: Optional[date] = Query(None, alias="from", description="شروع بازه (میلادی، شامل)"),
+    date_to: Optional[date] = Query(None, alias="to", description="پایان بازه (میلادی، شامل)"),
+    format: Optional[ResponseFormat] = Query(None, description="json | columnar | arrow (یا از هدر Accept)"),
     db: AsyncSession = Depends(get_db),
     _=Depends(require_permissions("Report.RealMoneyFlow"))  # 👈 مثل بقیه روت‌ها
 ):
     try:
-        table = "daily_joined_data" if timeframe == "daily" else "weekly_joined_data"
-        date_col = "j_date" if timeframe == "daily" else "week_end"
+        if date_from and date_to and date_from > date_to:
+            raise HTTPException(status_code=400, detail="from نباید بعد از to باشد")
 
-        # مقدار جریان: ریالی یا دلاری
-        flow_expr = "(buy_i_value - sell_i_value)"
-        if currency == "dollar":
-            flow_expr = f"{flow_expr} / NULLIF(dollar_rate, 0)"
+        params = {"timeframe": timeframe}
 
-        params = {}
-        if level == "market":
-            query = f"""
-                SELECT {date_col} AS date,
-                       COALESCE(SUM({flow_expr}), 0) AS real_money_flow
-                FROM {table}
-                GROUP BY {date_col}
-                ORDER BY {date_col}
-            """
+        if level in ("market", "sector"):
+            # سطح بازار/صنعت از rollup ها خوانده می‌شود (cron_jobs/daily/update_real_money_flow_rollups.py)
+            date_expr = "j_date" if timeframe == "daily" else "period_end"
+            flow_col = "flow_dollar" if currency == "dollar" else "flow_rial"
+            conditions = ["timeframe = :timeframe"]
+            if date_from:
+                conditions.append("period_end >= :date_from")
+                params["date_from"] = date_from
+            if date_to:
+                conditions.append("period_end <= :date_to")
+                params["date_to"] = date_to
 
-        elif level == "sector":
-            base = f"""
-                SELECT {date_col} AS date,
-                       sector,
-                       COALESCE(SUM({flow_expr}), 0) AS real_money_flow
-                FROM {table}
-                WHERE sector IS NOT NULL
-            """
-            if sector:
-                base += " AND sector = :sector"
-                params["sector"] = sector
-            query = base + f" GROUP BY {date_col}, sector ORDER BY {date_col}, sector"
+            if level == "market":
+                query = f"""
+                    SELECT {date_expr} AS date,
+                           {flow_col} AS real_money_flow
+                    FROM real_money_flow_market
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY period_end
+                """
+            else:
+                if sector:
+                    conditions.append("sector = :sector")
+                    params["sector"] = sector
+                query = f"""
+                    SELECT {date_expr} AS date,
+                           sector,
+                           {flow_col} AS real_money_flow
+                    FROM real_money_flow_sector
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY period_end, sector
+                """
 
         elif level == "ticker":
             if not ticker:
                 raise HTTPException(status_code=400, detail="پارامتر 'ticker' برای سطح 'ticker' الزامی است.")
+            table = "daily_joined_data" if timeframe == "daily" else "weekly_joined_data"
+            date_col = "j_date" if timeframe == "daily" else "week_end"
+            range_col = "date_miladi" if timeframe == "daily" else "week_end"
+
+            # مقدار جریان: ریالی یا دلاری
+            flow_expr = "(buy_i_value - sell_i_value)"
+            if currency == "dollar":
+                flow_expr = f"{flow_expr} / NULLIF(dollar_rate, 0)"
+
+            conditions = ["stock_ticker = :ticker"]
+            params = {"ticker": ticker}
+            if date_from:
+                conditions.append(f"{range_col} >= :date_from")
+                params["date_from"] = date_from
+            if date_to:
+                conditions.append(f"{range_col} <= :date_to")
+                params["date_to"] = date_to
             query = f"""
                 SELECT {date_col} AS date,
                        stock_ticker AS ticker,
                        sector,
                        COALESCE({flow_expr}, 0) AS real_money_flow
                 FROM {table}
-                WHERE stock_ticker = :ticker
-                ORDER BY {date_col}
+                WHERE {" AND ".join(conditions)}
+                ORDER BY {range_col}
             """
-            params["ticker"] = ticker
 
         else:
             raise HTTPException(status_code=400, detail="سطح وارد شده معتبر نیست.")
 
         result = await db.execute(text(query), params)
+
+        fmt = resolve_format(request, format)
+        if fmt != ResponseFormat.json:
+            return columnar_response(
+                fmt,
+                list(result.keys()),
+                result.all(),
+                "سری‌زمانی جریان پول حقیقی با موفقیت بازیابی شد.",
+            )
+
         rows = [dict(r) for r in result.mappings().all()]
 
         return create_response(
@@ -6,11 +6,13 @@ from backend.api.metadata import get_db
 from backend.users.dependencies import require_permissions
 from backend.utils.response import create_response
 from backend.utils.logger import logger
-import pandas as pd
+from backend.utils.response_cache import cached_report, SOURCE_LIVE
+from backend.utils.hierarchy import build_sankey
 
 router = APIRouter(prefix="", tags=["📊 Sankey"])
 
 @router.get("/net-flow", summary="جریان پول حقیقی در سطح صنعت یا درون‌صنعت")
+@cached_report("sankey.net_flow", sources=(SOURCE_LIVE,))
 async def get_sankey_combined(
     mode: str = Query("sector", enum=["sector", "intra-sector"]),
     sector: str | None = Query(None, description="نام صنعت (فقط برای intra-sector نیاز است)"),
@@ -20,6 +22,7 @@ async def get_sankey_combined(
     db: AsyncSession = Depends(get_db),
     _=Depends(require_permissions("Report.Sankey"))
 ):
+    import pandas as pd  # lazy: pandas فقط هنگام اجرای روت لود می‌شود
     try:
         if mode == "sector":
             # [CHANGED] ستون‌های صریح + cast به numeric برای جلوگیری از overflow
@@ -46,27 +49,27 @@ async def get_sankey_combined(
                 # GROUP BY "Sector"
                 # ORDER BY net_real_flow DESC;
             # """
+            # live_market_latest یک ردیف (آخرین) برای هر نماد دارد → بدون DISTINCT ON روی کل تاریخچه
             query = """
                 WITH last_day AS (
                     SELECT MAX("updated_at"::date) AS d
-                    FROM live_market_data
+                    FROM live_market_latest
                     WHERE "Vol_Buy_R" IS NOT NULL
                       AND "Vol_Sell_R" IS NOT NULL
                       AND "Close"     IS NOT NULL
                 ),
                 latest_rows AS (
-                    SELECT DISTINCT ON ("Ticker")
+                    SELECT
                         "Ticker",
                         "Sector",
                         "Vol_Buy_R",
                         "Vol_Sell_R",
                         "Close"
-                    FROM live_market_data, last_day
+                    FROM live_market_latest, last_day
                     WHERE "Vol_Buy_R" IS NOT NULL
                       AND "Vol_Sell_R" IS NOT NULL
                       AND "Close"     IS NOT NULL
                       AND "updated_at"::date = last_day.d
-                    ORDER BY "Ticker", "updated_at" DESC
                 )
                 SELECT
                     "Sector",
@@ -87,18 +90,7 @@ async def get_sankey_combined(
                     data=None, status_code=204, message="هیچ داده‌ای برای سطح صنعت یافت نشد."
                 )
 
-            links, node_names = [], set()
-            for _, row in df.iterrows():
-                sector_name = row["Sector"]
-                flow = float(row["net_real_flow"])
-                if flow > 0:
-                    links.append({"source": "Other", "target": sector_name, "value": abs(flow)})
-                elif flow < 0:
-                    links.append({"source": sector_name, "target": "Other", "value": abs(flow)})
-                node_names.add(sector_name)
-
-            node_names.add("Other")
-            nodes = [{"name": n} for n in node_names]
+            nodes, links = build_sankey(df, "Sector", "net_real_flow")
 
         # else:  # mode == "intra-sector"
         #     if not sector:
@@ -140,58 +132,30 @@ async def get_sankey_combined(
                 if not sector:
                     raise HTTPException(status_code=400, detail="پارامتر sector الزامی است.")
 
-            # آخرین روزی که برای این سکتور دیتا داریم + آخرین ردیف هر نماد در آن روز
+            # آخرین روزی که برای این سکتور دیتا داریم + آخرین ردیف هر نماد (live_market_latest) در آن روز
+            # (sector_key ستون ذخیره‌شده و ایندکس‌دار است؛ همان نرمال‌سازی fa_sector_key روی ورودی)
                 query_intra = """
                     WITH last_day AS (
                         SELECT MAX("updated_at"::date) AS d
-                        FROM live_market_data
+                        FROM live_market_latest
                         WHERE "Vol_Buy_R" IS NOT NULL
                           AND "Vol_Sell_R" IS NOT NULL
                           AND "Close"     IS NOT NULL
-                          AND REPLACE(
-                                REPLACE(
-                                    REPLACE(
-                                        REPLACE(trim(both FROM lower("Sector")), 'ي','ی'),
-                                    'ك','ک'),
-                                '‌',''),
-                            'ـ','')
-                          =
-                            REPLACE(
-                                REPLACE(
-                                    REPLACE(
-                                        REPLACE(trim(both FROM lower(:sector)), 'ي','ی'),
-                                    'ك','ک'),
-                                '‌',''),
-                            'ـ','')
+                          AND sector_key = fa_sector_key(:sector)
                     ),
                     latest_rows AS (
-                        SELECT DISTINCT ON ("Ticker")
+                        SELECT
                             "Ticker",
                             "Sector",
                             "Vol_Buy_R",
                             "Vol_Sell_R",
                             "Close"
-                        FROM live_market_data, last_day
+                        FROM live_market_latest, last_day
                         WHERE "Vol_Buy_R" IS NOT NULL
                           AND "Vol_Sell_R" IS NOT NULL
                           AND "Close"     IS NOT NULL
-                          AND REPLACE(
-                                REPLACE(
-                                    REPLACE(
-                                        REPLACE(trim(both FROM lower("Sector")), 'ي','ی'),
-                                    'ك','ک'),
-                                '‌',''),
-                            'ـ','')
-                          =
-                            REPLACE(
-                                REPLACE(
-                                    REPLACE(
-                                        REPLACE(trim(both FROM lower(:sector)), 'ي','ی'),
-                                    'ك','ک'),
-                                '‌',''),
-                            'ـ','')
+                          AND sector_key = fa_sector_key(:sector)
                           AND "updated_at"::date = last_day.d
-                        ORDER BY "Ticker", "updated_at" DESC
                     )
                     SELECT
                         "Ticker",
@@ -225,23 +189,8 @@ async def get_sankey_combined(
                         message=f"همه‌ی جریان‌ها با فیلترها حذف شدند (top_k={top_k}, min_abs_flow={min_abs_flow})."
                     )
 
-                # [CHANGED] بدون self-loop/صفر؛ فقط لینک‌های معتبر
-                df["net_real_flow"] = df["net_real_flow"].astype(float)
-                nodes = [{"name": "Other"}] + [{"name": t} for t in df["Ticker"].tolist()]
-                # یکتا کردن نودها
-                seen, uniq_nodes = set(), []
-                for n in nodes:
-                    if n["name"] not in seen:
-                        uniq_nodes.append(n); seen.add(n["name"])
-                nodes = uniq_nodes
-
-                links = []
-                pos = df[df["net_real_flow"] > 0]
-                neg = df[df["net_real_flow"] < 0]
-                for _, r in pos.iterrows():
-                    links.append({"source": "Other", "target": r["Ticker"], "value": float(r["net_real_flow"])})
-                for _, r in neg.iterrows():
-                    links.append({"source": r["Ticker"], "target": "Other", "value": float(abs(r["net_real_flow"]))})
+                # [CHANGED] بدون self-loop/صفر؛ فقط لینک‌های معتبر (نودها یکتا، Other اول)
+                nodes, links = build_sankey(df, "Ticker", "net_real_flow")
 
         # شیء ECharts Sankey
         sankey_data = {
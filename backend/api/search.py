@@ -0,0 +1,36 @@
+# backend/api/search.py
+# -*- coding: utf-8 -*-
+"""
+جست‌وجو / autocomplete نماد و نام شرکت از ایندکس درون‌حافظه‌ای symboldetail.
+
+    GET /api/search?q=فولاد&limit=10&instrument_type=saham
+
+بدون کوئری دیتابیس در مسیر درخواست (جز خواندن data_version با TTL)؛ منطق در backend/utils/symbol_search.py
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.api.metadata import get_db
+from backend.users.dependencies import require_permissions
+from backend.utils.response import create_response
+from backend.utils.symbol_search import symbol_index
+
+router = APIRouter(prefix="/search", tags=["🔎 Search"])
+
+
+@router.get("", summary="جست‌وجوی نماد/شرکت (پیشوندی + فازی، نرمال‌سازی فارسی)")
+async def search_symbols(
+    q: str = Query(..., min_length=1, max_length=64, description="بخشی از نماد، نام یا نام لاتین"),
+    limit: int = Query(10, ge=1, le=50),
+    sector: Optional[str] = Query(None, description="فیلتر صنعت (symboldetail.sector)"),
+    instrument_type: Optional[str] = Query(None, description="saham, fund_stock, option, ..."),
+    fuzzy: bool = Query(True, description="در صورت کمبود نتیجهٔ پیشوندی، تطبیق فازی trigram"),
+    db: AsyncSession = Depends(get_db),
+    _=Depends(require_permissions("Report.Metadata.Stocks", "ALL")),
+):
+    index = await symbol_index.ensure(db)
+    items = index.search(q, limit=limit, sector=sector, instrument_type=instrument_type, fuzzy=fuzzy)
+    return create_response(data={"query": q, "items": items})
@@ -1,48 +1,36 @@
 # -*- coding: utf-8 -*-
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, Request
 from enum import Enum
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
-import pandas as pd
-from collections import defaultdict
 
 from backend.api.metadata import get_db
 from backend.users.dependencies import require_permissions
-from backend.utils.sql_loader import load_sql
+from backend.utils.sql_loader import sql_registry
 from backend.utils.logger import logger
+from backend.utils.response_cache import cached_report, conditional_report, SOURCE_LIVE, SOURCE_DAILY
 from backend.utils.response import create_response  # ساختار پاسخ واحد
+from backend.utils.hierarchy import (
+    ETF_SECTOR,
+    build_treemap,
+    normalize_persian,
+    numeric_column,
+    size_values,
+)
 
 router = APIRouter(prefix="", tags=["📊 Treemap"])
 
 
-def normalize_persian(text: str | None):
-    """
-    نرمال‌سازی حروف عربی/فارسی + حذف نیم‌فاصله و کشیدگی
-    """
-    if text is None:
-        return None
-    if not isinstance(text, str):
-        text = str(text)
-
-    text = text.strip().lower()
-    replacements = [
-        ("ي", "ی"),        # ya عربی → ya فارسی
-        ("ك", "ک"),        # kaf عربی → kaf فارسی
-        ("\u200c", ""),    # نیم‌فاصله (ZWNJ) → حذف
-        ("ـ", ""),         # کشیدگی → حذف
-    ]
-    for src, dst in replacements:
-        text = text.replace(src, dst)
-    return text
-
-
 class Timeframe(str, Enum):
     daily = "daily"
     weekly = "weekly"
 
 
 @router.get("/treemap", summary="داده‌های Treemap بازار (روزانه/هفتگی)")
+@conditional_report("treemap", sources=(SOURCE_LIVE, SOURCE_DAILY))
+@cached_report("treemap", sources=(SOURCE_LIVE, SOURCE_DAILY))
 async def get_treemap_data(
+    request: Request,
     timeframe: Timeframe = Query(Timeframe.daily, description="تایم‌فریم روزانه یا هفتگی"),
     size_mode: str = Query(
         "marketcap",
@@ -54,12 +42,12 @@ async def get_treemap_data(
     db: AsyncSession = Depends(get_db),
     _ = Depends(require_permissions("Report.Treemap")),
 ):
+    import numpy as np  # lazy: numpy/pandas فقط هنگام اجرای روت لود می‌شوند
+    import pandas as pd
     try:
         # انتخاب SQL بر اساس تایم‌فریم
         sql_name = "treemap_daily" if timeframe == Timeframe.daily else "treemap_weekly"
-        sql = load_sql(sql_name)
-
-        result = await db.execute(text(sql))
+        result = await sql_registry.execute(db, sql_name)
         rows = result.mappings().all()
 
         if not rows:
@@ -80,53 +68,26 @@ async def get_treemap_data(
 
         df = pd.DataFrame(rows)
 
-        # ستون نرمال‌شده‌ی سکتور برای مقایسه‌ی امن (عربی/فارسی)
-        df["sector_norm"] = df["sector"].astype(str).apply(normalize_persian)
-
+        # sector_key از SQL می‌آید (fa_sector_key، همان normalize_persian) → مقایسه‌ی امن عربی/فارسی
         # فیلتر صنعت (در صورت ارسال)
         if sector:
-            norm_sector = normalize_persian(sector)
-            df = df[df["sector_norm"] == norm_sector]
+            df = df[df["sector_key"] == normalize_persian(sector)]
 
         # فیلتر حذف ETFها
         if not include_etf:
-            etf_norm = normalize_persian("صندوق سرمایه گذاری قابل معامله")
-            df = df[df["sector_norm"] != etf_norm]
-
-        # پاک‌سازی NaN / Inf
-        df = df.replace([float("inf"), float("-inf")], 0).fillna(0)
-
-        # ساختار مناسب ECharts Treemap
-        tree = defaultdict(list)
-        for _, row in df.iterrows():
-            # 1) مقدار خام سایز بر اساس mode
-            if size_mode == "equal":
-                size_raw = 1.0
-            else:
-                size_raw = float(row.get(size_mode) or 0)
-
-            # 2) اسکیل کردن سایز برای نمودار
-            if size_mode in ("marketcap", "value", "net_haghighi"):
-                # تبدیل به میلیارد (ریال یا پول حقیقی)
-                size_for_chart = round(size_raw / 1e10, 3)
-            else:
-                size_for_chart = round(size_raw, 3)
-
-            # 3) سایر مقادیر
-            value_raw = float(row.get("value") or 0)
-            price_change = float(row.get("price_change") or 0)
-
-            node = {
-                "name": row["stock_ticker"],
-                "value": [
-                    size_for_chart,                   # سایز نود (بسته به mode)
-                    round(value_raw / 1e10, 3),        # ارزش معاملات به میلیارد
-                    round(price_change, 3),           # درصد تغییر قیمت برای رنگ
-                ],
-            }
-            tree[row["sector"]].append(node)
-
-        treemap_data = [{"name": s, "children": children} for s, children in tree.items()]
+            df = df[df["sector_key"] != normalize_persian(ETF_SECTOR)]
+
+        # پاک‌سازی NaN در ستون‌های متنی (ستون‌های عددی را numeric_column تمیز می‌کند)
+        df = df.fillna(0)
+
+        # ساختار مناسب ECharts Treemap؛ value هر نود:
+        # [سایز (بسته به mode)، ارزش معاملات به میلیارد، درصد تغییر قیمت برای رنگ]
+        value = np.column_stack([
+            size_values(df, size_mode),
+            np.round(numeric_column(df, "value") / 1e10, 3),
+            np.round(numeric_column(df, "price_change"), 3),
+        ])
+        treemap_data = build_treemap(df, "sector", "stock_ticker", {"value": value})
 
         return create_response(
             status="ok",
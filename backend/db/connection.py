@@ -1,10 +1,6 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
-import os
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from typing import Dict, Optional
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession, AsyncEngine
 from sqlalchemy.orm import declarative_base
 from dotenv import load_dotenv
 
@@ -13,21 +9,84 @@ load_dotenv()
 
 # گرفتن آدرس دیتابیس از متغیر محیطی
 DB_URL = os.getenv("DB_URL")
+# (اختیاری) آدرس replica برای روت‌های گزارشی؛ اگر ست نشده همان DB_URL با pool جدا
+DB_READ_URL = os.getenv("DB_READ_URL") or DB_URL
+
+# لاگ همهٔ SQLها فقط در صورت نیاز (DB_ECHO=true)
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() in ("1", "true", "yes")
+
+WRITE = "write"
+READ = "read"
+
+
+def _env_int(name: str, default: int, prefix: Optional[str] = None) -> int:
+    """DB_READ_POOL_SIZE → DB_POOL_SIZE → default"""
+    if prefix:
+        value = os.getenv(f"{prefix}_{name}")
+        if value not in (None, ""):
+            return int(value)
+    value = os.getenv(f"DB_{name}")
+    return int(value) if value not in (None, "") else default
+
+
+def _engine_kwargs(url: str, prefix: str, statement_timeout_default: int) -> dict:
+    kwargs = dict(
+        echo=DB_ECHO,
+        pool_size=_env_int("POOL_SIZE", 10, prefix),
+        max_overflow=_env_int("MAX_OVERFLOW", 20, prefix),
+        pool_timeout=_env_int("POOL_TIMEOUT", 30, prefix),
+        pool_recycle=_env_int("POOL_RECYCLE", 1800, prefix),
+    )
+
+    if url and url.startswith("postgresql+asyncpg"):
+        server_settings = {"application_name": f"finlayze-api-{prefix.split('_')[-1].lower()}"}
+        # statement_timeout بر حسب میلی‌ثانیه؛ 0 یعنی بدون محدودیت
+        statement_timeout = _env_int("STATEMENT_TIMEOUT_MS", statement_timeout_default, prefix)
+        if statement_timeout > 0:
+            server_settings["statement_timeout"] = str(statement_timeout)
+        kwargs["connect_args"] = {
+            # کش prepared statementهای asyncpg (برای pgbouncer در حالت transaction باید 0 باشد)
+            "statement_cache_size": _env_int("STATEMENT_CACHE_SIZE", 100, prefix),
+            "server_settings": server_settings,
+        }
+    return kwargs
+
 
-# ساخت engine غیرهمزمان
-engine = create_async_engine(DB_URL, echo=True)
+# ساخت engineهای غیرهمزمان: write برای تغییرات (کاربران/اشتراک‌ها) و read برای گزارش‌های /api
+engines: Dict[str, AsyncEngine] = {
+    WRITE: create_async_engine(DB_URL, **_engine_kwargs(DB_URL, "DB_WRITE", 30_000)),
+    READ: create_async_engine(DB_READ_URL, **_engine_kwargs(DB_READ_URL, "DB_READ", 15_000)),
+}
+
+# سازگاری با کدهای قبلی
+engine = engines[WRITE]
+read_engine = engines[READ]
 
 
 # تعریف Base برای مدل‌ها
 Base = declarative_base()
 
-# ساخت Session
+# ساخت Session (نوشتنی)
 async_session = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
 
+# Session فقط‌خواندنی برای روت‌های گزارشی
+read_session = async_sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+sessions = {WRITE: async_session, READ: read_session}
+
+
 # تابع اتصال برای Dependency Injection (مثلاً در FastAPI)
-def get_engine():
-    return engine
+def get_engine(kind: str = WRITE):
+    return engines[kind]
+
+
+def get_sessionmaker(kind: str = WRITE):
+    return sessions[kind]
@@ -1,4 +1,4 @@
-from fastapi import FastAPI,Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.middleware.middleware_auth import AuthMiddleware
@@ -35,6 +35,10 @@ print("🧪 Loaded SECRET_KEY from middleware:", repr(os.getenv("SECRET_KEY")))
 
 # 💼 APIهای مالی
 from backend.api import sankey, treemap, orderbook, OrderbookData, real_money_flow, candlestick, metadata,liquidity_weekly
+from backend.api import live_stream
+from backend.api import search
+from backend.api import industry_returns
+from backend.utils.symbol_search import symbol_index
 
 # 👤 ماژول‌های کاربری
 from backend.users.routes import (
@@ -64,19 +68,7 @@ app.add_exception_handler(AppException, handle_app_exception)      # ← اگر
 app.add_exception_handler(Exception, handle_general_exception)
 
 
-# ✅ middleware برای لاگ‌گیری همه درخواست‌ها
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    logger.info(f"➡️ Request: {request.method} {request.url}")
-    try:
-        response = await call_next(request)
-    except Exception as e:
-        logger.exception(" خطای ناشناخته هنگام پردازش درخواست")
-        raise e
-    logger.info(f" Response: status_code={response.status_code}")
-    return response
-
-# 🛡️ احراز هویت کاستوم
+# 🛡️ request-id + زمان‌سنجی + لاگ + احراز هویت در یک میدل‌ور ASGI
 app.add_middleware(AuthMiddleware)  # 👈 اینو اضافه کن قبل از include_router
 
 
@@ -86,6 +78,8 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # هدرهایی که کلاینت مرورگر باید بخواند (کش شرطی، cursor کندل، شناسهٔ درخواست)
+    expose_headers=["ETag", "Last-Modified", "X-Next-Cursor", "X-Request-ID"],
 )
 
 
@@ -105,12 +99,15 @@ app.include_router(orderbook.router, prefix="/api")
 app.include_router(real_money_flow.router, prefix="/api")
 app.include_router(OrderbookData.router, prefix="/api")
 app.include_router(candlestick.router, prefix="/api")
+app.include_router(live_stream.router, prefix="/api")  # 📡 SSE push
+app.include_router(search.router, prefix="/api")  # 🔎 autocomplete نماد/شرکت
 
 app.include_router(liquidity_weekly.router, prefix="/api")  # ✅ درست
 
 app.include_router(signals_table.router)
 
 app.include_router(ceiling.router, prefix="/api")  # ✅
+app.include_router(industry_returns.router, prefix="/api")  # 📊 بازدهی صنایع
 
 
 app.include_router(indicator_report.router, prefix="/api")
@@ -122,6 +119,12 @@ app.include_router(queues_visual.router, prefix="/Safkharid")
 
 app.include_router(capital_increase.router)
 
+# 🔎 ایندکس جست‌وجوی نمادها قبل از اولین درخواست ساخته شود
+@app.on_event("startup")
+async def warm_symbol_index():
+    await symbol_index.warm()
+
+
 # 🔍 health check
 @app.get("/ping")
 def ping():
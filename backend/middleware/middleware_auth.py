@@ -1,88 +1,125 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request
-from starlette.responses import JSONResponse
-from jose import jwt, JWTError, ExpiredSignatureError
-from uuid import uuid4
-from time import time
-from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
-from fastapi.security import HTTPAuthorizationCredentials
-from backend.db.connection import async_session
-from backend.users.models import User
-from backend.users.utils import get_user_permissions
-from backend.utils.logger import logger
-from pathlib import Path
+"""
+میدل‌ور ASGI خالص برای همهٔ درخواست‌ها: request-id، زمان‌سنجی، عبور مسیرهای عمومی و احراز هویت JWT
+در یک گذر (جایگزین log_requests و AuthMiddleware قبلی که هر دو BaseHTTPMiddleware بودند).
+
+بنچمارک سربار هر درخواست (بیرون از پکیج backend):  python -m benchmarks.bench_middleware
+"""
+
 import os
+import re
+from pathlib import Path
+from time import perf_counter
+from typing import Awaitable, Callable, Optional
+from uuid import uuid4
+
 from dotenv import load_dotenv
+from jose import jwt, JWTError, ExpiredSignatureError
+from starlette.datastructures import MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.users.principal import Principal, resolve_principal
+from backend.utils.logger import logger
 
 # 🔐 امنیت رمز عبور و توکن
 load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent.parent / ".env")
 SECRET_KEY = os.getenv("SECRET_KEY")
 assert SECRET_KEY == "Afiroozi12!@^erySecretKey9876*", "❌ SECRET_KEY mismatch!"
-print("🧪 Loaded SECRET_KEY from middleware:", repr(os.getenv("SECRET_KEY")))
 ALGORITHM = "HS256"
 
-# مسیرهایی که نیاز به احراز هویت ندارند
-PUBLIC_PATHS = [
+# مسیرهایی که نیاز به احراز هویت ندارند (تطابق کامل)
+PUBLIC_PATHS = frozenset({
     "/docs", "/docs/", "/openapi.json", "/favicon.ico", "/ping", "/static",
-    "/login", "/register","/seed/superadmin", "/admin/subscriptionswithoutpermisshion",
-    "/admin/subscriptionswithoutpermisshion/"
-]
+    "/login", "/register", "/seed/superadmin", "/admin/subscriptionswithoutpermisshion",
+    "/admin/subscriptionswithoutpermisshion/",
+})
+
+# مسیرهایی که با این پیشوندها شروع می‌شوند عمومی‌اند
+PUBLIC_PREFIXES = ("/static", "/docs", "/redoc", "/openapi.json")
+
+# یک regex از پیش کامپایل‌شده به جای اسکن لیست در هر درخواست
+_PUBLIC_PREFIX_RE = re.compile("|".join(re.escape(p) for p in PUBLIC_PREFIXES))
+
 
 def is_public_path(path: str) -> bool:
-    return (
-        path in PUBLIC_PATHS or
-        path.startswith("/static") or
-        path.startswith("/docs") or
-        path.startswith("/redoc") or
-        path.startswith("/openapi.json")
-    )
-
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        print("📍 وارد middleware شدیم:", request.url.path)
-        path = request.url.path
-        request_id = str(uuid4())
-        request.state.request_id = request_id
-
-        logger.info(f"[{request_id}] درخواست جدید: {request.method} {path}")
-
-        # 🟡 اضافه کن این خط برای دیباگ:
-        print("📥 All headers:", dict(request.headers))
-
-        start_time = time()
-
-        if is_public_path(path):
-            logger.info(f"[{request_id}] مسیر عمومی → بدون نیاز به توکن")
-            response = await call_next(request)
-            duration = time() - start_time
-            logger.info(f"[{request_id}] پاسخ با status {response.status_code} در {duration:.3f} ثانیه")
-            return response
-
-        auth_header = request.headers.get("authorization") or request.headers.get("Authorization")
+    return path in PUBLIC_PATHS or _PUBLIC_PREFIX_RE.match(path) is not None
+
+
+PrincipalResolver = Callable[[int, object], Awaitable[Optional[Principal]]]
+
+
+class AuthMiddleware:
+    """
+    فقط درخواست‌های http را پردازش می‌کند؛ lifespan و websocket مستقیم عبور می‌کنند.
+    نتیجه روی scope["state"] (همان request.state) قرار می‌گیرد:
+      request_id, principal, user, permissions, role_names
+    """
+
+    def __init__(self, app: ASGIApp, resolver: PrincipalResolver = resolve_principal):
+        self.app = app
+        self.resolver = resolver
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = perf_counter()
+        request_id = uuid4().hex
+        state = scope.setdefault("state", {})
+        state["request_id"] = request_id
+        path = scope["path"]
+        status_holder = [500]
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                status_holder[0] = message["status"]
+                MutableHeaders(scope=message).append("x-request-id", request_id)
+            await send(message)
+
+        try:
+            if is_public_path(path):
+                await self.app(scope, receive, send_wrapper)
+            else:
+                error = await self._authenticate(scope, state, request_id)
+                if error is not None:
+                    await error(scope, receive, send_wrapper)
+                else:
+                    await self.app(scope, receive, send_wrapper)
+        except Exception:
+            logger.exception(f"[{request_id}] خطای ناشناخته هنگام پردازش {scope['method']} {path}")
+            raise
+
+        duration = perf_counter() - start_time
+        logger.info(f"[{request_id}] {scope['method']} {path} → {status_holder[0]} در {duration:.3f} ثانیه")
+
+    async def _authenticate(self, scope: Scope, state: dict, request_id: str) -> Optional[JSONResponse]:
+        """در صورت موفقیت None برمی‌گرداند؛ در غیر این صورت پاسخ خطا."""
+        auth_header = None
+        for key, value in scope["headers"]:
+            if key == b"authorization":
+                auth_header = value.decode("latin-1")
+                break
+
         if not auth_header or not auth_header.startswith("Bearer "):
             logger.warning(f"[{request_id}] هدر Authorization ارسال نشده یا ناقص است")
             return JSONResponse(status_code=401, content={"detail": "توکن ارسال نشده"})
 
-        token = auth_header.split(" ")[1]
-        print("🧪 توکن دریافتی از هدر:", repr(token))
+        token = auth_header[7:].strip()
 
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            print("🧪 SECRET_KEY در هنگام decode:", repr(SECRET_KEY))
             user_id = int(payload.get("sub"))
         except ExpiredSignatureError:
             logger.warning(f"[{request_id}] توکن منقضی شده")
             return JSONResponse(status_code=401, content={"detail": "توکن منقضی شده"})
-        except JWTError as e:
+        except (JWTError, TypeError, ValueError) as e:
             logger.warning(f"[{request_id}] خطا در دیکد کردن توکن: {e}")
             return JSONResponse(status_code=401, content={"detail": "توکن نامعتبر است"})
 
-        async with async_session() as session:
-            result = await session.execute(
-                select(User).options(joinedload(User.roles)).where(User.id == user_id)
-            )
-            user = result.scalars().first()
+        # principal (user + roles + permissions + features) از کش یا با یک کوئری
+        principal = await self.resolver(user_id, payload.get("iat"))
+        user = principal.user if principal else None
 
         if not user:
             logger.warning(f"[{request_id}] کاربر یافت نشد")
@@ -96,29 +133,9 @@ class AuthMiddleware(BaseHTTPMiddleware):
             logger.warning(f"[{request_id}] حساب کاربری حذف‌شده است")
             return JSONResponse(status_code=403, content={"detail": "حساب کاربری شما حذف شده است"})
 
-        # دریافت دسترسی‌ها و نقش‌ها
-        permissions = await get_user_permissions(user_id)
-        user.role_names = [r.name for r in user.roles] if user.roles else []
-
-        # برای دیباگ در ترمینال چاپ کن
-        print(" توکن:", token)
-        print(" Payload:", payload)
-        print(" کاربر:", user)
-        print(" نقش‌ها:", user.role_names)
-
-        # ذخیره در request.state
-        request.state.user = user
-        request.state.permissions = permissions
-        request.state.role_names = user.role_names
-
-        logger.info(f"[{request_id}] کاربر {user.id} → نقش‌ها: {user.role_names}")
-
-        try:
-            response = await call_next(request)
-        except Exception as e:
-            logger.exception(f"[{request_id}] خطای داخلی سرور: {e}")
-            raise e
-
-        duration = time() - start_time
-        logger.info(f"[{request_id}] پاسخ نهایی با status {response.status_code} در {duration:.3f} ثانیه")
-        return response
+        # ذخیره در request.state (get_current_user همین principal را استفاده می‌کند)
+        state["principal"] = principal
+        state["user"] = user
+        state["permissions"] = principal.permissions
+        state["role_names"] = principal.role_names
+        return None
@@ -1,12 +1,13 @@
 SELECT
     "Ticker" AS stock_ticker,
     "Sector" AS sector,
+    sector_key,
     "Market Cap" AS marketcap,
     "Value" AS value,
     "Final" AS adjust_close,
     ("Vol_Buy_I" - "Vol_Sell_I")* "Final" AS net_haghighi,
     "Close(%)" AS price_change
-FROM live_market_data
+FROM live_market_latest
 WHERE "Sector" IS NOT NULL
   AND "Ticker" IS NOT NULL
   AND "Market Cap" IS NOT NULL
@@ -16,5 +17,5 @@ WHERE "Sector" IS NOT NULL
   AND "Final" IS NOT NULL
   AND "Close(%)" IS NOT NULL
   AND "updated_at" = (
-      SELECT MAX("updated_at") FROM live_market_data
+      SELECT MAX("updated_at") FROM live_market_latest
   );
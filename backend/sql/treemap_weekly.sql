@@ -7,6 +7,7 @@ WITH ranked AS (
 SELECT
     stock_ticker,
     sector,
+    fa_sector_key(sector) AS sector_key,
     marketcap,
     value,
     (buy_i_value - sell_i_value)*adjust_close AS net_haghighi,
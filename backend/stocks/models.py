@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from sqlalchemy import BigInteger, Boolean, CHAR, Column, Date, DateTime, Double, Enum, ForeignKeyConstraint, Index, Integer, JSON, Numeric, PrimaryKeyConstraint, SmallInteger, String, Table, Text, UniqueConstraint, text
+from sqlalchemy import BigInteger, Boolean, CHAR, Column, Computed, Date, DateTime, Double, Enum, ForeignKeyConstraint, Index, Integer, JSON, Numeric, PrimaryKeyConstraint, SmallInteger, String, Table, Text, UniqueConstraint, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 import datetime
 import decimal
@@ -16,6 +16,7 @@ from sqlalchemy import (
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.sql import func   # ← اضافه شد
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
 
 
 
@@ -436,6 +437,7 @@ class DailyStockData(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     stock_ticker: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key(stock_ticker)', persisted=True))
     j_date: Mapped[Optional[str]] = mapped_column(CHAR(10))
     date_miladi: Mapped[Optional[datetime.date]] = mapped_column(Date)
     weekday: Mapped[Optional[str]] = mapped_column(Text)
@@ -461,6 +463,15 @@ class DailyStockData(Base):
     value_usd: Mapped[Optional[float]] = mapped_column(Double(53))
     dollar_rate: Mapped[Optional[float]] = mapped_column(Double(53))
     is_temp: Mapped[Optional[bool]] = mapped_column(Boolean, server_default=text('false'))
+    # سقف تاریخی جاری (cron_jobs.daily.update_running_ath)
+    ath_high: Mapped[Optional[float]] = mapped_column(Double(53))
+    ath_high_j_date: Mapped[Optional[str]] = mapped_column(Text)
+    ath_adjust_high: Mapped[Optional[float]] = mapped_column(Double(53))
+    ath_adjust_high_j_date: Mapped[Optional[str]] = mapped_column(Text)
+    ath_high_usd: Mapped[Optional[float]] = mapped_column(Double(53))
+    ath_high_usd_j_date: Mapped[Optional[str]] = mapped_column(Text)
+    ath_adjust_high_usd: Mapped[Optional[float]] = mapped_column(Double(53))
+    ath_adjust_high_usd_j_date: Mapped[Optional[str]] = mapped_column(Text)
 
 # ----- daily_rights_issue -----
 class DailyRightsIssue(Base):
@@ -580,6 +591,7 @@ class DailyFundStock(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     stock_ticker: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key(stock_ticker)', persisted=True))
     j_date: Mapped[Optional[str]] = mapped_column(CHAR(10))
     date_miladi: Mapped[Optional[datetime.date]] = mapped_column(Date)
     weekday: Mapped[Optional[str]] = mapped_column(Text)
@@ -616,6 +628,7 @@ class DailyFundSegment(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     stock_ticker: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key(stock_ticker)', persisted=True))
     j_date: Mapped[Optional[str]] = mapped_column(CHAR(10))
     date_miladi: Mapped[Optional[datetime.date]] = mapped_column(Date)
     weekday: Mapped[Optional[str]] = mapped_column(Text)
@@ -652,6 +665,7 @@ class DailyFundBalanced(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     stock_ticker: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key(stock_ticker)', persisted=True))
     j_date: Mapped[Optional[str]] = mapped_column(CHAR(10))
     date_miladi: Mapped[Optional[datetime.date]] = mapped_column(Date)
     weekday: Mapped[Optional[str]] = mapped_column(Text)
@@ -688,6 +702,7 @@ class DailyFundFixincome(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     stock_ticker: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key(stock_ticker)', persisted=True))
     j_date: Mapped[Optional[str]] = mapped_column(CHAR(10))
     date_miladi: Mapped[Optional[datetime.date]] = mapped_column(Date)
     weekday: Mapped[Optional[str]] = mapped_column(Text)
@@ -724,6 +739,7 @@ class DailyFundGold(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     stock_ticker: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key(stock_ticker)', persisted=True))
     j_date: Mapped[Optional[str]] = mapped_column(CHAR(10))
     date_miladi: Mapped[Optional[datetime.date]] = mapped_column(Date)
     weekday: Mapped[Optional[str]] = mapped_column(Text)
@@ -760,6 +776,7 @@ class DailyFundIndexStock(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     stock_ticker: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key(stock_ticker)', persisted=True))
     j_date: Mapped[Optional[str]] = mapped_column(CHAR(10))
     date_miladi: Mapped[Optional[datetime.date]] = mapped_column(Date)
     weekday: Mapped[Optional[str]] = mapped_column(Text)
@@ -796,6 +813,7 @@ class DailyFundLeverage(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     stock_ticker: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key(stock_ticker)', persisted=True))
     j_date: Mapped[Optional[str]] = mapped_column(CHAR(10))
     date_miladi: Mapped[Optional[datetime.date]] = mapped_column(Date)
     weekday: Mapped[Optional[str]] = mapped_column(Text)
@@ -832,6 +850,7 @@ class DailyFundZafran(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     stock_ticker: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key(stock_ticker)', persisted=True))
     j_date: Mapped[Optional[str]] = mapped_column(CHAR(10))
     date_miladi: Mapped[Optional[datetime.date]] = mapped_column(Date)
     weekday: Mapped[Optional[str]] = mapped_column(Text)
@@ -868,6 +887,7 @@ class DailyFundOther(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     stock_ticker: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key(stock_ticker)', persisted=True))
     j_date: Mapped[Optional[str]] = mapped_column(CHAR(10))
     date_miladi: Mapped[Optional[datetime.date]] = mapped_column(Date)
     weekday: Mapped[Optional[str]] = mapped_column(Text)
@@ -1040,18 +1060,15 @@ t_haghighi = Table(
     Column('sell_n_value_usd', Double(53)),
     Column('sector', Text),
     Column('is_temp', Boolean, server_default=text('false')),
+    Column('ticker_key', Text, Computed('fa_ticker_key(symbol)', persisted=True)),
+    Column('sector_key', Text, Computed('fa_sector_key(sector)', persisted=True)),
     UniqueConstraint('symbol', 'recdate', name='haghighi_symbol_recdate_unique')
 )
 
 
-class LiveMarketData(Base):
-    __tablename__ = 'live_market_data'
-    __table_args__ = (
-        PrimaryKeyConstraint('Ticker', 'Download', name='live_market_data_pkey'),
-    )
+class LiveMarketColumns:
+    """ستون‌های مشترک live_market_data (تاریخچه) و live_market_latest (آخرین ردیف هر نماد)"""
 
-    Ticker: Mapped[str] = mapped_column(Text, primary_key=True)
-    Download: Mapped[datetime.datetime] = mapped_column(DateTime, primary_key=True)
     Trade_Type: Mapped[Optional[str]] = mapped_column('Trade Type', Text)
     Time: Mapped[Optional[str]] = mapped_column(Text)
     Open: Mapped[Optional[decimal.Decimal]] = mapped_column(Numeric)
@@ -1081,6 +1098,8 @@ class LiveMarketData(Base):
     Name: Mapped[Optional[str]] = mapped_column(Text)
     Market: Mapped[Optional[str]] = mapped_column(Text)
     Sector: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key("Ticker")', persisted=True))
+    sector_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_sector_key("Sector")', persisted=True))
     Share_No: Mapped[Optional[int]] = mapped_column('Share-No', BigInteger)
     Base_Vol: Mapped[Optional[int]] = mapped_column('Base-Vol', BigInteger)
     Market_Cap: Mapped[Optional[int]] = mapped_column('Market Cap', BigInteger)
@@ -1088,6 +1107,29 @@ class LiveMarketData(Base):
     updated_at: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime)
 
 
+class LiveMarketData(LiveMarketColumns, Base):
+    __tablename__ = 'live_market_data'
+    __table_args__ = (
+        PrimaryKeyConstraint('Ticker', 'Download', name='live_market_data_pkey'),
+    )
+
+    Ticker: Mapped[str] = mapped_column(Text, primary_key=True)
+    Download: Mapped[datetime.datetime] = mapped_column(DateTime, primary_key=True)
+
+
+class LiveMarketLatest(LiveMarketColumns, Base):
+    # run_live_saver هر بار با ON CONFLICT ("Ticker") به‌روزش می‌کند
+    __tablename__ = 'live_market_latest'
+    __table_args__ = (
+        PrimaryKeyConstraint('Ticker', name='live_market_latest_pkey'),
+        Index('ix_live_market_latest_download', 'Download'),
+        Index('ix_live_market_latest_sector_key', 'sector_key'),
+    )
+
+    Ticker: Mapped[str] = mapped_column(Text, primary_key=True)
+    Download: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False)
+
+
 t_orderbook_snapshot = Table(
     'orderbook_snapshot', Base.metadata,
     Column('insCode', BigInteger),
@@ -1113,7 +1155,9 @@ t_orderbook_snapshot = Table(
     Column('BuyVolume5', BigInteger),
     Column('SellPrice5', Numeric),
     Column('SellVolume5', BigInteger),
-    Column('Sector', Text)
+    Column('Sector', Text),
+    Column('ticker_key', Text, Computed('fa_ticker_key("Symbol")', persisted=True)),
+    Column('sector_key', Text, Computed('fa_sector_key("Sector")', persisted=True))
 )
 
 
@@ -1149,6 +1193,8 @@ t_symboldetail = Table(
     # 👇 این دو خط را اضافه کن
     Column('instrument_type', Text),
     Column('source_file', Text),
+    Column('ticker_key', Text, Computed('fa_ticker_key(stock_ticker)', persisted=True)),
+    Column('sector_key', Text, Computed('fa_sector_key(sector)', persisted=True)),
     PrimaryKeyConstraint('insCode', name='symboldetail_pk')  # ← اضافه کن
 )
 
@@ -1349,6 +1395,7 @@ class WeeklyStockData(Base):
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     stock_ticker: Mapped[Optional[str]] = mapped_column(Text)
+    ticker_key: Mapped[Optional[str]] = mapped_column(Text, Computed('fa_ticker_key(stock_ticker)', persisted=True))
     week_start: Mapped[Optional[datetime.date]] = mapped_column(Date)
     week_end: Mapped[Optional[datetime.date]] = mapped_column(Date)
     open: Mapped[Optional[int]] = mapped_column(Integer)
@@ -1595,3 +1642,149 @@ class _ClientTypeMixin:
     is_temp: Mapped[bool | None] = mapped_column(Boolean, server_default=text('false'))
 
 
+
+
+# =========================
+# Data version (برای invalidate کردن کش پاسخ‌های API)
+# =========================
+class DataVersion(Base):
+    __tablename__ = "data_version"
+
+    # live | daily
+    source: Mapped[str] = mapped_column(Text, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("0"))
+    updated_at: Mapped[datetime.datetime] = mapped_column(DateTime, server_default=func.now())
+
+
+# =========================
+# Job queue (کارهای سنگین پس‌زمینه، مثل بازسازی داده‌های افزایش سرمایه)
+# =========================
+class JobQueue(Base):
+    __tablename__ = "job_queue"
+    __table_args__ = (
+        Index("ix_job_queue_status_id", "status", "id"),
+        # حداکثر یک کار فعال برای هر (kind, dedupe_key)
+        Index(
+            "ux_job_queue_active_dedupe", "kind", "dedupe_key",
+            unique=True, postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    # نوع کار، مثلا capital_increase
+    kind: Mapped[str] = mapped_column(Text, nullable=False)
+    # برای جلوگیری از ثبت دوبارهٔ یک کار در حال انجام (مثلا insCode)
+    dedupe_key: Mapped[str | None] = mapped_column(Text)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    # queued | running | succeeded | failed
+    status: Mapped[str] = mapped_column(Text, nullable=False, server_default=text("'queued'"))
+    progress: Mapped[str | None] = mapped_column(Text)
+    result: Mapped[dict | None] = mapped_column(JSONB)
+    error: Mapped[str | None] = mapped_column(Text)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    worker: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, server_default=func.now())
+    started_at: Mapped[datetime.datetime | None] = mapped_column(DateTime)
+    heartbeat_at: Mapped[datetime.datetime | None] = mapped_column(DateTime)
+    finished_at: Mapped[datetime.datetime | None] = mapped_column(DateTime)
+
+
+# =========================
+# Orderbook rollup دقیقه‌ای (run_live_orderbool در زمان ingest می‌نویسد)
+# =========================
+class OrderbookMinuteSymbol(Base):
+    __tablename__ = "orderbook_minute_symbol"
+    __table_args__ = (
+        PrimaryKeyConstraint("day", "minute", "symbol", name="orderbook_minute_symbol_pkey"),
+        Index("ix_orderbook_minute_symbol_day_sector_key", "day", "sector_key", "minute"),
+    )
+
+    day: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    minute: Mapped[datetime.datetime] = mapped_column(DateTime, primary_key=True)
+    symbol: Mapped[str] = mapped_column(Text, primary_key=True)
+    sector: Mapped[str | None] = mapped_column(Text)
+    sector_key: Mapped[str | None] = mapped_column(Text, Computed("fa_sector_key(sector)", persisted=True))
+    total_buy: Mapped[decimal.Decimal] = mapped_column(Numeric, nullable=False, server_default=text("0"))
+    total_sell: Mapped[decimal.Decimal] = mapped_column(Numeric, nullable=False, server_default=text("0"))
+
+
+class OrderbookMinuteSector(Base):
+    __tablename__ = "orderbook_minute_sector"
+    __table_args__ = (
+        PrimaryKeyConstraint("day", "minute", "sector", name="orderbook_minute_sector_pkey"),
+    )
+
+    day: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    minute: Mapped[datetime.datetime] = mapped_column(DateTime, primary_key=True)
+    sector: Mapped[str] = mapped_column(Text, primary_key=True)
+    total_buy: Mapped[decimal.Decimal] = mapped_column(Numeric, nullable=False, server_default=text("0"))
+    total_sell: Mapped[decimal.Decimal] = mapped_column(Numeric, nullable=False, server_default=text("0"))
+
+
+class RealMoneyFlowMarket(Base):
+    __tablename__ = "real_money_flow_market"
+    __table_args__ = (
+        PrimaryKeyConstraint("timeframe", "period_end", name="real_money_flow_market_pkey"),
+    )
+
+    timeframe: Mapped[str] = mapped_column(Text, primary_key=True)
+    period_end: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    j_date: Mapped[Optional[str]] = mapped_column(Text)
+    flow_rial: Mapped[decimal.Decimal] = mapped_column(Numeric, nullable=False, server_default=text("0"))
+    flow_dollar: Mapped[decimal.Decimal] = mapped_column(Numeric, nullable=False, server_default=text("0"))
+
+
+class RealMoneyFlowSector(Base):
+    __tablename__ = "real_money_flow_sector"
+    __table_args__ = (
+        PrimaryKeyConstraint("timeframe", "period_end", "sector", name="real_money_flow_sector_pkey"),
+    )
+
+    timeframe: Mapped[str] = mapped_column(Text, primary_key=True)
+    period_end: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    sector: Mapped[str] = mapped_column(Text, primary_key=True)
+    j_date: Mapped[Optional[str]] = mapped_column(Text)
+    flow_rial: Mapped[decimal.Decimal] = mapped_column(Numeric, nullable=False, server_default=text("0"))
+    flow_dollar: Mapped[decimal.Decimal] = mapped_column(Numeric, nullable=False, server_default=text("0"))
+
+
+class WeekCalendar(Base):
+    __tablename__ = "week_calendar"
+    __table_args__ = (
+        PrimaryKeyConstraint("week_end", name="week_calendar_pkey"),
+    )
+
+    week_end: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    week_start: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    j_week_start: Mapped[Optional[str]] = mapped_column(CHAR(10))
+    j_week_end: Mapped[Optional[str]] = mapped_column(CHAR(10))
+    trading_days: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+
+
+class SignalsLatest(Base):
+    __tablename__ = "signals_latest"
+    __table_args__ = (
+        PrimaryKeyConstraint("freq", "currency", "stock_ticker", name="signals_latest_pkey"),
+        Index("ix_signals_latest_freq_currency_sector", "freq", "currency", "sector", "stock_ticker"),
+    )
+
+    freq: Mapped[str] = mapped_column(Text, primary_key=True)
+    currency: Mapped[str] = mapped_column(Text, primary_key=True)
+    stock_ticker: Mapped[str] = mapped_column(Text, primary_key=True)
+    date: Mapped[datetime.date] = mapped_column(Date, nullable=False)
+    name: Mapped[Optional[str]] = mapped_column(Text)
+    sector: Mapped[Optional[str]] = mapped_column(Text)
+    price: Mapped[Optional[float]] = mapped_column(Double(53))
+    sig_ich_buy: Mapped[float] = mapped_column(Double(53), nullable=False, server_default=text("0"))
+    sig_ich_sell: Mapped[float] = mapped_column(Double(53), nullable=False, server_default=text("0"))
+    sig_ema_buy: Mapped[float] = mapped_column(Double(53), nullable=False, server_default=text("0"))
+    sig_ema_sell: Mapped[float] = mapped_column(Double(53), nullable=False, server_default=text("0"))
+    sig_rsi_buy: Mapped[float] = mapped_column(Double(53), nullable=False, server_default=text("0"))
+    sig_rsi_sell: Mapped[float] = mapped_column(Double(53), nullable=False, server_default=text("0"))
+    sig_macd_buy: Mapped[float] = mapped_column(Double(53), nullable=False, server_default=text("0"))
+    sig_macd_sell: Mapped[float] = mapped_column(Double(53), nullable=False, server_default=text("0"))
+    sig_ema50100_buy: Mapped[float] = mapped_column(Double(53), nullable=False, server_default=text("0"))
+    sig_ema50100_sell: Mapped[float] = mapped_column(Double(53), nullable=False, server_default=text("0"))
+    renko: Mapped[float] = mapped_column(Double(53), nullable=False, server_default=text("0"))
+    ich_position: Mapped[Optional[str]] = mapped_column(Text)
+    updated_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, server_default=text("now()"))
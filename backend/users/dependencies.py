@@ -22,8 +22,6 @@ def require_roles(*allowed_roles: str):
 
 def require_permissions(*required_permissions: str):
     async def permission_checker(user: User = Depends(get_current_user)):
-        print("✅ user.permissions =", user.permissions)
-        print("✅ required_permissions =", required_permissions)
         if not any(p in user.permissions for p in required_permissions):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
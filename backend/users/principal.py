@@ -0,0 +1,185 @@
+# backend/users/principal.py
+# -*- coding: utf-8 -*-
+"""
+Principal = کاربر احراز هویت‌شده + نقش‌ها + دسترسی‌ها + featureهای اشتراک فعال.
+
+به جای سه کوئری جدا در هر درخواست (middleware، get_user_permissions و get_current_user)
+principal یکبار با یک کوئری joinedload ساخته می‌شود و با کلید (user_id, iat توکن)
+برای مدت PRINCIPAL_CACHE_TTL_SECONDS نگه داشته می‌شود.
+
+روت‌هایی که کاربر/نقش/دسترسی/اشتراک را تغییر می‌دهند باید invalidate_principal را صدا بزنند.
+کش داخل هر worker جداست؛ TTL سقف ناسازگاری بین workerها را تعیین می‌کند و حداکثر
+PRINCIPAL_CACHE_MAX_ENTRIES کلید (LRU) نگه داشته می‌شود، چون هر ورود iat تازه‌ای می‌سازد.
+
+principal.user یک UserSnapshot فقط‌خواندنی است که بین درخواست‌ها مشترک است؛ روتی که کاربر
+(مثلاً roles) را تغییر می‌دهد باید User را در session خودش دوباره لود کند.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import inspect as sa_inspect, select
+from sqlalchemy.orm import joinedload
+
+from backend.db.connection import async_session
+from backend.users.models import User, Role, UserSubscription
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+
+class UserSnapshot:
+    """
+    کپی فقط‌خواندنی ستون‌ها و رابطه‌های لودشدهٔ User (roles و subscriptions به‌صورت tuple).
+    هر set یا append خطا می‌دهد تا تغییری روی نسخهٔ کش‌شده به درخواست‌های بعدی نرسد.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, user: User):
+        data = {attr.key: getattr(user, attr.key) for attr in sa_inspect(User).column_attrs}
+        data["roles"] = tuple(user.roles or ())
+        data["subscriptions"] = tuple(user.subscriptions or ())
+        # فیلدهای سازگاری که build_principal روی user می‌گذارد
+        for name in ("role_names", "permissions", "features"):
+            if hasattr(user, name):
+                data[name] = getattr(user, name)
+        object.__setattr__(self, "_data", data)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"UserSnapshot is read-only; load User in the route's session to change '{name}'")
+
+    def __repr__(self) -> str:
+        return f"<UserSnapshot id={self._data.get('id')}>"
+
+
+class Principal:
+    """نتیجهٔ resolve شدهٔ احراز هویت که روی request.state.principal قرار می‌گیرد."""
+
+    __slots__ = ("user", "role_names", "permissions", "features")
+
+    def __init__(self, user: User, role_names: List[str], permissions: List[str], features: Dict[str, Any]):
+        self.user = user
+        self.role_names = role_names
+        self.permissions = permissions
+        self.features = features
+
+
+def build_principal(user: User, snapshot: bool = False) -> Principal:
+    """
+    از روی User که roles.permissions و subscriptions.subscription آن لود شده‌اند
+    نقش‌ها، دسترسی‌ها و featureهای اشتراک فعال را استخراج می‌کند.
+    snapshot=True → principal.user یک UserSnapshot فقط‌خواندنی است (برای کش).
+    """
+    role_names = [role.name for role in (user.roles or [])]
+    permissions = sorted({perm.name for role in (user.roles or []) for perm in (role.permissions or [])})
+
+    features: Dict[str, Any] = {}
+    now = datetime.utcnow()
+    active_sub = next(
+        (s for s in (user.subscriptions or []) if s.is_active and s.end_date and s.end_date >= now),
+        None,
+    )
+    if active_sub and active_sub.subscription:
+        features = active_sub.subscription.features or {}
+
+    # سازگاری با کدهای قبلی که این فیلدها را روی خود user می‌خوانند
+    user.role_names = role_names
+    user.permissions = permissions
+    user.features = features
+
+    if snapshot:
+        user = UserSnapshot(user)
+    return Principal(user=user, role_names=role_names, permissions=permissions, features=features)
+
+
+def principal_query(user_id: int):
+    return (
+        select(User)
+        .options(
+            joinedload(User.roles).joinedload(Role.permissions),
+            joinedload(User.subscriptions).joinedload(UserSubscription.subscription),
+        )
+        .where(User.id == user_id)
+    )
+
+
+async def load_principal(user_id: int) -> Optional[Principal]:
+    """یک round-trip: user + roles + permissions + subscriptions"""
+    async with async_session() as session:
+        result = await session.execute(principal_query(user_id))
+        user = result.unique().scalar_one_or_none()
+    if user is None:
+        return None
+    return build_principal(user, snapshot=True)
+
+
+class PrincipalCache:
+    """LRU با TTL؛ کلیدهای منقضی در put (حداکثر یکبار در هر TTL) جارو می‌شوند."""
+
+    def __init__(self, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS,
+                 max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, Any], Tuple[float, Principal]]" = OrderedDict()
+        self._next_sweep = 0.0
+
+    def get(self, user_id: int, iat: Any) -> Optional[Principal]:
+        key = (user_id, iat)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return principal
+
+    def put(self, user_id: int, iat: Any, principal: Principal):
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            for key in [k for k, (expires_at, _) in self._entries.items() if expires_at < now]:
+                del self._entries[key]
+            self._next_sweep = now + self.ttl_seconds
+        self._entries[(user_id, iat)] = (now + self.ttl_seconds, principal)
+        self._entries.move_to_end((user_id, iat))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int] = None):
+        if user_id is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == user_id]:
+            self._entries.pop(key, None)
+
+
+principal_cache = PrincipalCache()
+
+
+async def resolve_principal(user_id: int, iat: Any = None) -> Optional[Principal]:
+    principal = principal_cache.get(user_id, iat)
+    if principal is not None:
+        return principal
+    principal = await load_principal(user_id)
+    if principal is not None and PRINCIPAL_CACHE_TTL_SECONDS > 0:
+        principal_cache.put(user_id, iat, principal)
+    return principal
+
+
+def invalidate_principal(user_id: Optional[int] = None):
+    """
+    بعد از تغییر کاربر/نقش/دسترسی/اشتراک صدا زده شود.
+    user_id=None → کل کش (مثلاً وقتی دسترسی‌های یک نقش عوض می‌شود).
+    """
+    principal_cache.invalidate(user_id)
@@ -22,6 +22,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from backend.utils.exceptions import AppException  # اگر قدم 0 را رفتی
+from backend.users.principal import build_principal, principal_query, resolve_principal
 
 
 router = APIRouter()
@@ -49,75 +50,56 @@ def get_password_hash(password):
 
 # ✅ توکن‌سازی همراه با ویژگی‌ها و نقش‌ها
 async def create_access_token(user_id: int, db: AsyncSession, expires_delta: Optional[timedelta] = None):
-    result = await db.execute(
-        select(User)
-        .options(
-            joinedload(User.roles).joinedload(Role.permissions),
-            joinedload(User.subscriptions).joinedload(UserSubscription.subscription)
-        )
-        .where(User.id == user_id)
-    )
+    result = await db.execute(principal_query(user_id))
     user = result.unique().scalar_one_or_none()
     if not user:
         raise Exception("User not found")
 
-    roles = [role.name for role in user.roles]
-    permissions = list({perm.name for role in user.roles for perm in role.permissions})
-
-    features = {}
+    principal = build_principal(user)
     now = datetime.utcnow()
-    active_sub = next((s for s in user.subscriptions if s.is_active and s.end_date >= now), None)
-    if active_sub:
-        features = active_sub.subscription.features or {}
 
     to_encode = {
         "sub": str(user.id),
-        "roles": roles,
-        "permissions": permissions,
-        "features": features,
-        "exp": datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+        "roles": principal.role_names,
+        "permissions": principal.permissions,
+        "features": principal.features,
+        "iat": now,  # بخشی از کلید کش principal
+        "exp": now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     }
 
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
 async def get_current_user(
+    request: Request,
     token: HTTPAuthorizationCredentials = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db)
 ):
-    token = token.credentials
+    """
+    principal را از request.state (ست‌شده توسط AuthMiddleware) برمی‌دارد؛
+    اگر نبود (مثلاً مسیر عمومی)، توکن را decode و از کش principal resolve می‌کند.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = int(payload.get("sub"))
-        if not user_id:
+    principal = getattr(request.state, "principal", None)
+    if principal is None:
+        try:
+            payload = jwt.decode(token.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+            user_id = int(payload.get("sub"))
+            if not user_id:
+                raise credentials_exception
+        except (JWTError, TypeError, ValueError):
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-
-    result = await db.execute(
-        select(models.User)
-        .options(
-            joinedload(models.User.roles),
-            joinedload(models.User.subscriptions).joinedload(models.UserSubscription.subscription)
-        )
-        .where(models.User.id == user_id)
-    )
-    user = result.unique().scalar_one_or_none()
-
-    if user is None:
-        raise credentials_exception
 
-    user.token_roles = payload.get("roles", [])
-    user.permissions = payload.get("permissions", [])
-    user.features = payload.get("features", {})
+        principal = await resolve_principal(user_id, payload.get("iat"))
+        if principal is None:
+            raise credentials_exception
+        request.state.principal = principal
 
-    return user
+    return principal.user
 
 
 
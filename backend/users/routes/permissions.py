@@ -9,6 +9,7 @@ from backend.db.connection import async_session
 from backend.utils.response import create_response
 from backend.users.dependencies import require_permissions
 from sqlalchemy.orm import selectinload
+from backend.users.principal import invalidate_principal
 
 router = APIRouter()
 
@@ -126,6 +127,7 @@ async def assign_permissions_to_role(
         added += 1
 
     await db.commit()
+    invalidate_principal()
     return create_response(
         status_code=http_status.HTTP_200_OK,
         status="success",
@@ -13,6 +13,7 @@ from fastapi import Query
 from backend.users.models import User
 from fastapi import status as http_status
 from sqlalchemy.exc import IntegrityError
+from backend.users.principal import invalidate_principal
 
 
 router = APIRouter()
@@ -71,6 +72,7 @@ async def seed_superadmin(db: AsyncSession  = Depends(get_db)):
     except IntegrityError as exc:
         await db.rollback()
         raise exc
+    invalidate_principal(user.id)
 
     return create_response(
         status_code=http_status.HTTP_201_CREATED,
@@ -204,6 +206,7 @@ async def assign_role_to_user(
     except IntegrityError as exc:
         await db.rollback()
         raise exc
+    invalidate_principal(user_id)
 
     return create_response(
         status_code=http_status.HTTP_200_OK,
@@ -256,6 +259,7 @@ _: User = Depends(require_permissions("Role.AssignToUser","ALL")),
     except IntegrityError as exc:
         await db.rollback()
         raise exc
+    invalidate_principal(user_id)
 
     return create_response(
         status_code=http_status.HTTP_200_OK,
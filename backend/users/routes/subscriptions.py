@@ -1,6 +1,6 @@
 
 from fastapi import APIRouter, Request, Depends,HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from datetime import datetime, timedelta
 from backend.users import models, schemas
 from backend.db.connection import async_session
@@ -12,6 +12,7 @@ from sqlalchemy import select,func
 from fastapi import Query
 from fastapi import status as http_status
 from sqlalchemy.exc import IntegrityError
+from backend.users.principal import invalidate_principal
 
 router = APIRouter()
 
@@ -30,7 +31,17 @@ async def subscribe_to_plan(
     db: AsyncSession = Depends(get_db)
 ):
     # 1) احراز هویت از middleware
-    user = getattr(request.state, "user", None)
+    current = getattr(request.state, "user", None)
+    if not current:
+        raise HTTPException(
+            status_code=http_status.HTTP_401_UNAUTHORIZED,
+            detail="توکن نامعتبر یا کاربر یافت نشد",
+        )
+    # request.state.user نسخهٔ فقط‌خواندنی کش principal است؛ برای افزودن نقش، User همین session
+    result = await db.execute(
+        select(models.User).options(selectinload(models.User.roles)).where(models.User.id == current.id)
+    )
+    user = result.scalars().first()
     if not user:
         raise HTTPException(
             status_code=http_status.HTTP_401_UNAUTHORIZED,
@@ -101,6 +112,7 @@ async def subscribe_to_plan(
             await db.rollback()
             # ⛔️ فقط raise تا به هندلر IntegrityError برود (409 یا 400 بسته به نوع خطا)
             raise exc
+        invalidate_principal(user.id)
         await db.refresh(new_sub)
 
     return create_response(
@@ -420,6 +432,7 @@ async def update_subscription(
     except IntegrityError as exc:
         await db.rollback()
         raise exc
+    invalidate_principal()
     await db.refresh(sub)
 
     sub_data = schemas.SubscriptionOut.model_validate(sub, from_attributes=True)
@@ -469,6 +482,7 @@ async def delete_subscription(
     except IntegrityError as exc:
         await db.rollback()
         raise exc
+    invalidate_principal()
 
     return create_response(
         status_code=http_status.HTTP_200_OK,
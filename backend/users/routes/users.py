@@ -17,6 +17,7 @@ from backend.users import models, schemas
 from backend.users.routes.auth import get_password_hash
 from backend.users.schemas import UserUpdate
 from fastapi import status as http_status
+from backend.users.principal import invalidate_principal
 
 
 router = APIRouter()
@@ -234,6 +235,7 @@ async def update_user_for_admin(
         await db.rollback()
         #  بگذار هندلر IntegrityError پاسخ استاندارد بدهد
         raise exc
+    invalidate_principal(user_id)
 
     await db.refresh(user)
 
@@ -282,6 +284,7 @@ async def delete_user_for_admin(
     try:
         await db.delete(user)
         await db.commit()
+        invalidate_principal(user_id)
     except IntegrityError as exc:
         await db.rollback()
         # ⛔️ فقط raise تا به handle_integrity_error برسد (و پیام/کد استاندارد بدهد)
@@ -18,6 +18,7 @@ from backend.db.connection import async_session
 from backend.utils.logger import logger
 from datetime import datetime, timedelta
 from fastapi import status as http_status
+from backend.users.principal import invalidate_principal
 
 
 router = APIRouter()
@@ -127,6 +128,7 @@ async def create_user_subscription_admin(
     except IntegrityError as exc:
         await db.rollback()
         raise exc
+    invalidate_principal(data.user_id)
     await db.refresh(new_sub)
 
     return create_response(
@@ -208,6 +210,7 @@ async def update_user_subscription_admin(
     except IntegrityError as exc:
         await db.rollback()
         raise exc
+    invalidate_principal(sub.user_id)
     await db.refresh(sub)
 
     return create_response(
@@ -270,6 +273,7 @@ async def delete_user_subscription_admin(
     except IntegrityError as exc:
         await db.rollback()
         raise exc
+    invalidate_principal(sub.user_id)
     await db.refresh(sub)
 
     return create_response(
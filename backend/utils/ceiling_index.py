@@ -0,0 +1,157 @@
+# backend/utils/ceiling_index.py
+# -*- coding: utf-8 -*-
+"""
+ایندکس درون‌حافظه‌ای range-max برای روت‌های سقف (/targets/ceiling در حالت start/end).
+
+- روی تاریخچهٔ مشترک backend/utils/daily_history.py ساخته می‌شود (همان نسخهٔ daily_history).
+- برای هر قیمت سقف (high / adjust_high × ریال / دلار) یک sparse table از argmax ساخته می‌شود
+  (فقط وقتی آن قیمت خواسته شود): سطح k برای هر i اندیس بیشینهٔ [i, i + 2^k) را به‌صورت offset نگه می‌دارد.
+- هر پرس‌وجوی بازه برای همهٔ نمادها با هم و بدون حلقه: دو lookup در sparse table به ازای هر نماد (O(1)).
+- تساوی مثل ORDER BY px DESC, date DESC قبلی به تاریخ جدیدتر می‌رسد؛ NaN/NULL هیچ‌وقت سقف نمی‌شود.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.utils.daily_history import COLUMNS, EPOCH, VersionedIndex, daily_history
+from backend.utils.logger import logger
+
+DAY_BITS = 20   # کلید ترکیبی (شمارهٔ نماد << 20) | روز از 1970 برای searchsorted برداری
+
+# قیمت سقف → عبارت SQL روی daily_stock_data
+PRICES = {p: COLUMNS[p] for p in ("high", "adjust_high", "high_usd", "adjust_high_usd")}
+
+
+def price_key(adjusted: bool, currency: str) -> str:
+    key = "adjust_high" if adjusted else "high"
+    return key + "_usd" if currency == "usd" else key
+
+
+class SparseTableMax:
+    """argmax بازه در O(1) روی یک آرایه (NaN = -inf؛ تساوی → اندیس بزرگ‌تر)."""
+
+    def __init__(self, values, max_len: int):
+        import numpy as np
+
+        n = len(values)
+        self.values = np.where(np.isfinite(values), values, -np.inf)
+        levels = max(1, int(max_len).bit_length())
+        self.offsets = np.zeros((levels, n), dtype=np.uint16 if levels <= 16 else np.uint32)
+
+        idx = np.arange(n)
+        best = idx.copy()
+        for k in range(1, levels):
+            half = 1 << (k - 1)
+            if half >= n:
+                break
+            left, right = best[:n - half], best[half:]
+            merged = best.copy()
+            merged[:n - half] = np.where(self.values[right] >= self.values[left], right, left)
+            best = merged
+            self.offsets[k] = best - idx
+
+    def argmax(self, lo, hi):
+        """اندیس بیشینه در [lo, hi] (شامل هر دو؛ lo <= hi) برای هر جفت."""
+        import numpy as np
+
+        length = hi - lo + 1
+        k = np.floor(np.log2(length)).astype(np.int64)
+        first = lo + self.offsets[k, lo]
+        start2 = hi - (1 << k) + 1
+        second = start2 + self.offsets[k, start2]
+        return np.where(self.values[second] >= self.values[first], second, first)
+
+
+@dataclass
+class CeilingWindow:
+    tickers: List[str]
+    price_now: List[float]
+    price_j_date: List[str]
+    ceiling_price: List[float]
+    ceiling_j_date: List[str]
+
+
+class CeilingIndex(VersionedIndex):
+    def __init__(self):
+        super().__init__()
+        # آرایه‌های تاریخچهٔ مشترک (به ترتیب نماد، تاریخ)
+        self.tickers: List[str] = []
+        self.keys: Any = None
+        self.days: Any = None
+        self.j_dates: Any = None
+        self.starts: Any = None
+        self.values: Dict[str, Any] = {}
+        self.max_len = 0
+        self.last_day: Optional[date] = None
+        self._tables: Dict[str, SparseTableMax] = {}
+
+    # ---------- load ----------
+
+    async def _load(self, db: AsyncSession):
+        import numpy as np
+
+        history = await daily_history.ensure(db)
+        self.tickers = history.tickers
+        self.starts = history.starts
+        self.days = history.days
+        self.j_dates = history.j_dates
+        self.values = {p: history.values[p] for p in PRICES}
+        ticker_ids = np.repeat(np.arange(len(self.tickers), dtype=np.int64), history.lengths)
+        self.keys = (ticker_ids << DAY_BITS) | self.days.astype(np.int64)
+        self.max_len = int(history.lengths.max()) if len(history.lengths) else 0
+        self.last_day = date.fromordinal(EPOCH.toordinal() + int(self.days.max())) if len(self.days) else None
+        self._tables = {}
+        logger.info(f"📈 ceiling index built: {len(self.tickers)} tickers, {len(self.days)} rows")
+
+    def _table(self, price: str) -> SparseTableMax:
+        table = self._tables.get(price)
+        if table is None:
+            table = self._tables[price] = SparseTableMax(self.values[price], self.max_len)
+        return table
+
+    # ---------- query ----------
+
+    def window(self, price: str, start: date, end: Optional[date]) -> CeilingWindow:
+        """
+        برای هر نماد: قیمت در end (محدود به آخرین روز داده) و سقف [start, end].
+        نمادی که در end ردیف/قیمت معتبر یا در بازه سقف معتبر ندارد حذف می‌شود (مثل JOIN های SQL قبلی).
+        """
+        import numpy as np
+
+        empty = CeilingWindow([], [], [], [], [])
+        if self.last_day is None:
+            return empty
+        end = min(end or date.today(), self.last_day)
+        start_day, end_day = max(0, (start - EPOCH).days), (end - EPOCH).days
+        if start_day > end_day:
+            return empty
+
+        ids = np.arange(len(self.tickers), dtype=np.int64) << DAY_BITS
+        lo = np.searchsorted(self.keys, ids | start_day, side="left")
+        hi = np.searchsorted(self.keys, ids | end_day, side="right") - 1
+
+        values = self.values[price]
+        ok = (hi >= self.starts[:-1]) & (lo <= hi)
+        hi_safe = np.where(ok, hi, 0)
+        ok &= (self.days[hi_safe] == end_day) & np.isfinite(values[hi_safe])
+
+        sel = np.flatnonzero(ok)
+        lo, hi = lo[sel], hi[sel]
+        best = self._table(price).argmax(lo, hi)
+        ceiling = values[best]
+        has_ceiling = np.isfinite(ceiling)
+        sel, hi, best = sel[has_ceiling], hi[has_ceiling], best[has_ceiling]
+
+        return CeilingWindow(
+            tickers=[self.tickers[i] for i in sel],
+            price_now=values[hi].tolist(),
+            price_j_date=[j.decode("ascii") for j in self.j_dates[hi]],
+            ceiling_price=values[best].tolist(),
+            ceiling_j_date=[j.decode("ascii") for j in self.j_dates[best]],
+        )
+
+
+ceiling_index = CeilingIndex()
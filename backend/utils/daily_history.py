@@ -0,0 +1,105 @@
+# backend/utils/daily_history.py
+# -*- coding: utf-8 -*-
+"""
+تاریخچهٔ روزانهٔ همهٔ نمادها (daily_stock_data) در حافظهٔ پروسه، مشترک بین ایندکس‌های API
+(backend/utils/ceiling_index.py و backend/utils/trading_calendar.py).
+
+- یکبار و بعد از هر bump نسخهٔ daily_history (شبانه / افزایش سرمایه) با یک کوئری streaming خوانده می‌شود؛
+  sync ردیف موقت امروز (نسخهٔ daily) باعث بارگذاری دوباره نمی‌شود.
+- آرایه‌های numpy پشت‌سرهم به ترتیب (نماد، تاریخ) نگه داشته می‌شوند؛ starts مرز ردیف‌های هر نماد است.
+- VersionedIndex پایهٔ ensure/lock/نسخه برای همهٔ این ایندکس‌هاست.
+
+numpy داخل توابع import می‌شود تا در زمان بالا آمدن API لود نشود.
+"""
+
+import asyncio
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.utils.logger import logger
+from backend.utils.response_cache import SOURCE_DAILY_HISTORY, data_versions
+
+EPOCH = date(1970, 1, 1)
+
+# ستون → عبارت SQL روی daily_stock_data (high_usd ستون ندارد: high / dollar_rate)
+COLUMNS = {
+    "close": "close::float8",
+    "high": "high::float8",
+    "adjust_high": "adjust_high::float8",
+    "high_usd": "high::float8 / NULLIF(dollar_rate, 0)",
+    "adjust_high_usd": "adjust_high_usd::float8",
+}
+
+HISTORY_SQL = text(f"""
+    SELECT stock_ticker,
+           array_agg(date_miladi - DATE '1970-01-01' ORDER BY date_miladi),
+           array_agg(COALESCE(j_date, '') ORDER BY date_miladi),
+           {", ".join(f"array_agg({expr} ORDER BY date_miladi)" for expr in COLUMNS.values())}
+    FROM daily_stock_data
+    WHERE stock_ticker IS NOT NULL AND date_miladi IS NOT NULL
+    GROUP BY stock_ticker
+    ORDER BY stock_ticker
+""")
+
+
+class VersionedIndex:
+    """ساختار درون‌حافظه‌ای که با عوض شدن نسخهٔ منابعش از نو ساخته می‌شود (_load را پیاده می‌کند)."""
+
+    sources: Tuple[str, ...] = (SOURCE_DAILY_HISTORY,)
+
+    def __init__(self):
+        self._version: Optional[Tuple[int, ...]] = None
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    async def _load(self, db: AsyncSession):
+        raise NotImplementedError
+
+    async def ensure(self, db: AsyncSession):
+        version = await data_versions.current(db, self.sources)
+        if self._loaded and (version is None or version == self._version):
+            return self
+        async with self._lock:
+            if not self._loaded or (version is not None and version != self._version):
+                await self._load(db)
+                self._version = version
+                self._loaded = True
+        return self
+
+
+class DailyHistory(VersionedIndex):
+    def __init__(self):
+        super().__init__()
+        self.tickers: List[str] = []
+        self.lengths: Any = None                 # ndarray [نماد]: تعداد روزهای هر نماد
+        self.starts: Any = None                  # ndarray [نماد + 1]
+        self.days: Any = None                    # ndarray int32: روز از 1970
+        self.j_dates: Any = None                 # ndarray S10
+        self.values: Dict[str, Any] = {}         # ستون → ndarray float64 (NaN = NULL)
+
+    async def _load(self, db: AsyncSession):
+        import numpy as np
+
+        tickers, days, j_dates = [], [], []
+        values: Dict[str, list] = {c: [] for c in COLUMNS}
+        result = await db.stream(HISTORY_SQL)
+        async for row in result:
+            tickers.append(row[0])
+            days.append(np.asarray(row[1], dtype=np.int32))
+            j_dates.append(np.asarray([j.encode("ascii", "ignore")[:10] for j in row[2]], dtype="S10"))
+            for c, arr in zip(COLUMNS, row[3:]):
+                values[c].append(np.asarray(arr, dtype=np.float64))  # None → NaN
+
+        self.tickers = tickers
+        self.lengths = np.asarray([len(d) for d in days], dtype=np.int64)
+        self.starts = np.concatenate([[0], np.cumsum(self.lengths)])
+        self.days = np.concatenate(days) if days else np.zeros(0, dtype=np.int32)
+        self.j_dates = np.concatenate(j_dates) if j_dates else np.zeros(0, dtype="S10")
+        self.values = {c: (np.concatenate(v) if v else np.zeros(0)) for c, v in values.items()}
+        logger.info(f"🗂️ daily history loaded: {len(tickers)} tickers, {len(self.days)} rows")
+
+
+daily_history = DailyHistory()
@@ -0,0 +1,167 @@
+# backend/utils/hierarchy.py
+# -*- coding: utf-8 -*-
+"""
+ساخت ساختارهای سلسله‌مراتبی نمودارها (Treemap / Sankey در ECharts) از نتیجهٔ کوئری.
+
+همهٔ محاسبات ستونی (تبدیل عددی، اسکیل، رند، جمع گروه‌ها، جدا کردن علامت جریان) با
+NumPy/pandas انجام می‌شود و فقط ساخت dict نهایی روی لیست‌های پایتونی است (بدون iterrows).
+
+numpy/pandas داخل توابع import می‌شوند تا در زمان بالا آمدن API لود نشوند.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+# جایگزینی‌های نرمال‌سازی فارسی/عربی (مشترک بین نسخهٔ تکی و ستونی)
+PERSIAN_REPLACEMENTS = (
+    ("ي", "ی"),        # ya عربی → ya فارسی
+    ("ك", "ک"),        # kaf عربی → kaf فارسی
+    ("\u200c", ""),    # نیم‌فاصله (ZWNJ) → حذف
+    ("ـ", ""),         # کشیدگی → حذف
+)
+
+ETF_SECTOR = "صندوق سرمایه گذاری قابل معامله"
+
+# size_mode هایی که به واحد ۱e10 (میلیارد تومان) اسکیل می‌شوند
+SCALED_SIZE_MODES = ("marketcap", "value", "net_haghighi")
+SIZE_SCALE = 1e10
+
+
+def normalize_persian(text: Optional[str]):
+    """نرمال‌سازی حروف عربی/فارسی + حذف نیم‌فاصله و کشیدگی (برای یک مقدار)"""
+    if text is None:
+        return None
+    if not isinstance(text, str):
+        text = str(text)
+    text = text.strip().lower()
+    for src, dst in PERSIAN_REPLACEMENTS:
+        text = text.replace(src, dst)
+    return text
+
+
+def normalize_persian_series(series):
+    """
+    همان normalize_persian روی کل ستون.
+    تعداد مقادیر یکتا (صنعت‌ها) کم است، پس فقط مقادیر یکتا نرمال و بعد روی ستون پخش می‌شوند.
+    """
+    import pandas as pd
+
+    codes, uniques = pd.factorize(series, sort=False, use_na_sentinel=False)
+    normalized = pd.Index([normalize_persian(u) for u in uniques], dtype=object)
+    return pd.Series(normalized.take(codes), index=series.index, name=series.name)
+
+
+def numeric_column(df, column: str, dtype=float):
+    """
+    ستون عددی تمیز به‌صورت ndarray: Decimal/None/NaN/Inf → 0.
+    اگر ستون نباشد، آرایهٔ صفر (مثل row.get(...) or 0).
+    """
+    import numpy as np
+    import pandas as pd
+
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=dtype)
+    try:
+        # Decimal/None/int مستقیم (سریع‌تر از to_numeric روی ستون object)
+        values = df[column].to_numpy(dtype=float, na_value=np.nan, copy=True)
+    except (TypeError, ValueError):
+        values = pd.to_numeric(df[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan, copy=True)
+    values[~np.isfinite(values)] = 0.0
+    return values.astype(dtype) if dtype is not float else values
+
+
+def size_values(df, size_mode: str):
+    """مقدار سایز نود بر اساس size_mode (equal → 1)، اسکیل‌شده و رند به ۳ رقم"""
+    import numpy as np
+
+    if size_mode == "equal":
+        return np.ones(len(df), dtype=float)
+    size = numeric_column(df, size_mode)
+    if size_mode in SCALED_SIZE_MODES:
+        size = size / SIZE_SCALE
+    return np.round(size, 3)
+
+
+def build_treemap(
+    df,
+    group_col: str,
+    name_col: str,
+    fields: Mapping[str, Any],
+    totals: Sequence[str] = (),
+    sort_by: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    [{"name": group, ("<total>": جمع,)* "children": [{"name": ..., **fields}, ...]}, ...]
+
+    - fields: نام فیلد برگ → آرایهٔ هم‌طول df (آرایهٔ دوبعدی → لیست برای هر برگ)
+    - totals: فیلدهایی از fields که برای هر گروه جمع زده می‌شوند
+    - sort_by: مرتب‌سازی نزولی گروه‌ها بر اساس یکی از totals؛ وگرنه ترتیب اولین ظهور
+    """
+    import numpy as np
+    import pandas as pd
+
+    if df.empty:
+        return []
+
+    codes, groups = pd.factorize(df[group_col], sort=False, use_na_sentinel=False)
+    names = df[name_col].tolist()
+    keys = list(fields)
+    columns = [np.asarray(fields[k]).tolist() for k in keys]
+
+    leaf_keys = ("name", *keys)
+    leaves = [dict(zip(leaf_keys, values)) for values in zip(names, *columns)]
+
+    buckets: List[List[Dict[str, Any]]] = [[] for _ in range(len(groups))]
+    for code, leaf in zip(codes.tolist(), leaves):
+        buckets[code].append(leaf)
+
+    sums = {}
+    for k in totals:
+        arr = np.asarray(fields[k])
+        out = np.zeros(len(groups), dtype=arr.dtype)
+        np.add.at(out, codes, arr)
+        sums[k] = out.tolist()
+
+    tree = []
+    for i, group in enumerate(groups.tolist()):
+        node = {"name": group}
+        for k in totals:
+            node[k] = sums[k][i]
+        node["children"] = buckets[i]
+        tree.append(node)
+
+    if sort_by is not None:
+        tree.sort(key=lambda node: node[sort_by], reverse=True)
+    return tree
+
+
+def build_sankey(
+    df,
+    name_col: str,
+    flow_col: str,
+    hub: str = "Other",
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    جریان خالص هر ردیف → لینک با hub (ستاره‌ای):
+        flow > 0 → hub → name ، flow < 0 → name → hub ، flow == 0 → بدون لینک (بدون self-loop)
+    خروجی (nodes, links)؛ hub اولین نود است و همهٔ نام‌ها (حتی با جریان صفر) نود دارند.
+    """
+    import numpy as np
+    import pandas as pd
+
+    flow = numeric_column(df, flow_col)
+    names = df[name_col].to_numpy(dtype=object)
+
+    mask = flow != 0
+    positive = flow[mask] > 0
+    linked = names[mask]
+    sources = np.where(positive, hub, linked).tolist()
+    targets = np.where(positive, linked, hub).tolist()
+    values = np.abs(flow[mask]).tolist()
+
+    links = [
+        {"source": s, "target": t, "value": v}
+        for s, t, v in zip(sources, targets, values)
+    ]
+    node_names = pd.unique(np.concatenate([np.array([hub], dtype=object), names]))
+    nodes = [{"name": n} for n in node_names.tolist()]
+    return nodes, links
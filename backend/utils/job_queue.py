@@ -0,0 +1,79 @@
+# backend/utils/job_queue.py
+# -*- coding: utf-8 -*-
+"""
+صف کارهای پس‌زمینه روی جدول job_queue (سمت API).
+
+API فقط کار را ثبت می‌کند و job_id برمی‌گرداند؛ اجرای واقعی در پروسهٔ جدا انجام می‌شود:
+    python -m cron_jobs.job_worker --workers 2
+"""
+
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+_ACTIVE_JOB_SQL = text("""
+    SELECT id, status
+    FROM job_queue
+    WHERE kind = :kind AND dedupe_key = :dedupe_key AND status IN ('queued', 'running')
+    ORDER BY id DESC
+    LIMIT 1
+""")
+
+_INSERT_JOB_SQL = text("""
+    INSERT INTO job_queue (kind, dedupe_key, payload, status, progress)
+    VALUES (:kind, :dedupe_key, CAST(:payload AS jsonb), 'queued', 'در صف')
+    ON CONFLICT (kind, dedupe_key) WHERE status IN ('queued', 'running') DO NOTHING
+    RETURNING id
+""")
+
+_GET_JOB_SQL = text("""
+    SELECT id, kind, status, progress, payload, result, error, attempts,
+           created_at, started_at, heartbeat_at, finished_at,
+           EXTRACT(EPOCH FROM (COALESCE(finished_at, now()::timestamp) - started_at)) AS duration_seconds
+    FROM job_queue
+    WHERE id = :job_id
+""")
+
+
+async def enqueue_job(
+    db: AsyncSession,
+    kind: str,
+    payload: Dict[str, Any],
+    dedupe_key: Optional[str] = None,
+) -> Tuple[int, bool]:
+    """
+    کار را ثبت می‌کند و (job_id, created) برمی‌گرداند.
+    اگر کار فعالی با همان dedupe_key در صف/در حال اجرا باشد، همان را برمی‌گرداند (created=False).
+    """
+    job_id = (await db.execute(_INSERT_JOB_SQL, {
+        "kind": kind,
+        "dedupe_key": dedupe_key,
+        "payload": json.dumps(payload, ensure_ascii=False),
+    })).scalar_one_or_none()
+    await db.commit()
+    if job_id is not None:
+        return int(job_id), True
+
+    # ایندکس یکتای جزئی اجازهٔ کار فعال تکراری نداد → همان کار فعال
+    existing = (await db.execute(_ACTIVE_JOB_SQL, {"kind": kind, "dedupe_key": dedupe_key})).first()
+    if existing is None:
+        # کار فعال بین دو کوئری تمام شد → دوباره ثبت
+        return await enqueue_job(db, kind, payload, dedupe_key)
+    return int(existing.id), False
+
+
+async def get_job(db: AsyncSession, job_id: int) -> Optional[Dict[str, Any]]:
+    row = (await db.execute(_GET_JOB_SQL, {"job_id": job_id})).mappings().first()
+    if row is None:
+        return None
+    job = dict(row)
+    if job["duration_seconds"] is not None:
+        job["duration_seconds"] = round(float(job["duration_seconds"]), 3)
+    return job
@@ -0,0 +1,231 @@
+# backend/utils/live_push.py
+# -*- coding: utf-8 -*-
+"""
+کانال push برای داشبوردهای لحظه‌ای (به‌جای polling کلاینت‌ها).
+
+- هر topic (مثلاً market، sector:<نام>، bumpchart:sector) یک producer دارد که payload را می‌سازد.
+- جاب‌های لایو بعد از هر بروزرسانی data_version را bump می‌کنند؛ تریگر روی data_version
+  روی کانال LISTEN/NOTIFY «data_version» اعلان می‌فرستد.
+- hub با یک کانکشن LISTEN (asyncpg) اعلان را می‌گیرد، payload هر topic فعال را فقط یکبار
+  می‌سازد و برای همهٔ مشترک‌ها پخش می‌کند. اگر LISTEN ممکن نباشد، data_version را poll می‌کند.
+- صف هر مشترک فقط آخرین payload هر topic را نگه می‌دارد (کلاینت کند، بقیه را کند نمی‌کند).
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.connection import WRITE, get_engine, read_session
+from backend.utils.logger import logger
+from backend.utils.response_cache import SOURCE_LIVE, data_versions
+
+NOTIFY_CHANNEL = "data_version"
+
+# چند bump پشت‌سرهم (saver، orderbook، refresh MV) فقط یک بار محاسبه شوند
+LIVE_PUSH_DEBOUNCE_SECONDS = float(os.getenv("LIVE_PUSH_DEBOUNCE_SECONDS", "2"))
+# فاصلهٔ poll وقتی LISTEN در دسترس نیست (درایور غیر asyncpg یا قطع اتصال)
+LIVE_PUSH_POLL_SECONDS = float(os.getenv("LIVE_PUSH_POLL_SECONDS", "10"))
+
+Producer = Callable[[AsyncSession, Optional[str]], Awaitable[bytes]]
+
+
+@dataclass(frozen=True)
+class TopicSpec:
+    producer: Producer
+    permissions: Tuple[str, ...]
+    sources: Tuple[str, ...] = (SOURCE_LIVE,)
+    needs_arg: bool = False
+    # اعتبارسنجی arg در زمان subscribe (UnknownTopic برای مقدار نامعتبر)
+    validate: Optional[Callable[[Optional[str]], object]] = None
+
+
+class UnknownTopic(ValueError):
+    pass
+
+
+class LivePushHub:
+    def __init__(self):
+        self._specs: Dict[str, TopicSpec] = {}
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._latest: Dict[str, bytes] = {}
+        self._lock = asyncio.Lock()
+        self._listener: Optional[asyncio.Task] = None
+        self._pending: Optional[asyncio.TimerHandle] = None
+        self._pending_sources: Set[str] = set()
+
+    # ---------- topics ----------
+
+    def register(self, kind: str, spec: TopicSpec):
+        self._specs[kind] = spec
+
+    def resolve(self, topic: str) -> Tuple[TopicSpec, Optional[str]]:
+        """«kind» یا «kind:arg» → (spec, arg)"""
+        kind, _, arg = topic.partition(":")
+        spec = self._specs.get(kind)
+        if spec is None:
+            raise UnknownTopic(f"topic ناشناخته: {kind}")
+        arg = arg.strip() or None
+        if spec.needs_arg and arg is None:
+            raise UnknownTopic(f"topic «{kind}» پارامتر لازم دارد ({kind}:...)")
+        if spec.validate is not None:
+            spec.validate(arg)
+        return spec, arg
+
+    def allowed(self, topic: str, permissions: Iterable[str]) -> bool:
+        spec, _ = self.resolve(topic)
+        return any(p in permissions for p in spec.permissions)
+
+    # ---------- subscribe ----------
+
+    @asynccontextmanager
+    async def subscribe(self, topics: List[str]) -> AsyncIterator[asyncio.Queue]:
+        """صفی از (topic, body)؛ آخرین payload موجود هر topic بلافاصله در صف قرار می‌گیرد."""
+        queue: asyncio.Queue = asyncio.Queue()
+        for topic in topics:
+            self.resolve(topic)
+            self._subscribers.setdefault(topic, set()).add(queue)
+        self._ensure_listener()
+        try:
+            missing = [t for t in topics if t not in self._latest]
+            if missing:
+                await self._refresh(missing)
+            for topic in topics:
+                if topic in self._latest:
+                    _offer(queue, topic, self._latest[topic])
+            yield queue
+        finally:
+            for topic in topics:
+                subs = self._subscribers.get(topic)
+                if subs is not None:
+                    subs.discard(queue)
+                    if not subs:
+                        del self._subscribers[topic]
+                        self._latest.pop(topic, None)
+            if not self._subscribers:
+                self._stop_listener()
+
+    # ---------- refresh / fan-out ----------
+
+    async def _refresh(self, topics: Iterable[str]):
+        """payload هر topic یکبار ساخته و برای همهٔ مشترک‌هایش فرستاده می‌شود."""
+        async with self._lock:
+            async with read_session() as db:
+                for topic in topics:
+                    subs = self._subscribers.get(topic)
+                    if not subs:
+                        continue
+                    spec, arg = self.resolve(topic)
+                    try:
+                        body = await spec.producer(db, arg)
+                    except Exception:
+                        logger.exception(f"❌ live push: ساخت payload برای {topic} ناموفق بود")
+                        await db.rollback()
+                        continue
+                    self._latest[topic] = body
+                    for queue in list(subs):
+                        _offer(queue, topic, body)
+
+    def notify(self, source: str):
+        """اعلان bump یک منبع داده؛ با debounce کوتاه یک refresh زمان‌بندی می‌شود."""
+        self._pending_sources.add(source)
+        if self._pending is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._pending = loop.call_later(LIVE_PUSH_DEBOUNCE_SECONDS, self._flush)
+
+    def _flush(self):
+        sources, self._pending_sources = self._pending_sources, set()
+        self._pending = None
+        # نسخهٔ جدید فوراً خوانده شود تا کش پاسخ روت‌ها هم با همین refresh پر شود
+        data_versions.invalidate()
+        topics = [
+            t for t in self._subscribers
+            if set(self.resolve(t)[0].sources) & sources
+        ]
+        if topics:
+            asyncio.ensure_future(self._refresh(topics))
+
+    # ---------- LISTEN / poll ----------
+
+    def _ensure_listener(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.ensure_future(self._listen_forever())
+
+    def _stop_listener(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        self._pending_sources.clear()
+
+    async def _listen_forever(self):
+        engine = get_engine(WRITE)  # NOTIFY روی replica نمی‌رسد
+        while True:
+            try:
+                if engine.dialect.driver == "asyncpg":
+                    await self._listen(engine)
+                else:
+                    await self._poll(engine)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ live push: اتصال LISTEN قطع شد، تلاش دوباره: {e}")
+                await asyncio.sleep(LIVE_PUSH_POLL_SECONDS)
+
+    async def _listen(self, engine):
+        async with engine.connect() as conn:
+            raw = (await conn.get_raw_connection()).driver_connection
+            closed = asyncio.get_running_loop().create_future()
+
+            def on_notify(_conn, _pid, _channel, payload):
+                self.notify(payload or SOURCE_LIVE)
+
+            def on_close(_conn):
+                if not closed.done():
+                    closed.set_result(None)
+
+            await raw.add_listener(NOTIFY_CHANNEL, on_notify)
+            raw.add_termination_listener(on_close)
+            logger.info(f"📡 live push: LISTEN {NOTIFY_CHANNEL}")
+            try:
+                await closed
+                raise ConnectionError("LISTEN connection closed")
+            finally:
+                if not raw.is_closed():
+                    await raw.remove_listener(NOTIFY_CHANNEL, on_notify)
+
+    async def _poll(self, engine):
+        versions: Dict[str, int] = {}
+        while True:
+            async with engine.connect() as conn:
+                rows = (await conn.execute(text("SELECT source, version FROM data_version"))).all()
+            current = {r[0]: int(r[1]) for r in rows}
+            for source, version in current.items():
+                if versions and versions.get(source) != version:
+                    self.notify(source)
+            versions = current
+            await asyncio.sleep(LIVE_PUSH_POLL_SECONDS)
+
+
+def _offer(queue: asyncio.Queue, topic: str, body: bytes):
+    """فقط آخرین payload هر topic در صف می‌ماند."""
+    if queue.qsize():
+        kept = [item for item in _drain(queue) if item[0] != topic]
+        for item in kept:
+            queue.put_nowait(item)
+    queue.put_nowait((topic, body))
+
+
+def _drain(queue: asyncio.Queue):
+    while not queue.empty():
+        yield queue.get_nowait()
+
+
+live_hub = LivePushHub()
@@ -0,0 +1,97 @@
+"""
+گزارش زمان import ماژول‌ها هنگام بالا آمدن API (بر اساس python -X importtime).
+
+در یک پروسهٔ جدا backend.main را import می‌کند و برای هر ماژول زمان تجمعی
+(خودش + وابستگی‌هایش) را گزارش می‌دهد؛ به‌علاوهٔ جمع به تفکیک پکیج سطح‌بالا
+و بررسی اینکه کتابخانه‌های سنگین (pandas, finpy_tse, talib, psycopg2, ...) لود نشده باشند.
+
+اجرا:
+    python -m backend.utils.profile_imports
+    python -m backend.utils.profile_imports --top 40 --target backend.main
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# این‌ها نباید در زمان بالا آمدن API import شوند (فقط داخل هندلرها)
+HEAVY_MODULES = ("pandas", "numpy", "finpy_tse", "jdatetime", "talib", "psycopg2", "pyarrow")
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def profile(target: str):
+    code = (
+        "import sys, time\n"
+        "t = time.perf_counter()\n"
+        f"import {target}\n"
+        "sys.stdout.write('WALL %f\\n' % (time.perf_counter() - t))\n"
+        f"sys.stdout.write('HEAVY %s\\n' % ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    process_time = time.perf_counter() - start
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr[-4000:])
+        raise SystemExit(f"❌ import {target} ناموفق بود")
+
+    modules = []  # (cumulative_us, self_us, depth, name)
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            self_us, cumulative_us, indent, name = m.groups()
+            modules.append((int(cumulative_us), int(self_us), len(indent) // 2, name))
+
+    wall = heavy = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("WALL "):
+            wall = float(line.split()[1])
+        elif line.startswith("HEAVY"):
+            heavy = [m for m in line[6:].strip().split(",") if m]
+    return modules, wall, heavy, process_time
+
+
+def main(target: str, top: int):
+    modules, wall, heavy, process_time = profile(target)
+
+    by_package = defaultdict(int)
+    for _, self_us, _, name in modules:
+        by_package[name.split(".")[0]] += self_us
+
+    print(f"import {target}: {wall:.3f}s  (کل پروسه: {process_time:.3f}s, {len(modules)} ماژول)")
+    print()
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for cumulative_us, self_us, depth, name in sorted(modules, reverse=True)[:top]:
+        print(f"{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {'  ' * min(depth, 6)}{name}")
+
+    print()
+    print(f"{'self ms':>10}  package")
+    for name, self_us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"{self_us / 1000:>10.1f}  {name}")
+
+    print()
+    if heavy:
+        print(f"⚠️ ماژول‌های سنگین در زمان بالا آمدن لود شدند: {', '.join(heavy)}")
+    else:
+        print("✅ هیچ‌کدام از ماژول‌های سنگین در زمان بالا آمدن لود نشدند")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="backend.main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+    main(args.target, args.top)
@@ -1,7 +1,67 @@
+import sys
+from decimal import Decimal
+from typing import Any
+
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from fastapi import status as http_status
 
+try:
+    import orjson
+except ImportError:  # orjson اختیاری است؛ بدون آن مسیر قبلی (jsonable_encoder) استفاده می‌شود
+    orjson = None
+
+
+def _default(obj: Any):
+    """
+    فقط برای نوع‌هایی صدا زده می‌شود که orjson مستقیم نمی‌شناسد.
+    (dict/list/str/int/float/datetime/date/UUID/Enum و آرایه‌های NumPy مستقیم در C سریالایز می‌شوند
+     و NaN/Inf به null تبدیل می‌شود)
+    """
+    if isinstance(obj, Decimal):
+        return float(obj) if obj.is_finite() else None
+    # numpy/pandas اینجا import نمی‌شوند: اگر هنوز لود نشده‌اند، obj هم از نوع آن‌ها نیست
+    pd = sys.modules.get("pandas")
+    np = sys.modules.get("numpy")
+    if pd is not None:
+        if isinstance(obj, pd.DataFrame):
+            return obj.to_dict(orient="records")
+        if isinstance(obj, pd.Series):
+            return obj.to_list()
+        if obj is pd.NaT or obj is pd.NA:
+            return None
+    if np is not None:
+        if isinstance(obj, np.ndarray):
+            return obj.tolist()
+        if isinstance(obj, np.generic):
+            return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    # Row های SQLAlchemy، مدل‌های pydantic و هر چیز دیگر
+    if hasattr(obj, "_mapping"):
+        return tuple(obj)
+    return jsonable_encoder(obj)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def dumps(content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+else:
+    import json
+
+    def dumps(content: Any) -> bytes:
+        return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse که محتوا را یکبار و مستقیم (orjson) به بایت تبدیل می‌کند."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
 def create_response(
     status: str = "success",           # success | error | fail
     message: str = "",
@@ -11,12 +71,12 @@ def create_response(
     if data is None:
         data = {}
 
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status_code,
-        content=jsonable_encoder({
+        content={
             "status": status,
             "status_code": status_code,
             "message": message,
             "data": data
-        })
+        }
     )
@@ -0,0 +1,345 @@
+# backend/utils/response_cache.py
+# -*- coding: utf-8 -*-
+"""
+کش پاسخ برای روت‌های گزارشیِ فقط‌خواندنی.
+
+کلید کش: (route, پارامترهای نرمال‌شده، نسخهٔ داده)
+نسخهٔ داده از جدول data_version خوانده می‌شود که جاب‌های cron بعد از هر
+بروزرسانی آن را bump می‌کنند (live: جاب‌های زنده، daily: جاب‌های شبانه).
+بین دو refresh، هر درخواست فقط یک lookup روی دیکشنری است.
+
+conditional_report همین نسخه‌ها (به‌علاوهٔ یک validator ارزان اختیاری) را به ETag/Last-Modified
+تبدیل می‌کند و اگر کلاینت نسخهٔ فعلی را دارد، بدون اجرای کوئری اصلی 304 برمی‌گرداند.
+"""
+
+import os
+import time
+import hashlib
+import functools
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.utils.logger import logger
+from backend.utils.response import FastJSONResponse
+
+# منابع داده‌ای که جاب‌ها bump می‌کنند
+SOURCE_LIVE = "live"
+SOURCE_DAILY = "daily"
+# symboldetail (ایندکس جست‌وجوی نمادها؛ backend/utils/symbol_search.py)
+SOURCE_SYMBOLS = "symbols"
+# تاریخچهٔ نهایی daily_stock_data (ایندکس‌های درون‌حافظه‌ای روی کل تاریخچه؛ مثل backend/utils/ceiling_index.py)؛
+# فقط شبانه و بعد از افزایش سرمایه bump می‌شود، نه با هر sync ردیف موقت امروز
+SOURCE_DAILY_HISTORY = "daily_history"
+
+# هر چند ثانیه یکبار جدول data_version دوباره خوانده شود
+DATA_VERSION_TTL_SECONDS = float(os.getenv("DATA_VERSION_TTL_SECONDS", "5"))
+# حداکثر تعداد پاسخ‌های نگه‌داری‌شده (LRU)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+# امکان خاموش‌کردن کامل کش از env
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+
+class DataVersionReader:
+    """خواندن نسخهٔ داده‌ها از data_version با TTL کوتاه (یک کوئری PK روی جدول چندسطری)."""
+
+    def __init__(self, ttl_seconds: float = DATA_VERSION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._versions: Dict[str, int] = {}
+        self._updated_at: Dict[str, datetime] = {}
+        self._loaded_at: float = 0.0
+
+    def invalidate(self):
+        self._loaded_at = 0.0
+
+    async def current(self, db: AsyncSession, sources: Iterable[str]) -> Optional[Tuple[int, ...]]:
+        now = time.monotonic()
+        if now - self._loaded_at > self.ttl_seconds:
+            try:
+                res = await db.execute(text(
+                    "SELECT source, version, EXTRACT(EPOCH FROM updated_at::timestamptz) FROM data_version"
+                ))
+                rows = res.fetchall()
+                self._versions = {r[0]: int(r[1]) for r in rows}
+                self._updated_at = {
+                    r[0]: datetime.fromtimestamp(int(r[2]), tz=timezone.utc) for r in rows if r[2] is not None
+                }
+                self._loaded_at = now
+            except Exception as e:
+                # اگر جدول هنوز migrate نشده، کش را دور می‌زنیم
+                logger.warning(f"⚠️ data_version قابل خواندن نیست؛ کش پاسخ غیرفعال شد: {e}")
+                await db.rollback()
+                return None
+        return tuple(self._versions.get(s, 0) for s in sources)
+
+    def last_modified(self, sources: Iterable[str]) -> Optional[datetime]:
+        """آخرین زمان bump بین منابع (بعد از current معتبر است)."""
+        stamps = [self._updated_at[s] for s in sources if s in self._updated_at]
+        return max(stamps) if stamps else None
+
+
+def _normalize_value(v: Any) -> Any:
+    if isinstance(v, Enum):
+        return v.value
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if isinstance(v, (list, tuple, set)):
+        return tuple(_normalize_value(x) for x in v)
+    if isinstance(v, str):
+        return v.strip()
+    return v
+
+
+def normalize_params(params: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    """پارامترها را به یک tuple مرتب و hashable تبدیل می‌کند."""
+    return tuple(sorted((k, _normalize_value(v)) for k, v in params.items()))
+
+
+def _key_params(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """پارامترهای کوئری روت؛ db، request و وابستگی‌های با پیشوند _ حذف می‌شوند."""
+    return {
+        k: v for k, v in kwargs.items()
+        if k not in ("db", "request") and not k.startswith("_") and not isinstance(v, Request)
+    }
+
+
+def _request_variant(kwargs: Dict[str, Any]) -> Optional[str]:
+    """هدر Accept هم در کلید لحاظ می‌شود (روت‌هایی که فرمت خروجی را از Accept انتخاب می‌کنند)."""
+    request = kwargs.get("request")
+    if isinstance(request, Request):
+        return request.headers.get("accept", "")
+    return None
+
+
+class ResponseCache:
+    """LRU ساده روی بایت‌های JSON رندرشده (و مقدارهای میانی cached_value)."""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._store: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        entry = self._store.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._store.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Tuple, status_code: int, body: bytes, media_type: str):
+        self.put_entry(key, (status_code, body, media_type))
+
+    def put_entry(self, key: Tuple, entry: Any):
+        self._store[key] = entry
+        self._store.move_to_end(key)
+        while len(self._store) > self.max_entries:
+            self._store.popitem(last=False)
+
+    def clear(self):
+        self._store.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._store), "hits": self.hits, "misses": self.misses}
+
+
+data_versions = DataVersionReader()
+report_cache = ResponseCache()
+
+
+def cached_report(route: str, sources: Iterable[str] = (SOURCE_LIVE, SOURCE_DAILY)):
+    """
+    دکوراتور برای روت‌های گزارشی.
+    - پارامتر db (AsyncSession) باید در امضای روت باشد.
+    - وابستگی‌ها (db، request و پارامترهای با پیشوند _ مثل پرمیشن) در کلید لحاظ نمی‌شوند؛
+      پرمیشن‌ها همچنان قبل از اجرای روت توسط FastAPI چک می‌شوند.
+    - فقط پاسخ‌های 200 کش می‌شوند.
+    """
+    sources = tuple(sources)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            db: Optional[AsyncSession] = kwargs.get("db")
+            if not RESPONSE_CACHE_ENABLED or db is None:
+                return await func(*args, **kwargs)
+
+            version = await data_versions.current(db, sources)
+            if version is None:
+                return await func(*args, **kwargs)
+
+            key = (route, normalize_params(_key_params(kwargs)), _request_variant(kwargs), version)
+
+            hit = report_cache.get(key)
+            if hit is not None:
+                status_code, body, media_type = hit
+                return Response(
+                    content=body,
+                    status_code=status_code,
+                    media_type=media_type,
+                    headers={"X-Cache": "HIT"},
+                )
+
+            result = await func(*args, **kwargs)
+            response = result if isinstance(result, Response) else FastJSONResponse(content=result)
+
+            if response.status_code == 200 and getattr(response, "body", None) is not None:
+                report_cache.put(key, response.status_code, response.body, response.media_type or "application/json")
+                response.headers["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+async def cached_payload(
+    db: AsyncSession,
+    route: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Awaitable[Any]],
+    sources: Iterable[str] = (SOURCE_LIVE, SOURCE_DAILY),
+) -> Response:
+    """
+    کش بخشی از یک روت با کلید صریح (به‌جای همهٔ پارامترهای روت).
+    برای وقتی که چند ترکیب پارامتر به یک نتیجه می‌رسند؛ مثلاً from/to متفاوت با بازهٔ مؤثر یکسان.
+    """
+    sources = tuple(sources)
+    version = await data_versions.current(db, sources) if RESPONSE_CACHE_ENABLED else None
+    if version is None:
+        return FastJSONResponse(content=await compute())
+
+    key = (route, normalize_params(params), None, version)
+    hit = report_cache.get(key)
+    if hit is not None:
+        status_code, body, media_type = hit
+        return Response(content=body, status_code=status_code, media_type=media_type, headers={"X-Cache": "HIT"})
+
+    response = FastJSONResponse(content=await compute())
+    report_cache.put(key, response.status_code, response.body, response.media_type or "application/json")
+    response.headers["X-Cache"] = "MISS"
+    return response
+
+
+async def cached_value(
+    db: AsyncSession,
+    route: str,
+    params: Dict[str, Any],
+    compute: Callable[[], Awaitable[Any]],
+    sources: Iterable[str] = (SOURCE_LIVE, SOURCE_DAILY),
+) -> Any:
+    """
+    مثل cached_payload ولی برای یک مقدار میانی پایتونی (نه پاسخ رندرشده)، در همان LRU و با همان نسخه‌ها؛
+    مثلاً پنجرهٔ هفته‌های مؤثر که چند روت/کلید payload از آن استفاده می‌کنند. مقدار برگشتی نباید تغییر داده شود.
+    """
+    sources = tuple(sources)
+    version = await data_versions.current(db, sources) if RESPONSE_CACHE_ENABLED else None
+    if version is None:
+        return await compute()
+
+    key = (route, normalize_params(params), "value", version)
+    hit = report_cache.get(key)
+    if hit is not None:
+        return hit
+
+    value = await compute()
+    report_cache.put_entry(key, value)
+    return value
+
+
+# ---------- Conditional GET (ETag / Last-Modified) ----------
+
+Validator = Callable[[AsyncSession, Dict[str, Any]], Awaitable[Any]]
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def _not_modified_since(if_modified_since: str, last_modified: Optional[datetime]) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_report(
+    route: str,
+    sources: Iterable[str] = (SOURCE_LIVE, SOURCE_DAILY),
+    validator: Optional[Validator] = None,
+):
+    """
+    دکوراتور Conditional GET برای روت‌های گزارشی (بالاتر از cached_report قرار می‌گیرد).
+    - روت باید پارامترهای request: Request و db داشته باشد.
+    - ETag از (route، پارامترها، نسخهٔ منابع، خروجی validator) ساخته می‌شود؛
+      validator یک کوئری ارزان اختیاری است، مثلاً MAX(date) برای یک نماد.
+    - Last-Modified همان updated_at جدول data_version است.
+    - اگر If-None-Match (یا در نبودش If-Modified-Since) با نسخهٔ فعلی بخواند → 304 بدون اجرای روت.
+    """
+    sources = tuple(sources)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Optional[Request] = kwargs.get("request")
+            db: Optional[AsyncSession] = kwargs.get("db")
+            if request is None or db is None:
+                return await func(*args, **kwargs)
+
+            version = await data_versions.current(db, sources)
+            if version is None:
+                return await func(*args, **kwargs)
+
+            params = _key_params(kwargs)
+            extra = await validator(db, params) if validator is not None else None
+            digest = hashlib.sha1(
+                repr((
+                    route, normalize_params(params), _request_variant(kwargs), version, _normalize_value(extra)
+                )).encode("utf-8")
+            ).hexdigest()
+            etag = f'"{digest[:32]}"'
+            last_modified = data_versions.last_modified(sources)
+
+            headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept"}
+            if last_modified is not None:
+                headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+            if_none_match = request.headers.get("if-none-match")
+            if_modified_since = request.headers.get("if-modified-since")
+            if (if_none_match and _etag_matches(if_none_match, etag)) or (
+                not if_none_match and if_modified_since and _not_modified_since(if_modified_since, last_modified)
+            ):
+                return Response(status_code=304, headers=headers)
+
+            result = await func(*args, **kwargs)
+            response = result if isinstance(result, Response) else FastJSONResponse(content=result)
+            if response.status_code == 200:
+                response.headers.update(headers)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,99 @@
+# backend/utils/response_formats.py
+# -*- coding: utf-8 -*-
+"""
+فرمت‌های خروجی ستونی برای روت‌های سری‌زمانی.
+
+- json     : همان خروجی سطری فعلی (پیش‌فرض)
+- columnar : همان پاکت create_response، ولی data = {"columns": [...], "length": n, "data": {col: [...]}}
+- arrow    : Arrow IPC stream (نیازمند pyarrow؛ وابستگی اختیاری)
+
+انتخاب فرمت: پارامتر format در کوئری، و در نبودش هدر Accept
+(application/vnd.apache.arrow.stream یا application/vnd.finlayze.columnar+json).
+"""
+
+import io
+import sys
+from enum import Enum
+from typing import Any, Dict, Optional, Sequence
+
+from fastapi import HTTPException, Request, status as http_status
+from fastapi.responses import Response
+
+from backend.utils.response import create_response
+
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNAR_MEDIA_TYPE = "application/vnd.finlayze.columnar+json"
+
+
+class ResponseFormat(str, Enum):
+    json = "json"
+    columnar = "columnar"
+    arrow = "arrow"
+
+
+def resolve_format(request: Optional[Request], fmt: Optional[ResponseFormat]) -> ResponseFormat:
+    """پارامتر format اولویت دارد؛ در غیر این صورت از Accept خوانده می‌شود."""
+    if fmt is not None:
+        return fmt
+    accept = request.headers.get("accept", "") if request is not None else ""
+    if ARROW_MEDIA_TYPE in accept:
+        return ResponseFormat.arrow
+    if COLUMNAR_MEDIA_TYPE in accept:
+        return ResponseFormat.columnar
+    return ResponseFormat.json
+
+
+def _to_columns(columns: Sequence[str], rows: Any) -> Dict[str, Any]:
+    """سطرها (tuple/Row یا DataFrame) → دیکشنری ستون → آرایه"""
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(rows, pd.DataFrame):
+        return {c: rows[c].to_numpy() for c in columns}
+    if not rows:
+        return {c: [] for c in columns}
+    return {c: list(values) for c, values in zip(columns, zip(*rows))}
+
+
+def _arrow_bytes(data: Dict[str, Any]) -> bytes:
+    # pyarrow اختیاری و سنگین است؛ فقط برای format=arrow و همان لحظه import می‌شود
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc as pa_ipc
+    except ImportError:
+        raise HTTPException(
+            status_code=http_status.HTTP_406_NOT_ACCEPTABLE,
+            detail="format=arrow نیازمند نصب pyarrow روی سرور است",
+        )
+    table = pa.Table.from_pydict({c: pa.array(v, from_pandas=True) for c, v in data.items()})
+    sink = io.BytesIO()
+    with pa_ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def columnar_response(
+    fmt: ResponseFormat,
+    columns: Sequence[str],
+    rows: Any,
+    message: str = "",
+    status_code: int = http_status.HTTP_200_OK,
+):
+    """
+    خروجی columnar یا arrow برای سطرهای یک کوئری.
+    (برای format=json روت همان create_response سطری قبلی را برمی‌گرداند)
+    """
+    data = _to_columns(columns, rows)
+    if fmt == ResponseFormat.arrow:
+        return Response(
+            content=_arrow_bytes(data),
+            status_code=status_code,
+            media_type=ARROW_MEDIA_TYPE,
+        )
+
+    length = len(next(iter(data.values()))) if data else 0
+    return create_response(
+        status="success",
+        message=message,
+        data={"columns": list(columns), "length": length, "data": data},
+        status_code=status_code,
+    )
@@ -0,0 +1,148 @@
+# backend/utils/schema_catalog.py
+# -*- coding: utf-8 -*-
+"""
+کاتالوگ ستون‌های جداول و ویوها (information_schema) برای روت‌ها و جاب‌ها.
+
+- ستون‌های هر جدول فقط در اولین درخواست همان جدول خوانده و تا پایان پروسه نگه داشته می‌شوند
+  (به‌جای یک کوئری information_schema در هر درخواست)؛ جاب‌ها فقط جدول‌های خودشان را می‌خوانند.
+- بعد از migration، با schema_catalog.invalidate() بارگذاری بعدی از نو انجام می‌شود.
+- pick_first_exist همان انتخاب «اولین ستون موجود از بین کاندیداها» است (case-insensitive).
+
+    cols = await schema_catalog.columns(db, "daily_joined_data")      # روت‌ها / AsyncSession
+    cols = schema_catalog.columns_sync(engine, "weekly_haghighi")      # جاب‌ها / Engine یا Connection
+    price = cols.pick("adjust_close", "last_price", required=True)
+"""
+
+import asyncio
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# نام دقیق جدول مقدم است؛ در غیر این صورت نام lower (مثل "symbolDetail" → symboldetail)
+COLUMNS_SQL = text("""
+    SELECT table_name, column_name
+    FROM information_schema.columns
+    WHERE table_schema = :schema AND table_name IN (:table, lower(:table))
+    ORDER BY table_name = :table DESC, ordinal_position
+""")
+
+# همان انتخاب قبلی: از بین کاندیداهای موجود، اولی به ترتیب الفبایی
+FIND_TABLE_SQL = text("""
+    SELECT table_name
+    FROM information_schema.tables
+    WHERE table_schema = :schema AND table_name = ANY(:candidates)
+    ORDER BY table_name
+    LIMIT 1
+""")
+
+
+class TableColumns:
+    """ستون‌های یک جدول به ترتیب ordinal؛ عضویت و انتخاب case-insensitive است."""
+
+    def __init__(self, table: str, names: Iterable[str]):
+        self.table = table
+        self.names: List[str] = list(names)
+        self._by_lower: Dict[str, str] = {}
+        for n in self.names:
+            self._by_lower.setdefault(n.lower(), n)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and name.lower() in self._by_lower
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __bool__(self) -> bool:
+        return bool(self.names)
+
+    def actual(self, name: str) -> Optional[str]:
+        """نام واقعی ستون در دیتابیس (با همان حروف بزرگ/کوچک)."""
+        return self._by_lower.get(name.lower())
+
+    def pick(self, *candidates: str, required: bool = False) -> Optional[str]:
+        return pick_first_exist(candidates, self, required=required)
+
+
+def pick_first_exist(candidates: Iterable[str], exists, *, required: bool = False) -> Optional[str]:
+    """
+    اولین کاندیدایی که در جدول هست را برمی‌گرداند (case-insensitive).
+    روی TableColumns نام واقعی ستون برگردانده می‌شود، روی set ساده خود کاندیدا.
+    """
+    candidates = list(candidates)
+    if isinstance(exists, TableColumns):
+        for c in candidates:
+            found = exists.actual(c)
+            if found is not None:
+                return found
+    else:
+        lowered = {str(e).lower() for e in exists}
+        for c in candidates:
+            if c.lower() in lowered:
+                return c
+    if required:
+        raise KeyError(f"None of candidates exist: {candidates}")
+    return None
+
+
+class SchemaCatalog:
+    def __init__(self, schema: str = "public"):
+        self.schema = schema
+        self._tables: Dict[str, TableColumns] = {}
+        self._lock = asyncio.Lock()
+
+    # ---------- load ----------
+
+    def _build(self, table: str, rows) -> TableColumns:
+        # فقط ستون‌های اولین جدول مطابق (نام دقیق مقدم است)
+        actual = rows[0][0] if rows else table
+        cols = TableColumns(actual, [c for t, c in rows if t == actual])
+        if cols:  # جدولی که هنوز ساخته نشده کش نمی‌شود
+            self._tables[table] = cols
+        return cols
+
+    async def columns(self, db: AsyncSession, table: str) -> TableColumns:
+        cols = self._tables.get(table)
+        if cols is None:
+            async with self._lock:
+                cols = self._tables.get(table)
+                if cols is None:
+                    rows = (await db.execute(COLUMNS_SQL, {"schema": self.schema, "table": table})).all()
+                    cols = self._build(table, rows)
+        return cols
+
+    def columns_sync(self, bind, table: str) -> TableColumns:
+        """bind: Engine یا Connection همگام (جاب‌ها)."""
+        cols = self._tables.get(table)
+        if cols is None:
+            rows = self._fetch_sync(bind, COLUMNS_SQL, {"schema": self.schema, "table": table})
+            cols = self._build(table, rows)
+        return cols
+
+    @staticmethod
+    def _fetch_sync(bind, stmt, params) -> list:
+        if isinstance(bind, Engine):
+            with bind.connect() as conn:
+                return conn.execute(stmt, params).all()
+        if isinstance(bind, Connection):
+            return bind.execute(stmt, params).all()
+        raise TypeError(f"Unsupported bind for schema catalog: {type(bind)!r}")
+
+    def invalidate(self):
+        """بعد از migration (یا خطای ستون ناموجود) بارگذاری بعدی از information_schema انجام شود."""
+        self._tables = {}
+
+    # ---------- lookup ----------
+
+    def find_table(self, bind, candidates: Iterable[str]) -> Optional[str]:
+        """از بین کاندیداهای موجود، اولی به ترتیب الفبایی (با همان حروف دیتابیس)."""
+        rows = self._fetch_sync(bind, FIND_TABLE_SQL, {"schema": self.schema, "candidates": list(candidates)})
+        return rows[0][0] if rows else None
+
+
+schema_catalog = SchemaCatalog()
@@ -1,5 +1,84 @@
 # فایل: backend/utils/sql_loader.py
+# -*- coding: utf-8 -*-
+"""
+رجیستری فایل‌های SQL پوشهٔ backend/sql.
+
+- همهٔ فایل‌ها یکبار در زمان import (بالا آمدن اپ) خوانده و اعتبارسنجی می‌شوند؛
+  اگر فایلی که روت‌ها لازم دارند نباشد یا خالی باشد، اپ همان ابتدا با خطا متوقف می‌شود.
+- مسیر نسبت به همین فایل حساب می‌شود (نه CWD).
+- برای هر فایل یک TextClause ثابت ساخته می‌شود؛ چون متن SQL در هر درخواست یکی است، کش compile
+  SQLAlchemy و کش prepared statement خود asyncpg (به ازای هر کانکشن) هر دو می‌خورند و کوئری‌های
+  پرمصرف بعد از اولین اجرا روی هر کانکشن فقط bind + execute می‌شوند.
+  پشت pgbouncer در حالت transaction این کش باید خاموش باشد: DB_STATEMENT_CACHE_SIZE=0
+  (یا DB_READ_STATEMENT_CACHE_SIZE=0؛ backend/db/connection.py).
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import TextClause
+
+from backend.utils.logger import logger
+
+SQL_DIR = Path(__file__).resolve().parent.parent / "sql"
+
+# فایل‌هایی که روت‌ها به آن‌ها وابسته‌اند (نبودشان = خطا در زمان بالا آمدن)
+REQUIRED_STATEMENTS = (
+    "treemap_daily",
+    "treemap_weekly",
+    "orderbook_sector_timeseries",
+    "orderbook_intrasector_timeseries",
+    "orderbook_timeseries_sector",
+    "orderbook_timeseries_intrasector",
+)
+
+
+class SqlRegistry:
+    def __init__(self, sql_dir: Path = SQL_DIR):
+        self.sql_dir = sql_dir
+        self._sql: Dict[str, str] = {}
+        self._statements: Dict[str, TextClause] = {}
+
+    def load(self, required: Tuple[str, ...] = REQUIRED_STATEMENTS):
+        if not self.sql_dir.is_dir():
+            raise RuntimeError(f"❌ پوشهٔ SQL پیدا نشد: {self.sql_dir}")
+
+        for path in sorted(self.sql_dir.glob("*.sql")):
+            sql = path.read_text(encoding="utf-8").strip()
+            sql = re.sub(r";\s*$", "", sql)
+            if not sql:
+                raise RuntimeError(f"❌ فایل SQL خالی است: {path.name}")
+            self._sql[path.stem] = sql
+            self._statements[path.stem] = text(sql)
+
+        missing = [name for name in required if name not in self._sql]
+        if missing:
+            raise RuntimeError(f"❌ فایل‌های SQL لازم پیدا نشدند: {', '.join(missing)}")
+
+        logger.info(f"📄 SQL registry: {len(self._sql)} فایل از {self.sql_dir} بارگذاری شد")
+        return self
+
+    def get(self, name: str) -> str:
+        try:
+            return self._sql[name]
+        except KeyError:
+            raise KeyError(f"SQL '{name}' در رجیستری نیست") from None
+
+    def statement(self, name: str) -> TextClause:
+        """TextClause ثابت (یکبار ساخته می‌شود تا کش compile خود SQLAlchemy هم بخورد)"""
+        self.get(name)
+        return self._statements[name]
+
+    async def execute(self, db: AsyncSession, name: str, params: Optional[Mapping] = None):
+        """اجرای TextClause ثابت این فایل (prepared statement در کش asyncpg همان کانکشن)."""
+        return await db.execute(self.statement(name), dict(params or {}))
+
+
+sql_registry = SqlRegistry().load()
+
 
 def load_sql(name: str) -> str:
-    with open(f"backend/sql/{name}.sql", encoding="utf-8") as f:
-        return f.read()
+    return sql_registry.get(name)
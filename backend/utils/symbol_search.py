@@ -0,0 +1,292 @@
+# backend/utils/symbol_search.py
+# -*- coding: utf-8 -*-
+"""
+ایندکس جست‌وجوی درون‌حافظه‌ای نمادها و شرکت‌ها از symboldetail (برای autocomplete و فیلترها).
+
+- یکبار در هر پروسه (startup یا اولین درخواست) از symboldetail ساخته می‌شود.
+- نرمال‌سازی فارسی/عربی همان normalize_persian (ي/ك، نیم‌فاصله، کشیدگی) به‌علاوهٔ حذف اعراب،
+  ارقام فارسی/عربی → لاتین و یکی کردن فاصله‌ها.
+- تطبیق پیشوندی با bisect روی لیست مرتب کلیدها (نماد، نام، نام لاتین و هر کلمهٔ نام)
+  و تطبیق فازی با trigram (شباهت Dice روی سه‌حرفی‌ها).
+- جاب symboldetail.py بعد از upsert نسخهٔ «symbols» در data_version را bump می‌کند؛
+  با تغییر نسخه، درخواست بعدی ایندکس را از نو می‌سازد.
+
+    await symbol_index.ensure(db)
+    symbol_index.search("فولاد", limit=10)
+    symbol_index.tickers_in_sector("فلزات اساسی", instrument_type="saham")
+    symbol_index.sectors(instrument_type="saham")          # کش ابعاد (dimension) برای روت‌های metadata
+"""
+
+import asyncio
+import math
+import re
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.db.connection import read_session
+from backend.utils.hierarchy import normalize_persian
+from backend.utils.logger import logger
+from backend.utils.response_cache import SOURCE_SYMBOLS, data_versions
+
+SYMBOLS_SQL = text("""
+    SELECT "insCode", stock_ticker, name, name_en, sector, instrument_type
+    FROM symboldetail
+    WHERE stock_ticker IS NOT NULL
+""")
+
+# اعراب عربی (فتحه، کسره، تنوین، تشدید، ...) و همزهٔ بالا/پایین
+_DIACRITICS = re.compile("[\u064B-\u065F\u0670]")
+_SPACES = re.compile(r"\s+")
+_EXTRA_REPLACEMENTS = str.maketrans({
+    "ى": "ی", "ئ": "ی", "ة": "ه", "أ": "ا", "إ": "ا", "آ": "ا", "ؤ": "و",
+    **{chr(0x06F0 + i): str(i) for i in range(10)},   # ارقام فارسی
+    **{chr(0x0660 + i): str(i) for i in range(10)},   # ارقام عربی
+})
+
+# امتیاز نوع تطبیق (بیشتر = بالاتر در نتیجه)
+SCORE_TICKER_EXACT = 100.0
+SCORE_TICKER_PREFIX = 80.0
+SCORE_NAME_PREFIX = 60.0
+SCORE_WORD_PREFIX = 50.0
+SCORE_FUZZY = 40.0          # × شباهت trigram
+FUZZY_MIN_SIMILARITY = 0.35
+# سقف کلیدهای بررسی‌شده در هر سطح پیشوندی (ورودی تک‌حرفی هزاران کلید را می‌پوشاند)
+MAX_PREFIX_SCAN = 200
+
+
+def search_key(value: Optional[str]) -> str:
+    """کلید نرمال‌شدهٔ جست‌وجو (همین تابع روی ورودی کاربر و روی داده اعمال می‌شود)."""
+    if value is None:
+        return ""
+    value = normalize_persian(value)
+    value = _DIACRITICS.sub("", value).translate(_EXTRA_REPLACEMENTS)
+    return _SPACES.sub(" ", value).strip()
+
+
+def _trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@dataclass
+class SymbolEntry:
+    ins_code: Optional[str]
+    ticker: str
+    name: Optional[str]
+    name_en: Optional[str]
+    sector: Optional[str]
+    instrument_type: Optional[str]
+    ticker_key: str = ""
+    sector_key: str = ""
+    fields: Tuple[str, ...] = ()                       # کلید نماد، نام و نام لاتین (تطبیق زیررشته‌ای)
+    trigrams: Tuple[Set[str], ...] = ()                 # trigramهای نماد و نام، جدا (شباهت فازی)
+
+    def as_dict(self) -> dict:
+        return {
+            "ins_code": self.ins_code,
+            "ticker": self.ticker,
+            "name": self.name,
+            "name_en": self.name_en,
+            "sector": self.sector,
+            "instrument_type": self.instrument_type,
+        }
+
+
+class SymbolSearchIndex:
+    def __init__(self):
+        self.entries: List[SymbolEntry] = []
+        # سطح‌های پیشوندی به ترتیب امتیاز: (امتیاز، لیست مرتب (کلید، شمارهٔ ردیف)) برای bisect
+        self._prefix_tiers: List[Tuple[float, List[Tuple[str, int]]]] = []
+        self._postings: Dict[str, Set[int]] = {}
+        self._by_sector: Dict[str, List[int]] = {}
+        # کش ابعاد: نوع ابزار (None = همه) → [{"sector", "stock_ticker"}] مرتب بر اساس صنعت
+        self._sector_groups: Dict[Optional[str], List[dict]] = {}
+        self._version: Optional[Tuple[int, ...]] = None
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    # ---------- build ----------
+
+    def build(self, rows) -> None:
+        entries: List[SymbolEntry] = []
+        tickers, names, words = [], [], []
+        postings: Dict[str, Set[int]] = {}
+        by_sector: Dict[str, List[int]] = {}
+        groups: Dict[Optional[str], Dict[str, Set[str]]] = {None: {}}
+
+        for ins_code, ticker, name, name_en, sector, instrument_type in rows:
+            ticker = (ticker or "").strip()
+            if not ticker:
+                continue
+            idx = len(entries)
+            e = SymbolEntry(
+                ins_code=str(ins_code) if ins_code is not None else None,
+                ticker=ticker, name=name, name_en=name_en,
+                sector=sector, instrument_type=instrument_type,
+            )
+            e.ticker_key = search_key(ticker).replace(" ", "")
+            e.sector_key = search_key(sector)
+            name_key, name_en_key = search_key(name), search_key(name_en)
+            e.fields = tuple(k for k in (e.ticker_key, name_key, name_en_key) if k)
+            e.trigrams = (_trigrams(e.ticker_key), _trigrams(name_key))
+            entries.append(e)
+
+            tickers.append((e.ticker_key, idx))
+            for key in (name_key, name_en_key):
+                if key:
+                    names.append((key, idx))
+                    words.extend((word, idx) for word in key.split(" ")[1:])
+            for g in set().union(*e.trigrams, _trigrams(name_en_key)):
+                postings.setdefault(g, set()).add(idx)
+            if e.sector_key:
+                by_sector.setdefault(e.sector_key, []).append(idx)
+            if sector:
+                for kind in (None, instrument_type):
+                    groups.setdefault(kind, {}).setdefault(sector, set()).add(ticker)
+
+        tiers = [(SCORE_TICKER_PREFIX, sorted(tickers)), (SCORE_NAME_PREFIX, sorted(names)), (SCORE_WORD_PREFIX, sorted(words))]
+        sector_groups = {
+            kind: [{"sector": sec, "stock_ticker": sorted(ts)} for sec, ts in sorted(g.items())]
+            for kind, g in groups.items()
+        }
+        self.entries, self._prefix_tiers, self._postings, self._by_sector = entries, tiers, postings, by_sector
+        self._sector_groups = sector_groups
+        self._loaded = True
+        logger.info(f"🔎 symbol search index built: {len(entries)} symbols, {len(postings)} trigrams")
+
+    async def ensure(self, db: AsyncSession) -> "SymbolSearchIndex":
+        """اگر ایندکس ساخته نشده یا نسخهٔ symbols عوض شده، از symboldetail بازسازی می‌شود."""
+        version = await data_versions.current(db, (SOURCE_SYMBOLS,))
+        if self._loaded and (version is None or version == self._version):
+            return self
+        async with self._lock:
+            if not self._loaded or (version is not None and version != self._version):
+                rows = (await db.execute(SYMBOLS_SQL)).all()
+                self.build(rows)
+                self._version = version
+        return self
+
+    async def warm(self):
+        """ساخت ایندکس هنگام بالا آمدن API؛ خطا فقط لاگ می‌شود (اولین درخواست دوباره تلاش می‌کند)."""
+        try:
+            async with read_session() as session:
+                await self.ensure(session)
+        except Exception as e:
+            logger.warning(f"⚠️ ساخت ایندکس جست‌وجوی نمادها در startup ناموفق بود: {e}")
+
+    # ---------- lookup ----------
+
+    def _prefix_matches(self, key: str, scores: Dict[int, float], allow, limit: int) -> None:
+        for tier_score, keys in self._prefix_tiers:
+            i = bisect_left(keys, (key,))
+            end = min(len(keys), i + MAX_PREFIX_SCAN)
+            while i < end and keys[i][0].startswith(key):
+                k, idx = keys[i]
+                if allow(idx):
+                    score = SCORE_TICKER_EXACT if tier_score == SCORE_TICKER_PREFIX and k == key else tier_score
+                    if score > scores.get(idx, 0.0):
+                        scores[idx] = score
+                i += 1
+            # سطح‌های پایین‌تر فقط وقتی که نتیجه کم است
+            if len(scores) >= limit:
+                return
+
+    def _fuzzy_matches(self, key: str, scores: Dict[int, float], allow) -> None:
+        grams = _trigrams(key)
+        # با شباهت Dice حداقل، هر ردیف قابل قبول دست‌کم min_shared سه‌حرفی مشترک دارد؛ پس در یکی از
+        # (len - min_shared + 1) posting کم‌جمعیت‌تر هست و پرجمعیت‌ترین‌ها (مثل حرف اول) لازم نیستند
+        min_shared = max(1, math.ceil(FUZZY_MIN_SIMILARITY * len(grams) / (2.0 - FUZZY_MIN_SIMILARITY)))
+        postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+        candidates: Set[int] = set()
+        for posting in postings[:len(postings) - min_shared + 1]:
+            candidates |= posting
+        for idx in candidates:
+            if idx in scores or not allow(idx):
+                continue
+            similarity = max(
+                2.0 * len(grams & own) / (len(grams) + len(own)) for own in self.entries[idx].trigrams
+            )
+            if similarity >= FUZZY_MIN_SIMILARITY:
+                scores[idx] = SCORE_FUZZY * similarity
+
+    def _filter(self, sector: Optional[str], instrument_type: Optional[str]):
+        sector_key = search_key(sector) if sector else None
+        entries = self.entries
+
+        def allow(idx: int) -> bool:
+            e = entries[idx]
+            return (sector_key is None or e.sector_key == sector_key) and (
+                instrument_type is None or e.instrument_type == instrument_type
+            )
+        return allow
+
+    def search(
+        self,
+        q: str,
+        limit: int = 10,
+        sector: Optional[str] = None,
+        instrument_type: Optional[str] = None,
+        fuzzy: bool = True,
+    ) -> List[dict]:
+        """autocomplete: تطبیق پیشوندی و در صورت کمبود نتیجه، تطبیق فازی trigram."""
+        key = search_key(q)
+        if not key:
+            return []
+        allow = self._filter(sector, instrument_type)
+        scores: Dict[int, float] = {}
+        self._prefix_matches(key, scores, allow, limit)
+        if " " in key and len(scores) < limit:
+            self._prefix_matches(key.replace(" ", ""), scores, allow, limit)
+        if fuzzy and len(scores) < limit and len(key) >= 2:
+            self._fuzzy_matches(key, scores, allow)
+
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], len(self.entries[kv[0]].ticker), self.entries[kv[0]].ticker))
+        out = []
+        for idx, score in ranked[:limit]:
+            item = self.entries[idx].as_dict()
+            item["score"] = round(score, 2)
+            out.append(item)
+        return out
+
+    def matching_tickers(self, q: str, instrument_type: Optional[str] = None) -> List[str]:
+        """نمادهایی که q (نرمال‌شده) زیررشتهٔ نماد/نام/نام لاتین آن‌هاست؛ جایگزین ILIKE '%q%'."""
+        key = search_key(q)
+        if not key:
+            return []
+        if len(key) >= 3:
+            # فقط ردیف‌هایی که همهٔ trigramهای داخلی q را دارند بررسی می‌شوند
+            postings = sorted((self._postings.get(key[i:i + 3], set()) for i in range(len(key) - 2)), key=len)
+            candidates = set.intersection(*postings)
+        else:
+            candidates = range(len(self.entries))
+        tickers = set()
+        for i in candidates:
+            e = self.entries[i]
+            if (instrument_type is None or e.instrument_type == instrument_type) and any(key in f for f in e.fields):
+                tickers.add(e.ticker)
+        return sorted(tickers)
+
+    def tickers_in_sector(self, sector: str, instrument_type: Optional[str] = None) -> List[str]:
+        idxs = self._by_sector.get(search_key(sector), [])
+        return sorted({
+            self.entries[i].ticker for i in idxs
+            if instrument_type is None or self.entries[i].instrument_type == instrument_type
+        })
+
+    def sectors_with_tickers(self, instrument_type: Optional[str] = None) -> List[dict]:
+        """صنایع و نمادهایشان؛ کپی تازه برمی‌گردد تا تغییر caller به گروه‌های کش‌شده نرسد."""
+        return [
+            {"sector": g["sector"], "stock_ticker": list(g["stock_ticker"])}
+            for g in self._sector_groups.get(instrument_type, [])
+        ]
+
+    def sectors(self, instrument_type: Optional[str] = None) -> List[str]:
+        """صنایع متمایز (مرتب)؛ جایگزین SELECT DISTINCT sector روی جدول‌های بزرگ."""
+        return [g["sector"] for g in self._sector_groups.get(instrument_type, [])]
+
+
+symbol_index = SymbolSearchIndex()
@@ -0,0 +1,164 @@
+# backend/utils/trading_calendar.py
+# -*- coding: utf-8 -*-
+"""
+تقویم معاملاتی و ماتریس قیمت پایانی (close) سهام، ساخته‌شده روی تاریخچهٔ مشترک backend/utils/daily_history.py.
+
+- TradingCalendar: لیست مرتب روزهای معاملاتی؛ نزدیک‌ترین روز / آخرین روز تا یک تاریخ با bisect
+  (به‌جای ORDER BY ABS(date - :d) LIMIT 1 که کل جدول را scan می‌کند).
+- CloseMatrix: ماتریس [روز × نماد] از close (NaN = بدون معامله در آن روز) به‌همراه صنعت، نام
+  و تعداد سهام هر نماد؛ بازدهی همهٔ نمادها/صنایع بین دو روز با چند عملیات برداری.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.utils.daily_history import EPOCH, VersionedIndex, daily_history
+from backend.utils.logger import logger
+from backend.utils.response_cache import SOURCE_DAILY_HISTORY, SOURCE_SYMBOLS
+from backend.utils.symbol_search import search_key
+
+SYMBOLS_SQL = text("""
+    SELECT DISTINCT ON (stock_ticker) stock_ticker, name, sector, share_number
+    FROM symboldetail
+    WHERE stock_ticker IS NOT NULL AND instrument_type = 'saham'
+    ORDER BY stock_ticker, "insCode"
+""")
+
+
+class TradingCalendar:
+    """روزهای معاملاتی مرتب؛ همهٔ lookup ها O(log n)."""
+
+    def __init__(self, days: List[date]):
+        self.days = days
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @property
+    def last(self) -> Optional[date]:
+        return self.days[-1] if self.days else None
+
+    def nearest(self, d: date) -> Optional[date]:
+        """نزدیک‌ترین روز معاملاتی به d (در فاصلهٔ برابر، روز قبلی)."""
+        if not self.days:
+            return None
+        i = bisect_left(self.days, d)
+        if i == 0:
+            return self.days[0]
+        if i == len(self.days):
+            return self.days[-1]
+        before, after = self.days[i - 1], self.days[i]
+        return after if (after - d) < (d - before) else before
+
+    def on_or_before(self, d: date) -> Optional[date]:
+        i = bisect_right(self.days, d)
+        return self.days[i - 1] if i else None
+
+    def index(self, d: date) -> int:
+        """ردیف روز d در ماتریس (d باید روز معاملاتی باشد)."""
+        return bisect_left(self.days, d)
+
+
+class CloseMatrix(VersionedIndex):
+    # نام/صنعت/تعداد سهام از symboldetail
+    sources = (SOURCE_DAILY_HISTORY, SOURCE_SYMBOLS)
+
+    def __init__(self):
+        super().__init__()
+        self.calendar = TradingCalendar([])
+        self.tickers: List[str] = []
+        self.closes: Any = None                  # ndarray [روز × نماد]
+        self.names: List[Optional[str]] = []
+        self.sectors: List[Optional[str]] = []
+        self.sector_keys: List[str] = []
+        self.sector_labels: Dict[str, str] = {}  # کلید نرمال‌شده → پرتکرارترین نام صنعت
+        self.shares: Any = None                  # ndarray [نماد]، NaN = نامعلوم
+
+    # ---------- load ----------
+
+    async def _load(self, db: AsyncSession):
+        import numpy as np
+
+        history = await daily_history.ensure(db)
+        tickers = history.tickers
+        all_days = np.unique(history.days)
+        matrix = np.full((len(all_days), len(tickers)), np.nan)
+        columns = np.repeat(np.arange(len(tickers)), history.lengths)
+        matrix[np.searchsorted(all_days, history.days), columns] = history.values["close"]
+
+        meta = {r[0]: r[1:] for r in (await db.execute(SYMBOLS_SQL)).all()}
+        self.calendar = TradingCalendar([EPOCH + timedelta(days=int(d)) for d in all_days])
+        self.tickers = tickers
+        self.closes = matrix
+        self.names = [meta.get(t, (None, None, None))[0] for t in tickers]
+        self.sectors = [meta.get(t, (None, None, None))[1] for t in tickers]
+        self.sector_keys = [search_key(s) for s in self.sectors]
+        # «بانك» و «بانک» یک صنعت‌اند؛ برای نمایش، نام پرتکرار هر کلید (در تساوی، اولی)
+        counts = Counter((k, s) for k, s in zip(self.sector_keys, self.sectors) if k)
+        self.sector_labels = {}
+        for (k, s), _ in counts.most_common():
+            self.sector_labels.setdefault(k, s)
+        self.shares = np.asarray([meta.get(t, (None, None, None))[2] for t in tickers], dtype=np.float64)
+        logger.info(f"📅 close matrix built: {len(all_days)} trading days × {len(tickers)} tickers")
+
+    # ---------- query ----------
+
+    def resolve(self, start: date, end: Optional[date]) -> Tuple[Optional[date], Optional[date]]:
+        """نزدیک‌ترین روزهای معاملاتی؛ end خالی = آخرین روز. به ترتیب (شروع، پایان)."""
+        start_day = self.calendar.nearest(start)
+        end_day = self.calendar.nearest(end) if end is not None else self.calendar.last
+        if start_day and end_day and start_day > end_day:
+            start_day, end_day = end_day, start_day
+        return start_day, end_day
+
+    def returns(self, start_day: date, end_day: date):
+        """(close شروع، close پایان، بازدهی ٪) برای همهٔ نمادها؛ NaN وقتی close یکی از دو روز نیست یا صفر است."""
+        import numpy as np
+
+        start_close = self.closes[self.calendar.index(start_day)]
+        end_close = self.closes[self.calendar.index(end_day)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ret = np.where(start_close != 0, (end_close / start_close - 1.0) * 100.0, np.nan)
+        return start_close, end_close, ret
+
+    def columns_in_sector(self, sector: str) -> List[int]:
+        key = search_key(sector)
+        return [j for j, k in enumerate(self.sector_keys) if k == key]
+
+    def industry_matrix(self, start_day: date, end_day: date) -> List[Dict[str, Any]]:
+        """بازدهی هم‌وزن و وزنی (ارزش بازار روز شروع) همهٔ صنایع در یک گذر برداری."""
+        import numpy as np
+
+        start_close, _, ret = self.returns(start_day, end_day)
+        keys = np.asarray(self.sector_keys, dtype=object)
+        labels, codes = np.unique(keys, return_inverse=True)
+
+        valid = np.isfinite(ret) & (keys != "")
+        cap = start_close * self.shares
+        cap_valid = valid & np.isfinite(cap) & (cap > 0)
+
+        n = len(labels)
+        count = np.bincount(codes[valid], minlength=n)
+        sum_ret = np.bincount(codes[valid], weights=ret[valid], minlength=n)
+        cap_sum = np.bincount(codes[cap_valid], weights=cap[cap_valid], minlength=n)
+        cap_ret = np.bincount(codes[cap_valid], weights=(cap * ret)[cap_valid], minlength=n)
+
+        out = []
+        for i in np.flatnonzero(count):
+            out.append({
+                "industry": self.sector_labels[labels[i]],
+                "stocks": int(count[i]),
+                "return_eq": float(sum_ret[i] / count[i]),
+                "return_cap": float(cap_ret[i] / cap_sum[i]) if cap_sum[i] > 0 else None,
+                "market_cap_start": float(cap_sum[i]),
+            })
+        out.sort(key=lambda r: -r["return_eq"])
+        return out
+
+
+close_matrix = CloseMatrix()
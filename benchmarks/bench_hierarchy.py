@@ -0,0 +1,186 @@
+"""
+بنچمارک ساخت treemap / sankey روی یک اسنپ‌شات کامل بازار (~۱۵۰۰ نماد):
+مسیر قبلی (apply(normalize_persian) + حلقهٔ iterrows / حلقه روی سطرها) در برابر
+سازندهٔ ستونی backend.utils.hierarchy. خروجی دو مسیر هم مقایسه می‌شود.
+
+اجرا:
+    python -m benchmarks.bench_hierarchy --symbols 1500 --repeat 20
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.hierarchy import (
+    build_sankey,
+    build_treemap,
+    normalize_persian,
+    normalize_persian_series,
+    numeric_column,
+    size_values,
+)
+
+SECTORS = [
+    "خودرو و ساخت قطعات", "فلزات اساسی", "محصولات شيميايي", "بانکها و موسسات اعتباري",
+    "فراورده هاي نفتي، كك و سوخت هسته اي", "استخراج کانه هاي فلزي", "سيمان، آهك و گچ",
+    "مواد و محصولات دارويي", "صندوق سرمایه گذاری قابل معامله", "شرکتهای چند رشته ای صنعتی",
+]
+
+
+def _snapshot(n: int):
+    """سطرها همان‌طور که از result.mappings() می‌آیند (Decimal و گاهی None)."""
+    rnd = random.Random(1)
+    rows = []
+    for i in range(n):
+        rows.append({
+            "stock_ticker": f"نماد{i}",
+            "sector": SECTORS[rnd.randrange(len(SECTORS))],
+            "marketcap": Decimal(rnd.randint(10**11, 10**15)),
+            "value": Decimal(rnd.randint(0, 10**13)) if rnd.random() > 0.05 else None,
+            "net_haghighi": Decimal(rnd.randint(-10**12, 10**12)),
+            "price_change": rnd.uniform(-7, 7),
+            "box_value": Decimal(rnd.randint(0, 10**12)),
+            "color_value": Decimal(rnd.randint(-10**11, 10**11)),
+        })
+    return rows
+
+
+# ---------------- treemap بازار ----------------
+
+def legacy_treemap(rows, size_mode="marketcap"):
+    df = pd.DataFrame(rows)
+    df["sector_norm"] = df["sector"].astype(str).apply(normalize_persian)
+    df = df[df["sector_norm"] != normalize_persian("صندوق سرمایه گذاری قابل معامله")]
+    df = df.replace([float("inf"), float("-inf")], 0).fillna(0)
+    tree = defaultdict(list)
+    for _, row in df.iterrows():
+        size_raw = 1.0 if size_mode == "equal" else float(row.get(size_mode) or 0)
+        if size_mode in ("marketcap", "value", "net_haghighi"):
+            size_for_chart = round(size_raw / 1e10, 3)
+        else:
+            size_for_chart = round(size_raw, 3)
+        tree[row["sector"]].append({
+            "name": row["stock_ticker"],
+            "value": [
+                size_for_chart,
+                round(float(row.get("value") or 0) / 1e10, 3),
+                round(float(row.get("price_change") or 0), 3),
+            ],
+        })
+    return [{"name": s, "children": children} for s, children in tree.items()]
+
+
+def fast_treemap(rows, size_mode="marketcap"):
+    df = pd.DataFrame(rows)
+    df["sector_norm"] = normalize_persian_series(df["sector"])
+    df = df[df["sector_norm"] != normalize_persian("صندوق سرمایه گذاری قابل معامله")]
+    df = df.fillna(0)
+    value = np.column_stack([
+        size_values(df, size_mode),
+        np.round(numeric_column(df, "value") / 1e10, 3),
+        np.round(numeric_column(df, "price_change"), 3),
+    ])
+    return build_treemap(df, "sector", "stock_ticker", {"value": value})
+
+
+# ---------------- treemap صف‌ها ----------------
+
+def legacy_queues(rows):
+    leaves = []
+    for r in rows:
+        v = int(r["box_value"] or 0)
+        if v <= 0:
+            continue
+        c = int(r["color_value"] or 0)
+        leaves.append({"sector": r["sector"], "name": r["stock_ticker"], "value": v, "color_value": c})
+    bucket = {}
+    for leaf in leaves:
+        sec = leaf["sector"]
+        if sec not in bucket:
+            bucket[sec] = {"name": sec, "value": 0, "color_value": 0, "children": []}
+        bucket[sec]["children"].append({"name": leaf["name"], "value": leaf["value"], "color_value": leaf["color_value"]})
+        bucket[sec]["value"] += leaf["value"]
+        bucket[sec]["color_value"] += leaf["color_value"]
+    children = [v for v in bucket.values() if v["value"] > 0]
+    children.sort(key=lambda x: x["value"], reverse=True)
+    return children
+
+
+def fast_queues(rows):
+    df = pd.DataFrame(rows, columns=["sector", "stock_ticker", "box_value", "color_value"])
+    box = numeric_column(df, "box_value", dtype="int64")
+    keep = box > 0
+    df, box = df[keep], box[keep]
+    color = numeric_column(df, "color_value", dtype="int64")
+    return build_treemap(
+        df, "sector", "stock_ticker",
+        {"value": box, "color_value": color},
+        totals=("value", "color_value"),
+        sort_by="value",
+    )
+
+
+# ---------------- sankey درون‌صنعت ----------------
+
+def legacy_sankey(rows):
+    df = pd.DataFrame(rows, columns=["stock_ticker", "net_haghighi"])
+    df["net_haghighi"] = df["net_haghighi"].astype(float)
+    nodes = [{"name": "Other"}] + [{"name": t} for t in df["stock_ticker"].tolist()]
+    seen, uniq_nodes = set(), []
+    for n in nodes:
+        if n["name"] not in seen:
+            uniq_nodes.append(n)
+            seen.add(n["name"])
+    links = []
+    for _, r in df[df["net_haghighi"] > 0].iterrows():
+        links.append({"source": "Other", "target": r["stock_ticker"], "value": float(r["net_haghighi"])})
+    for _, r in df[df["net_haghighi"] < 0].iterrows():
+        links.append({"source": r["stock_ticker"], "target": "Other", "value": float(abs(r["net_haghighi"]))})
+    return uniq_nodes, links
+
+
+def fast_sankey(rows):
+    df = pd.DataFrame(rows, columns=["stock_ticker", "net_haghighi"])
+    return build_sankey(df, "stock_ticker", "net_haghighi")
+
+
+def _same_sankey(a, b) -> bool:
+    # ترتیب لینک‌ها برای ECharts مهم نیست (قبلاً مثبت‌ها اول، حالا ترتیب سطرها)
+    key = lambda link: (link["source"], link["target"])
+    return a[0] == b[0] and sorted(a[1], key=key) == sorted(b[1], key=key)
+
+
+def _timeit(fn, rows, repeat: int) -> float:
+    fn(rows)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(symbols: int, repeat: int):
+    rows = _snapshot(symbols)
+    cases = [
+        ("treemap", legacy_treemap, fast_treemap, lambda a, b: a == b),
+        ("queues treemap", legacy_queues, fast_queues, lambda a, b: a == b),
+        ("sankey", legacy_sankey, fast_sankey, _same_sankey),
+    ]
+    print(f"symbols={symbols} repeat={repeat}")
+    for name, legacy, fast, same in cases:
+        before = _timeit(legacy, rows, repeat)
+        after = _timeit(fast, rows, repeat)
+        match = "✅ same output" if same(legacy(rows), fast(rows)) else "❌ OUTPUT DIFFERS"
+        print(f"{name:<16} before: {before:8.2f} ms  after: {after:7.2f} ms  speedup: {before / after:5.1f}x  {match}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=1500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    main(args.symbols, args.repeat)
@@ -0,0 +1,178 @@
+"""
+میکروبنچمارک سربار میدل‌ور در هر درخواست: پشتهٔ قدیمی (log_requests + AuthMiddleware، هر دو
+BaseHTTPMiddleware) در برابر AuthMiddleware خالص ASGI.
+
+اپ درونی فقط یک PlainTextResponse برمی‌گرداند و درخواست‌ها مستقیم به اپ ASGI داده می‌شوند
+(بدون شبکه و سرور)، پس عدد به‌دست‌آمده تقریباً فقط هزینهٔ میدل‌ورهاست.
+resolve کردن principal با یک resolver درون‌حافظه‌ای جایگزین می‌شود تا دیتابیس لازم نباشد
+(در حالت واقعی هم بعد از اولین درخواست از کش principal خوانده می‌شود).
+
+اجرا:
+    python -m benchmarks.bench_middleware --requests 5000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from jose import jwt
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from backend.middleware.middleware_auth import AuthMiddleware, ALGORITHM, SECRET_KEY
+from backend.users.principal import Principal
+from backend.utils.logger import logger
+
+_LEGACY_PUBLIC_PATHS = [
+    "/docs", "/docs/", "/openapi.json", "/favicon.ico", "/ping", "/static",
+    "/login", "/register", "/seed/superadmin", "/admin/subscriptionswithoutpermisshion",
+    "/admin/subscriptionswithoutpermisshion/"
+]
+
+
+def _legacy_is_public_path(path: str) -> bool:
+    return (
+        path in _LEGACY_PUBLIC_PATHS or
+        path.startswith("/static") or
+        path.startswith("/docs") or
+        path.startswith("/redoc") or
+        path.startswith("/openapi.json")
+    )
+
+
+def _make_principal() -> Principal:
+    user = SimpleNamespace(id=1, is_active=True, deleted_at=None)
+    return Principal(user=user, role_names=["admin"], permissions=["ALL"], features={})
+
+
+_PRINCIPAL = _make_principal()
+
+
+async def _memory_resolver(user_id, iat=None):
+    return _PRINCIPAL
+
+
+class _LegacyAuthMiddleware(BaseHTTPMiddleware):
+    """نسخهٔ قبلی AuthMiddleware (با همان printها و لاگ‌ها)."""
+
+    async def dispatch(self, request, call_next):
+        print("📍 وارد middleware شدیم:", request.url.path)
+        path = request.url.path
+        request_id = str(uuid4())
+        request.state.request_id = request_id
+        logger.info(f"[{request_id}] درخواست جدید: {request.method} {path}")
+        print("📥 All headers:", dict(request.headers))
+        start_time = time.time()
+
+        if _legacy_is_public_path(path):
+            response = await call_next(request)
+            logger.info(f"[{request_id}] پاسخ با status {response.status_code} در {time.time() - start_time:.3f} ثانیه")
+            return response
+
+        auth_header = request.headers.get("authorization") or request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return JSONResponse(status_code=401, content={"detail": "توکن ارسال نشده"})
+        token = auth_header.split(" ")[1]
+        print("🧪 توکن دریافتی از هدر:", repr(token))
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        principal = await _memory_resolver(int(payload.get("sub")), payload.get("iat"))
+        request.state.principal = principal
+        request.state.user = principal.user
+        response = await call_next(request)
+        logger.info(f"[{request_id}] پاسخ نهایی با status {response.status_code} در {time.time() - start_time:.3f} ثانیه")
+        return response
+
+
+async def _legacy_log_requests(request, call_next):
+    logger.info(f"➡️ Request: {request.method} {request.url}")
+    response = await call_next(request)
+    logger.info(f" Response: status_code={response.status_code}")
+    return response
+
+
+async def _endpoint(request):
+    return PlainTextResponse("ok")
+
+
+def build_legacy_app() -> Starlette:
+    app = Starlette(routes=[Route("/ping", _endpoint), Route("/api/data", _endpoint)])
+    app.add_middleware(BaseHTTPMiddleware, dispatch=_legacy_log_requests)
+    app.add_middleware(_LegacyAuthMiddleware)
+    return app
+
+
+def build_asgi_app() -> Starlette:
+    app = Starlette(routes=[Route("/ping", _endpoint), Route("/api/data", _endpoint)])
+    app.add_middleware(AuthMiddleware, resolver=_memory_resolver)
+    return app
+
+
+def _scope(path: str, token: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"localhost"),
+            (b"user-agent", b"bench"),
+            (b"accept", b"application/json"),
+            (b"authorization", f"Bearer {token}".encode()),
+        ],
+        "client": ("127.0.0.1", 12345),
+        "server": ("localhost", 8000),
+    }
+
+
+async def _run(app, path: str, token: str, n: int) -> float:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    # گرم کردن (ساخت middleware stack و ...)
+    for _ in range(50):
+        await app(_scope(path, token), receive, send)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(_scope(path, token), receive, send)
+    return (time.perf_counter() - start) / n * 1e6
+
+
+async def main(n: int):
+    token = jwt.encode({"sub": "1", "iat": 0}, SECRET_KEY, algorithm=ALGORITHM)
+    legacy, asgi = build_legacy_app(), build_asgi_app()
+
+    # لاگ و printها خاموش می‌شوند تا فقط هزینهٔ CPU خود میدل‌ورها اندازه‌گیری شود
+    logger.disabled = True
+    with contextlib.redirect_stdout(io.StringIO()):
+        rows = []
+        for path in ("/ping", "/api/data"):
+            before = await _run(legacy, path, token, n)
+            after = await _run(asgi, path, token, n)
+            rows.append((path, before, after))
+    logger.disabled = False
+
+    print(f"{'path':<12}{'before (µs/req)':>18}{'after (µs/req)':>18}{'speedup':>10}")
+    for path, before, after in rows:
+        print(f"{path:<12}{before:>18.1f}{after:>18.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
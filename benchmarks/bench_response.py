@@ -0,0 +1,114 @@
+"""
+بنچمارک سریالایز پاسخ کندل ۵۰۰۰ تایی: مسیر قبلی (حلقهٔ safe_float + jsonable_encoder + JSONResponse)
+در برابر create_response جدید (orjson مستقیم روی سطرها).
+
+اجرا:
+    python -m benchmarks.bench_response --bars 5000 --repeat 50
+"""
+
+import argparse
+import math
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.utils.response import create_response
+
+
+def _legacy_safe_float(x, default=0.0) -> float:
+    if x is None:
+        return default
+    try:
+        v = float(x)
+    except Exception:
+        return default
+    if math.isnan(v) or math.isinf(v):
+        return default
+    return v
+
+
+def _legacy_create_response(status="success", message="", data=None, status_code=200):
+    return JSONResponse(
+        status_code=status_code,
+        content=jsonable_encoder({
+            "status": status,
+            "status_code": status_code,
+            "message": message,
+            "data": data if data is not None else {},
+        })
+    )
+
+
+def _legacy_rows(n: int):
+    """سطرها همان‌طور که قبلاً از result.mappings() می‌آمدند (date + Decimal)."""
+    rnd = random.Random(1)
+    start = date(2005, 1, 1)
+    rows = []
+    for i in range(n):
+        o = Decimal(rnd.randint(1000, 50000))
+        rows.append({
+            "date": start + timedelta(days=i),
+            "open": o, "close": o + 10, "low": o - 20, "high": o + 30,
+            "volume": Decimal(rnd.randint(1, 10**12)),
+        })
+    return rows
+
+
+def _fast_rows(n: int):
+    """سطرها همان‌طور که حالا از SQL می‌آیند (to_char + float8)."""
+    rnd = random.Random(1)
+    start = date(2005, 1, 1)
+    rows = []
+    for i in range(n):
+        o = float(rnd.randint(1000, 50000))
+        d = (start + timedelta(days=i)).strftime("%Y/%m/%d")
+        rows.append((d, o, o + 10, o - 20, o + 30, float(rnd.randint(1, 10**12))))
+    return rows
+
+
+def legacy_path(rows):
+    raw = []
+    for r in rows:
+        d = r["date"]
+        ds = d.strftime("%Y/%m/%d") if hasattr(d, "strftime") else str(d)
+        raw.append([ds,
+                    _legacy_safe_float(r["open"]),
+                    _legacy_safe_float(r["close"]),
+                    _legacy_safe_float(r["low"]),
+                    _legacy_safe_float(r["high"]),
+                    _legacy_safe_float(r["volume"])])
+    return _legacy_create_response("success", "ok", raw, 200).body
+
+
+def fast_path(rows):
+    return create_response(status="success", message="ok", data=rows, status_code=200).body
+
+
+def _timeit(fn, rows, repeat: int) -> float:
+    fn(rows)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(rows)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(bars: int, repeat: int):
+    legacy_rows, fast_rows = _legacy_rows(bars), _fast_rows(bars)
+    before = _timeit(legacy_path, legacy_rows, repeat)
+    after = _timeit(fast_path, fast_rows, repeat)
+    print(f"bars={bars} repeat={repeat}")
+    print(f"before: {before:8.2f} ms/response  ({len(legacy_path(legacy_rows))} bytes)")
+    print(f"after : {after:8.2f} ms/response  ({len(fast_path(fast_rows))} bytes)")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    main(args.bars, args.repeat)
@@ -21,6 +21,8 @@ from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text
 
+from backend.utils.schema_catalog import schema_catalog
+
 load_dotenv()
 DB_URL = os.getenv("DB_URL")  # postgresql+asyncpg://...
 if not DB_URL:
@@ -114,14 +116,8 @@ async def fetch_day(client: httpx.AsyncClient, inscode: str, yyyymmdd: str) -> L
 
 # ---------- ابزار کشف ستون‌ها ----------
 async def _discover_columns(session: AsyncSession, table: str) -> set:
-    q = """
-      SELECT column_name
-      FROM information_schema.columns
-      WHERE table_schema='public' AND table_name=:tbl
-      ORDER BY ordinal_position
-    """
-    rows = await session.execute(text(q), {"tbl": table})
-    return {r[0] for r in rows.all()}
+    # کاتالوگ مشترک (یکبار در هر پروسه)
+    return set(await schema_catalog.columns(session, table))
 
 def _pick(colset: set, *cands: str) -> Optional[str]:
     for c in cands:
@@ -1,15 +1,25 @@
 # cron_jobs/daily/capital_increase.py
 # -*- coding: utf-8 -*-
+"""
+افزایش سرمایه: حذف و بازسازی داده‌های روزانهٔ یک نماد.
+
+API فقط کار را در job_queue ثبت می‌کند و job_id برمی‌گرداند؛ بازسازی (دانلود کامل تاریخچه
+با finpy_tse) در worker انجام می‌شود:  python -m cron_jobs.job_worker
+"""
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi import status as http_status
 from pydantic import BaseModel
-import os
-import psycopg2
-from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.db.connection import async_session
+from backend.utils.job_queue import enqueue_job, get_job
 from backend.utils.response import create_response
 
-# تابع جدید در base_updater که فقط چند تیکر خاص را آپدیت می‌کند
-from cron_jobs.daily.common.base_updater import run_for_stocks
+# ⚠️ psycopg2 و base_updater (→ finpy_tse / jdatetime / pandas) فقط داخل worker import می‌شوند
+# تا بالا آمدن API منتظر این کتابخانه‌های سنگین نماند.
+
+JOB_KIND = "capital_increase"
 
 # Permission
 try:
@@ -31,32 +41,27 @@ class CapitalIncreaseRequest(BaseModel):
     symboldetail_id: int
 
 
-def _load_db_url():
-    here = os.path.dirname(__file__)
-    candidates = [
-        os.path.join(here, "../../.env"),
-        os.path.join(here, "../.env"),
-        os.path.join(here, "../../../.env"),
-    ]
-    for p in candidates:
-        if os.path.exists(p):
-            load_dotenv(p)
-            break
-    db_url = os.getenv("DB_URL_SYNC")
-    if not db_url:
-        raise RuntimeError("DB_URL_SYNC not set in .env")
-    return db_url
-
-
-@router.post("/run", summary="ثبت افزایش سرمایه: حذف و بازسازی داده‌های یک نماد بر اساس insCode")
-def run_capital_increase(
-    payload: CapitalIncreaseRequest,
-    _ = RequirePerm(),
-):
-    db_url = _load_db_url()
+async def get_db():
+    async with async_session() as session:
+        yield session
 
-    inscode_input = str(payload.symboldetail_id)  # در عمل الان با insCode کار می‌کنیم
 
+def rebuild_capital_increase(ctx) -> dict:
+    """
+    هندلر worker برای کار capital_increase (ctx: cron_jobs.job_worker.JobContext).
+    insCode → stock_ticker، حذف daily_stock_data نماد، دانلود دوباره با منطق run_saham
+    و در پایان bump نسخه‌های daily و daily_history برای invalidate شدن کش API.
+    """
+    import psycopg2
+    # تابع جدید در base_updater که فقط چند تیکر خاص را آپدیت می‌کند
+    from cron_jobs.daily.common.base_updater import run_for_stocks
+    from cron_jobs.data_version import bump_data_version
+    from cron_jobs.daily.update_running_ath import refresh_running_ath
+
+    db_url = ctx.db_url
+    inscode_input = str(ctx.payload["inscode"])
+
+    ctx.progress("resolving ticker")
     with psycopg2.connect(db_url) as conn, conn.cursor() as cur:
         # 1) از روی insCode → stock_ticker را پیدا کن
         cur.execute(
@@ -69,18 +74,12 @@ def run_capital_increase(
         )
         row = cur.fetchone()
         if not row:
-            raise HTTPException(
-                status_code=404,
-                detail=f'symboldetail با insCode={inscode_input} پیدا نشد',
-            )
+            raise LookupError(f'symboldetail با insCode={inscode_input} پیدا نشد')
 
         stock_ticker, inscode_main = row
 
         if stock_ticker is None:
-            raise HTTPException(
-                status_code=400,
-                detail=f'برای insCode={inscode_input} مقدار stock_ticker خالی است.',
-            )
+            raise ValueError(f'برای insCode={inscode_input} مقدار stock_ticker خالی است.')
 
         # 2) همه‌ی ردیف‌های symboldetail که همین stock_ticker را دارند (همه‌ی insCodeهای مرتبط)
         cur.execute(
@@ -92,13 +91,13 @@ def run_capital_increase(
             """,
             (stock_ticker,),
         )
-        related_rows = cur.fetchall()
-        related_inscodes = [r[0] for r in related_rows]
+        related_inscodes = [r[0] for r in cur.fetchall()]
 
         print(f"[CapitalIncrease] insCode_input={inscode_input} -> stock_ticker={stock_ticker}")
         print(f"  related insCodes = {related_inscodes}")
 
         # 3) پاک کردن تمام داده‌های روزانه این تیکر
+        ctx.progress(f"deleting daily_stock_data for {stock_ticker}")
         cur.execute(
             """
             DELETE FROM daily_stock_data
@@ -110,16 +109,96 @@ def run_capital_increase(
         conn.commit()
 
     # 4) دوباره دانلود و ذخیره‌ی داده‌ها برای این تیکر با منطق run_saham
-    run_for_stocks([stock_ticker], "daily_stock_data")
+    ctx.progress(f"downloading history for {stock_ticker}")
+    inserted_rows = run_for_stocks([stock_ticker], "daily_stock_data")
+
+    # 5) سقف تاریخی جاری تاریخچهٔ تعدیل‌شدهٔ جدید و invalidate کردن کش پاسخ‌های API
+    ctx.progress("bumping data_version")
+    with psycopg2.connect(db_url) as conn, conn.cursor() as cur:
+        refresh_running_ath(cur, tickers=[stock_ticker])
+        bump_data_version(cur, "daily", "daily_history")
+        conn.commit()
+
+    return {
+        # اسم فیلد را فعلاً همان symboldetail_id نگه داشتیم ولی در عمل insCode است
+        "input_inscode": inscode_input,
+        "stock_ticker": stock_ticker,
+        "deleted_daily_rows": deleted_rows,
+        "inserted_daily_rows": inserted_rows,
+        "related_inscodes": related_inscodes,
+    }
+
+
+@router.post("/run", summary="ثبت افزایش سرمایه: حذف و بازسازی داده‌های یک نماد بر اساس insCode (در صف)")
+async def run_capital_increase(
+    payload: CapitalIncreaseRequest,
+    db: AsyncSession = Depends(get_db),
+    _ = RequirePerm(),
+):
+    inscode_input = str(payload.symboldetail_id)  # در عمل الان با insCode کار می‌کنیم
+
+    # اعتبارسنجی سریع قبل از ثبت کار (همان 404 قبلی)
+    row = (await db.execute(
+        text('SELECT stock_ticker FROM symboldetail WHERE "insCode" = :inscode'),
+        {"inscode": inscode_input},
+    )).first()
+    if not row:
+        raise HTTPException(
+            status_code=404,
+            detail=f'symboldetail با insCode={inscode_input} پیدا نشد',
+        )
+    if row.stock_ticker is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f'برای insCode={inscode_input} مقدار stock_ticker خالی است.',
+        )
+
+    job_id, created = await enqueue_job(
+        db, JOB_KIND, {"inscode": inscode_input}, dedupe_key=inscode_input,
+    )
 
     return create_response(
-        message="افزایش سرمایه ثبت شد؛ داده‌های نماد پاک و دوباره بارگذاری شدند.",
+        message=(
+            "افزایش سرمایه در صف بازسازی قرار گرفت."
+            if created else
+            "برای این نماد یک بازسازی در صف/در حال اجرا وجود دارد."
+        ),
         data={
-            # اسم فیلد را فعلاً همان symboldetail_id نگه داشتیم ولی در عمل insCode است
+            "job_id": job_id,
             "input_inscode": inscode_input,
-            "stock_ticker": stock_ticker,
-            "deleted_daily_rows": deleted_rows,
-            "related_inscodes": related_inscodes,
+            "stock_ticker": row.stock_ticker,
+            "status_url": f"{router.prefix}/jobs/{job_id}",
+        },
+        status_code=http_status.HTTP_202_ACCEPTED,
+    )
+
+
+@router.get("/jobs/{job_id}", summary="وضعیت کار بازسازی افزایش سرمایه")
+async def get_capital_increase_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_db),
+    _ = RequirePerm(),
+):
+    job = await get_job(db, job_id)
+    if job is None or job["kind"] != JOB_KIND:
+        raise HTTPException(status_code=404, detail="کار پیدا نشد")
+
+    result = job["result"] or {}
+    return create_response(
+        message="وضعیت کار",
+        data={
+            "job_id": job["id"],
+            "status": job["status"],
+            "progress": job["progress"],
+            "attempts": job["attempts"],
+            "rows_inserted": result.get("inserted_daily_rows"),
+            "rows_deleted": result.get("deleted_daily_rows"),
+            "duration_seconds": job["duration_seconds"],
+            "result": job["result"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
         },
         status_code=200,
     )
@@ -22,6 +22,8 @@ from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 
+from cron_jobs.signals_snapshot import refresh_signals_latest
+
 # تلاش برای استفاده از TA-Lib؛ اگر نبود fallback بکار می‌افتد
 try:
     import talib
@@ -171,7 +173,12 @@ def _py(v):
 # هسته‌ی اجرا
 # ---------------------------
 
-def build_indicators_for_table(source_table: str, dest_table: str, insert_mode: str = "upsert"):
+def build_indicators_for_table(
+    source_table: str,
+    dest_table: str,
+    insert_mode: str = "upsert",
+    signals_freq: str | None = None,
+):
     """
     از جدول روزانه‌ی منبع می‌خواند، برای هر نماد مرتب بر اساس تاریخ محاسبه می‌کند
     و در جدول اندیکاتور مقصد درج می‌کند (نسخه ریالی و دلاری).
@@ -181,6 +188,7 @@ def build_indicators_for_table(source_table: str, dest_table: str, insert_mode:
         source_table: نام جدول داده‌ی روزانه (مثلاً daily_stock_data, daily_fund_gold, ...)
         dest_table:   نام جدول اندیکاتورها (مثلاً daily_indicators, daily_indicators_fund_gold, ...)
         insert_mode:  "upsert" (پیشنهادی) یا "replace_all" (حذف کل جدول و درج مجدد)
+        signals_freq: اگر ست شود ("daily")، در پایان اجرا snapshot جدول signals_latest بازسازی می‌شود
     """
     db_url = _resolve_db_url()
     # Engine برای pandas (رفع Warning)
@@ -392,3 +400,8 @@ def build_indicators_for_table(source_table: str, dest_table: str, insert_mode:
 
         conn.commit()
         print(f"✅ {total_rows} ردیف در {dest_table} درج/به‌روزرسانی شد.")
+
+        # snapshot آخرین سیگنال‌ها برای /api/signals/table (یکبار در هر اجرا)
+        if signals_freq:
+            refresh_signals_latest(cur, signals_freq)
+            conn.commit()
@@ -197,10 +197,11 @@ def run_for_stocks(stocks: list[str], dest_table: str):
     """
     نسخه‌ی جدید: فقط لیست خاصی از stock_tickerها را آپدیت می‌کند.
     این همان منطقی است که می‌خواهیم در API افزایش سرمایه استفاده کنیم.
+    خروجی: تعداد کل رکوردهای درج‌شده.
     """
     if not stocks:
         print("⚠️ لیست تیکر خالی است.")
-        return
+        return 0
 
     db_url = _load_db_url()
     with psycopg2.connect(db_url) as conn, conn.cursor() as cur:
@@ -217,4 +218,5 @@ def run_for_stocks(stocks: list[str], dest_table: str):
                 conn.rollback()
                 print(f"❌ خطا برای {stock}: {e}")
 
-        print(f"🎯 آپدیت تیکرهای انتخابی تمام شد. تعداد کل رکوردهای جدید: {total}")
\ No newline at end of file
+        print(f"🎯 آپدیت تیکرهای انتخابی تمام شد. تعداد کل رکوردهای جدید: {total}")
+        return total
\ No newline at end of file
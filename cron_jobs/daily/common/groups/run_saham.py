@@ -1,5 +1,8 @@
 # cron_jobs/daily/groups/run_saham.py
 from cron_jobs.daily.common.base_updater import run_group
+from cron_jobs.daily.update_running_ath import main as refresh_running_ath
 
 if __name__ == "__main__":
     run_group("saham", "daily_stock_data")
+    # سقف تاریخی جاری ردیف‌های جدید (حالت ATH روت ceiling)
+    refresh_running_ath()
@@ -19,6 +19,13 @@ import logging
 from datetime import datetime
 from sqlalchemy import create_engine, text
 
+# اجرا با مسیر فایل هم کار کند → ریشهٔ پروژه در sys.path برای import cron_jobs.*
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from cron_jobs.data_version import bump_data_version
+
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -91,6 +98,10 @@ def main():
                 logger.warning("⚠️ MV not found, skipped: %s.%s", schema, mv)
                 skipped.append(mv)
 
+        # invalidate API response cache (see backend/utils/response_cache.py)
+        with conn.connection.cursor() as cur:
+            bump_data_version(cur, "daily")
+
     elapsed = (datetime.utcnow() - started).total_seconds()
     logger.info("✅ DAILY MVs refreshed=%s skipped=%s elapsed=%.2fs", refreshed, skipped, elapsed)
 
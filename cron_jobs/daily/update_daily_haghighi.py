@@ -7,6 +7,8 @@ import sys
 import os
 from dotenv import load_dotenv
 
+from cron_jobs.daily.update_real_money_flow_rollups import refresh_real_money_flow_rollups
+
 # خروجی ترمینال UTF-8
 sys.stdout.reconfigure(encoding='utf-8')
 
@@ -124,6 +126,10 @@ def update_haghighi_data():
         else:
             print(f"⚠️ داده‌ای برای {stock_ticker} نیست یا ساختار ناقصه.")
 
+    # rollup های جریان پول حقیقی (بازار/صنعت) فقط برای دوره‌های جدید
+    refresh_real_money_flow_rollups(cursor)
+    conn.commit()
+
     cursor.close()
     conn.close()
 
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Incrementally maintain the real-money-flow rollups read by
+/api/real-money-flow/timeseries (level=market / level=sector).
+
+Tables (see alembic 4b9e2d7c5f10):
+  - real_money_flow_market (timeframe, period_end)
+  - real_money_flow_sector (timeframe, period_end, sector)
+
+For each timeframe the high-water mark is the latest period_end already in the
+rollup. That period is recomputed (it may still be partial: temp rows of today,
+or the current week) together with every newer period; older periods are not
+touched. An empty rollup has no high-water mark, so the first run backfills.
+
+Called at the end of the nightly haghighi job and, for the daily timeframe,
+after the intraday live syncs write today's temp rows (sync_live_to_daily,
+sync_live_to_haghighi); can also run standalone:
+    .venv/bin/python -m cron_jobs.daily.update_real_money_flow_rollups
+"""
+
+import os
+
+import psycopg2
+from dotenv import load_dotenv
+
+# timeframe -> (source view, date column, column stored as j_date)
+TIMEFRAMES = {
+    "daily": ("daily_joined_data", "date_miladi", "j_date"),
+    "weekly": ("weekly_joined_data", "week_end", "NULL::text"),
+}
+
+HIGH_WATER_MARK_SQL = "SELECT max(period_end) FROM real_money_flow_market WHERE timeframe = %s"
+
+DELETE_SQL = "DELETE FROM {table} WHERE timeframe = %s AND period_end >= %s"
+
+# همان فرمول روت: (buy_i_value - sell_i_value) و نسخهٔ دلاری آن با نرخ دلار هر ردیف
+INSERT_MARKET_SQL = """
+    INSERT INTO real_money_flow_market (timeframe, period_end, j_date, flow_rial, flow_dollar)
+    SELECT %s,
+           {date_col}::date,
+           max({j_date}),
+           COALESCE(SUM(buy_i_value - sell_i_value), 0),
+           COALESCE(SUM((buy_i_value - sell_i_value) / NULLIF(dollar_rate, 0)), 0)
+    FROM {view}
+    WHERE {date_col} IS NOT NULL
+      AND {date_col} >= %s
+    GROUP BY {date_col}::date
+"""
+
+INSERT_SECTOR_SQL = """
+    INSERT INTO real_money_flow_sector (timeframe, period_end, sector, j_date, flow_rial, flow_dollar)
+    SELECT %s,
+           {date_col}::date,
+           sector,
+           max({j_date}),
+           COALESCE(SUM(buy_i_value - sell_i_value), 0),
+           COALESCE(SUM((buy_i_value - sell_i_value) / NULLIF(dollar_rate, 0)), 0)
+    FROM {view}
+    WHERE {date_col} IS NOT NULL
+      AND {date_col} >= %s
+      AND sector IS NOT NULL
+    GROUP BY {date_col}::date, sector
+"""
+
+# بدون high-water mark از ابتدای تاریخچه
+EPOCH = "-infinity"
+
+
+def refresh_real_money_flow_rollups(cur, timeframes=None):
+    """Recompute the rollups from the high-water mark on, using an open psycopg2 cursor."""
+    for timeframe in timeframes or TIMEFRAMES:
+        view, date_col, j_date = TIMEFRAMES[timeframe]
+
+        cur.execute(HIGH_WATER_MARK_SQL, (timeframe,))
+        hwm = cur.fetchone()[0] or EPOCH
+
+        for table in ("real_money_flow_market", "real_money_flow_sector"):
+            cur.execute(DELETE_SQL.format(table=table), (timeframe, hwm))
+
+        fmt = {"view": view, "date_col": date_col, "j_date": j_date}
+        cur.execute(INSERT_MARKET_SQL.format(**fmt), (timeframe, hwm))
+        periods = cur.rowcount
+        cur.execute(INSERT_SECTOR_SQL.format(**fmt), (timeframe, hwm))
+        print(f"✅ real_money_flow {timeframe}: {periods} periods from {hwm} (sector rows: {cur.rowcount})")
+
+
+def _load_db_url() -> str:
+    dotenv_path = os.path.join(os.path.dirname(__file__), "../../.env")
+    load_dotenv(dotenv_path)
+    db_url = os.getenv("DB_URL_SYNC")
+    if not db_url:
+        raise RuntimeError("DB_URL_SYNC not set in .env")
+    return db_url
+
+
+def main():
+    with psycopg2.connect(_load_db_url()) as conn, conn.cursor() as cur:
+        refresh_real_money_flow_rollups(cur)
+        conn.commit()
+
+
+if __name__ == "__main__":
+    main()
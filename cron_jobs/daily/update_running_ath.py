@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+Incrementally maintain the running all-time-high columns of daily_stock_data
+read by /api/targets/ceiling and /ceiling/funnel in ATH mode.
+
+Columns (see alembic 2c7f5e9a4d16), one pair per ceiling price:
+  - ath_<price>         running max of <price> up to and including the row
+  - ath_<price>_j_date  j_date of the latest row that reached that max
+for <price> in high, adjust_high, high_usd (= high / dollar_rate), adjust_high_usd.
+
+NaN prices never become the ATH; a row before the first valid price stores
+'NaN' so that only new rows (ath_adjust_high IS NULL) are picked up.
+Each ticker is resumed from its last filled row; capital_increase deletes and
+re-downloads a ticker, so its whole (re-adjusted) history is refilled.
+
+Called at the end of the nightly saham update and by capital_increase; can also
+run standalone. main() also bumps the `daily_history` data version so the API
+reloads its in-memory history indexes:
+    .venv/bin/python -m cron_jobs.daily.update_running_ath
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import psycopg2
+from dotenv import load_dotenv
+from psycopg2.extras import execute_values
+
+from cron_jobs.data_version import bump_data_version
+
+# ceiling price -> SQL expression on daily_stock_data
+PRICES = {
+    "high": "high",
+    "adjust_high": "adjust_high",
+    "high_usd": "high / NULLIF(dollar_rate, 0)",
+    "adjust_high_usd": "adjust_high_usd",
+}
+
+ATH_COLUMNS = [c for p in PRICES for c in (f"ath_{p}", f"ath_{p}_j_date")]
+
+PENDING_SQL = """
+    SELECT stock_ticker, min(date_miladi)
+    FROM daily_stock_data
+    WHERE ath_adjust_high IS NULL AND stock_ticker IS NOT NULL
+      {ticker_filter}
+    GROUP BY stock_ticker
+"""
+
+# آخرین ردیف پرشدهٔ قبل از اولین ردیف جدید هر نماد (نقطهٔ ادامه)
+SEED_SQL = f"""
+    SELECT DISTINCT ON (d.stock_ticker) d.stock_ticker, {", ".join(f"d.{c}" for c in ATH_COLUMNS)}
+    FROM daily_stock_data d
+    JOIN (VALUES %s) AS p (stock_ticker, first_date)
+      ON d.stock_ticker = p.stock_ticker AND d.date_miladi < p.first_date::date
+    WHERE d.ath_adjust_high IS NOT NULL
+    ORDER BY d.stock_ticker, d.date_miladi DESC
+"""
+
+ROWS_SQL = f"""
+    SELECT d.stock_ticker, d.date_miladi, d.j_date, {", ".join(f"({e})::float8 AS {p}" for p, e in PRICES.items())}
+    FROM daily_stock_data d
+    JOIN (VALUES %s) AS p (stock_ticker, first_date)
+      ON d.stock_ticker = p.stock_ticker AND d.date_miladi >= p.first_date::date
+    ORDER BY d.stock_ticker, d.date_miladi
+"""
+
+UPDATE_SQL = f"""
+    UPDATE daily_stock_data AS d
+    SET {", ".join(f"{c} = v.{c}" for c in ATH_COLUMNS)}
+    FROM (VALUES %s) AS v (stock_ticker, date_miladi, {", ".join(ATH_COLUMNS)})
+    WHERE d.stock_ticker = v.stock_ticker AND d.date_miladi = v.date_miladi::date
+"""
+
+UPDATE_TEMPLATE = "(%s, %s, " + ", ".join(["%s::float8", "%s"] * len(PRICES)) + ")"
+
+
+def _running_ath(df: pd.DataFrame, seed: pd.DataFrame, price: str):
+    """running max و j_date آخرین رکورد (تساوی = تاریخ جدیدتر، مثل ORDER BY px DESC, date DESC)."""
+    px = df[price].where(np.isfinite(df[price]))
+    seed_px = df["stock_ticker"].map(seed[f"ath_{price}"]).astype(float)
+    seed_j = df["stock_ticker"].map(seed[f"ath_{price}_j_date"])
+
+    by = df["stock_ticker"]
+    # cummax روی NaN، NaN می‌دهد؛ ffill تا بیشینهٔ قبلی از دست نرود
+    running = px.groupby(by).cummax().groupby(by).ffill()
+    prev = running.groupby(by).shift(1)
+    prev = pd.concat([prev, seed_px], axis=1).max(axis=1)          # NaN فقط وقتی هیچ قیمتی نبوده
+    ath = pd.concat([prev, px], axis=1).max(axis=1)
+
+    is_record = px.notna() & (prev.isna() | (px >= prev))
+    j = df["j_date"].where(is_record)
+    j = j.groupby(by).ffill()
+    j = j.fillna(seed_j.where(seed_px.notna()))
+    return ath, j
+
+
+def refresh_running_ath(cur, tickers=None):
+    """Fill the running-ATH columns of new rows using an open psycopg2 cursor (caller commits)."""
+    ticker_filter = "AND stock_ticker = ANY(%s)" if tickers else ""
+    cur.execute(PENDING_SQL.format(ticker_filter=ticker_filter), (list(tickers),) if tickers else None)
+    pending = cur.fetchall()
+    if not pending:
+        print("📭 running ATH: no new rows")
+        return 0
+
+    # یک صفحه: execute_values با SELECT فقط نتیجهٔ صفحهٔ آخر را نگه می‌دارد
+    execute_values(cur, SEED_SQL, pending, page_size=len(pending))
+    seed_cols = ["stock_ticker"] + ATH_COLUMNS
+    seed = pd.DataFrame(cur.fetchall(), columns=seed_cols).set_index("stock_ticker")
+
+    execute_values(cur, ROWS_SQL, pending, page_size=len(pending))
+    df = pd.DataFrame(cur.fetchall(), columns=["stock_ticker", "date_miladi", "j_date", *PRICES])
+    if df.empty:
+        return 0
+    for price in PRICES:
+        df[price] = pd.to_numeric(df[price], errors="coerce")
+
+    out = df[["stock_ticker", "date_miladi"]].copy()
+    for price in PRICES:
+        ath, j = _running_ath(df, seed, price)
+        out[f"ath_{price}"] = ath
+        out[f"ath_{price}_j_date"] = j
+
+    # NaN (هنوز قیمت معتبری نبوده) ذخیره می‌شود تا ردیف دوباره pending نشود؛ j_date خالی → NULL
+    records = [
+        tuple(None if isinstance(v, float) and c.endswith("_j_date") else v for c, v in zip(out.columns, row))
+        for row in out.itertuples(index=False, name=None)
+    ]
+    execute_values(cur, UPDATE_SQL, records, template=UPDATE_TEMPLATE, page_size=1000)
+    print(f"✅ running ATH: {len(records)} rows of {len(pending)} tickers")
+    return len(records)
+
+
+def _load_db_url() -> str:
+    dotenv_path = os.path.join(os.path.dirname(__file__), "../../.env")
+    load_dotenv(dotenv_path)
+    db_url = os.getenv("DB_URL_SYNC")
+    if not db_url:
+        raise RuntimeError("DB_URL_SYNC not set in .env")
+    return db_url
+
+
+def main():
+    with psycopg2.connect(_load_db_url()) as conn, conn.cursor() as cur:
+        refresh_running_ath(cur)
+        bump_data_version(cur, "daily_history")
+        conn.commit()
+
+
+if __name__ == "__main__":
+    main()
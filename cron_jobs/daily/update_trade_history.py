@@ -9,6 +9,8 @@ import requests
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 
+from backend.utils.schema_catalog import TableColumns, pick_first_exist, schema_catalog
+
 # Load .env
 try:
     from dotenv import load_dotenv
@@ -86,38 +88,19 @@ def get_engine() -> Engine:
 
 
 def fetch_table_columns(engine: Engine, table_name: str, schema: str = "public") -> List[str]:
-    q = text("""
-        SELECT column_name
-        FROM information_schema.columns
-        WHERE table_schema = :schema AND table_name = :table
-        ORDER BY ordinal_position
-    """)
-    with engine.begin() as conn:
-        rows = conn.execute(q, {"schema": schema, "table": table_name}).fetchall()
-    return [r[0] for r in rows]
+    # کاتالوگ مشترک: information_schema یکبار برای همهٔ جداول خوانده می‌شود
+    return schema_catalog.columns_sync(engine, table_name).names
 
 
 def pick_first_existing(cols: List[str], candidates: List[str]) -> Optional[str]:
-    cols_lower = {c.lower(): c for c in cols}
-    for cand in candidates:
-        if cand.lower() in cols_lower:
-            return cols_lower[cand.lower()]
-    return None
+    return pick_first_exist(candidates, TableColumns("", cols))
 
 
 def find_existing_table_name(engine: Engine, candidates: List[str], schema: str = "public") -> str:
-    q = text("""
-        SELECT table_name
-        FROM information_schema.tables
-        WHERE table_schema = :schema AND table_name = ANY(:candidates)
-        ORDER BY table_name
-        LIMIT 1
-    """)
-    with engine.begin() as conn:
-        r = conn.execute(q, {"schema": schema, "candidates": candidates}).fetchone()
-    if not r:
+    table_name = schema_catalog.find_table(engine, candidates)
+    if not table_name:
         raise RuntimeError(f"None of these tables exist in schema={schema}: {candidates}")
-    return r[0]
+    return table_name
 
 
 def build_symboldetail_select(engine: Engine) -> str:
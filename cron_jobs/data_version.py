@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Bump rows of the `data_version` table after a job changes report data.
+
+The API response cache (backend/utils/response_cache.py) keys every cached
+payload on these versions, so a bump invalidates all dependent responses.
+
+Sources:
+  - live  : live_market_data / orderbook / live MVs (every 5 minutes)
+  - daily : nightly ETL, daily/weekly joined data, daily MVs, and the weekly
+            builders (weekly tables, week_calendar, weekly signals_latest),
+            which also run on weekends when nothing else bumps it
+  - symbols : symboldetail (in-memory symbol search index of the API)
+  - daily_history : final daily_stock_data history (in-memory history indexes
+                    of the API); only the nightly saham update and
+                    capital_increase bump it, intraday temp rows do not
+
+Run as a pipeline step:
+    .venv/bin/python -m cron_jobs.data_version daily
+"""
+
+import os
+import sys
+
+import psycopg2
+from dotenv import load_dotenv
+
+BUMP_SQL = """
+    INSERT INTO data_version (source, version, updated_at)
+    VALUES (%s, 1, now())
+    ON CONFLICT (source)
+    DO UPDATE SET version = data_version.version + 1,
+                  updated_at = now()
+"""
+
+
+def bump_data_version(cur, *sources: str):
+    """Increment the version of each given source using an open psycopg2 cursor."""
+    for source in sources:
+        cur.execute(BUMP_SQL, (source,))
+
+
+def _load_db_url() -> str:
+    dotenv_path = os.path.join(os.path.dirname(__file__), "../.env")
+    load_dotenv(dotenv_path)
+    db_url = os.getenv("DB_URL_SYNC")
+    if not db_url:
+        raise RuntimeError("DB_URL_SYNC not set in .env")
+    return db_url
+
+
+def main(argv=None):
+    sources = (argv if argv is not None else sys.argv[1:]) or ["daily"]
+    with psycopg2.connect(_load_db_url()) as conn, conn.cursor() as cur:
+        bump_data_version(cur, *sources)
+        conn.commit()
+    print(f"✅ data_version bumped: {sources}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+Worker pool for the DB-backed `job_queue` table.
+
+The API only enqueues jobs (backend/utils/job_queue.py) and returns a job id;
+this long-running process claims queued jobs with `FOR UPDATE SKIP LOCKED`,
+runs the handler registered for the job kind and stores progress / result /
+error back on the row. Several worker processes (and threads) can run at once.
+
+While a job runs, a timer thread refreshes its heartbeat every
+JOB_HEARTBEAT_SECONDS, so long steps without progress() calls are not mistaken
+for dead workers. A job whose worker died (no heartbeat for JOB_STALE_SECONDS)
+is claimed again, up to JOB_MAX_ATTEMPTS attempts; after that it is marked
+failed so the active-job dedupe index stops returning it to enqueue_job.
+
+Run:
+    .venv/bin/python -m cron_jobs.job_worker --workers 2
+"""
+
+import argparse
+import importlib
+import json
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import psycopg2
+from dotenv import load_dotenv
+
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", str(max(5, JOB_STALE_SECONDS // 3))))
+
+# kind -> "module:function"; handlers are imported lazily on first use
+JOB_HANDLERS: Dict[str, str] = {
+    "capital_increase": "cron_jobs.daily.capital_increase:rebuild_capital_increase",
+}
+
+# dead jobs that can no longer be reclaimed leave the active-job dedupe index as failed
+EXPIRE_STALE_SQL = """
+    UPDATE job_queue
+    SET status = 'failed', error = 'stale: max attempts', finished_at = now()
+    WHERE status = 'running'
+      AND heartbeat_at < now() - make_interval(secs => %(stale)s)
+      AND attempts >= %(max_attempts)s
+"""
+
+CLAIM_SQL = """
+    UPDATE job_queue
+    SET status = 'running',
+        attempts = attempts + 1,
+        worker = %(worker)s,
+        started_at = now(),
+        heartbeat_at = now(),
+        progress = 'started',
+        error = NULL
+    WHERE id = (
+        SELECT id
+        FROM job_queue
+        WHERE status = 'queued'
+           OR (status = 'running'
+               AND heartbeat_at < now() - make_interval(secs => %(stale)s)
+               AND attempts < %(max_attempts)s)
+        ORDER BY id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id, kind, payload
+"""
+
+PROGRESS_SQL = """
+    UPDATE job_queue SET progress = %s, heartbeat_at = now() WHERE id = %s
+"""
+
+HEARTBEAT_SQL = """
+    UPDATE job_queue SET heartbeat_at = now() WHERE id = %s AND status = 'running'
+"""
+
+SUCCEEDED_SQL = """
+    UPDATE job_queue
+    SET status = 'succeeded', progress = 'done', result = %s::jsonb, finished_at = now(), heartbeat_at = now()
+    WHERE id = %s
+"""
+
+FAILED_SQL = """
+    UPDATE job_queue
+    SET status = 'failed', error = %s, finished_at = now(), heartbeat_at = now()
+    WHERE id = %s
+"""
+
+
+class JobContext:
+    """Passed to handlers: job id, payload, the sync DB url and a progress callback."""
+
+    def __init__(self, conn, job_id: int, payload: Dict[str, Any], db_url: str):
+        self._conn = conn
+        self.job_id = job_id
+        self.payload = payload
+        self.db_url = db_url
+
+    def progress(self, message: str):
+        with self._conn.cursor() as cur:
+            cur.execute(PROGRESS_SQL, (message, self.job_id))
+
+
+class _Heartbeat:
+    """Refreshes heartbeat_at of a running job from a timer thread until stopped."""
+
+    def __init__(self, conn, job_id: int, interval: float = JOB_HEARTBEAT_SECONDS):
+        self._conn = conn          # psycopg2 connections are thread-safe (cursors are not shared)
+        self._job_id = job_id
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-heartbeat-{job_id}", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self._interval):
+            try:
+                with self._conn.cursor() as cur:
+                    cur.execute(HEARTBEAT_SQL, (self._job_id,))
+            except psycopg2.Error as e:
+                print(f"⚠️ heartbeat of job {self._job_id} failed: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _load_db_url() -> str:
+    dotenv_path = os.path.join(os.path.dirname(__file__), "../.env")
+    load_dotenv(dotenv_path)
+    db_url = os.getenv("DB_URL_SYNC")
+    if not db_url:
+        raise RuntimeError("DB_URL_SYNC not set in .env")
+    return db_url
+
+
+_handler_cache: Dict[str, Callable[[JobContext], Dict[str, Any]]] = {}
+
+
+def _resolve_handler(kind: str) -> Callable[[JobContext], Dict[str, Any]]:
+    if kind not in _handler_cache:
+        target = JOB_HANDLERS.get(kind)
+        if target is None:
+            raise LookupError(f"no handler registered for job kind '{kind}'")
+        module_name, func_name = target.split(":")
+        _handler_cache[kind] = getattr(importlib.import_module(module_name), func_name)
+    return _handler_cache[kind]
+
+
+def run_one(conn, worker: str, db_url: str) -> bool:
+    """Claim and run a single job. Returns False when the queue is empty."""
+    params = {"worker": worker, "stale": JOB_STALE_SECONDS, "max_attempts": JOB_MAX_ATTEMPTS}
+    with conn.cursor() as cur:
+        cur.execute(EXPIRE_STALE_SQL, params)
+        cur.execute(CLAIM_SQL, params)
+        row = cur.fetchone()
+    if row is None:
+        return False
+
+    job_id, kind, payload = row
+    ctx = JobContext(conn, job_id, payload or {}, db_url)
+    started = time.perf_counter()
+    print(f"[{worker}] ▶ job {job_id} ({kind}) {payload}")
+    try:
+        with _Heartbeat(conn, job_id):
+            result = _resolve_handler(kind)(ctx) or {}
+        result["duration_seconds"] = round(time.perf_counter() - started, 3)
+        with conn.cursor() as cur:
+            cur.execute(SUCCEEDED_SQL, (json.dumps(result, ensure_ascii=False, default=str), job_id))
+        print(f"[{worker}] ✅ job {job_id} done in {result['duration_seconds']}s")
+    except Exception as e:
+        with conn.cursor() as cur:
+            cur.execute(FAILED_SQL, (f"{e}\n{traceback.format_exc()}"[-4000:], job_id))
+        print(f"[{worker}] ❌ job {job_id} failed: {e}")
+    return True
+
+
+def worker_loop(index: int, db_url: str, stop: threading.Event):
+    worker = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    conn: Optional[Any] = None
+    while not stop.is_set():
+        try:
+            if conn is None or conn.closed:
+                conn = psycopg2.connect(db_url)
+                conn.autocommit = True
+            if not run_one(conn, worker, db_url):
+                stop.wait(JOB_POLL_SECONDS)
+        except psycopg2.Error as e:
+            print(f"[{worker}] ⚠️ DB error, reconnecting: {e}")
+            try:
+                if conn is not None:
+                    conn.close()
+            except Exception:
+                pass
+            conn = None
+            stop.wait(JOB_POLL_SECONDS)
+    if conn is not None:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="job_queue worker pool")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("JOB_WORKERS", "2")))
+    args = parser.parse_args(argv)
+
+    db_url = _load_db_url()
+    stop = threading.Event()
+
+    def _shutdown(signum, frame):
+        print("🛑 stopping workers after current jobs ...")
+        stop.set()
+
+    signal.signal(signal.SIGINT, _shutdown)
+    signal.signal(signal.SIGTERM, _shutdown)
+
+    print(f"🚀 job worker pool started with {args.workers} worker(s)")
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="job-worker") as pool:
+        for i in range(args.workers):
+            pool.submit(worker_loop, i, db_url, stop)
+
+
+if __name__ == "__main__":
+    main()
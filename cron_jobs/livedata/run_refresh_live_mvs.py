@@ -11,6 +11,13 @@ import logging
 from datetime import datetime
 from sqlalchemy import create_engine, text
 
+# اجرا با مسیر فایل هم کار کند → ریشهٔ پروژه در sys.path برای import cron_jobs.*
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from cron_jobs.data_version import bump_data_version
+
 try:
     from dotenv import load_dotenv
     load_dotenv()
@@ -46,6 +53,9 @@ def main():
         # اگر قفل/کندی دیدی، بعداً می‌ریم سمت CONCURRENTLY (نیاز به unique index روی MV داره)
         conn.execute(text("REFRESH MATERIALIZED VIEW mv_live_sector_report;"))
         conn.execute(text("REFRESH MATERIALIZED VIEW mv_orderbook_report;"))
+        # invalidate API response cache (see backend/utils/response_cache.py)
+        with conn.connection.cursor() as cur:
+            bump_data_version(cur, "live")
 
     elapsed = (datetime.utcnow() - started).total_seconds()
     logger.info("✅ live MVs refreshed. elapsed=%.2fs", elapsed)
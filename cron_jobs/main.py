@@ -82,6 +82,8 @@ NIGHTLY_MODULES: List[Tuple[str, str]] = [
     ("update_daily_haghighi", "cron_jobs.daily.update_daily_haghighi"),
     ("run_saham_ind",         "cron_jobs.daily.common.groups.run_saham_ind"),
     ("Safkharid", "cron_jobs.daily.Safkharid"),  # ← این خط جدید اضافه شد
+    # آخرین قدم: invalidate کردن کش پاسخ‌های API (data_version.daily)
+    ("data_version",          "cron_jobs.data_version"),
 ]
 
 # Days of week: Sat..Wed  (Linux cron usually: 0/7=Sun, 6=Sat. APScheduler uses names)
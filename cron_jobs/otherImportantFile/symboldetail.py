@@ -132,6 +132,12 @@ def main():
         print(f"💾 ذخیره {len(out)} رکورد باقی‌مانده ...")
         upsert_symboldetail(out)
 
+    # ایندکس جست‌وجوی نمادهای API با تغییر نسخهٔ symbols از نو ساخته می‌شود
+    from cron_jobs.data_version import bump_data_version
+    with psycopg2.connect(DB_URL) as conn, conn.cursor() as cur:
+        bump_data_version(cur, "symbols")
+        conn.commit()
+
     print(f"✅ Done. saved={len(id_type_pairs)-len(failed)} failed={len(failed)}")
     if failed:
         tmp = tempfile.gettempdir()
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Rebuild the `signals_latest` snapshot read by /api/signals/table.
+
+One row per (freq, currency, stock_ticker) for the latest date of the
+daily / weekly joined view: cleaned float signals (NaN/Inf -> 0), price,
+ichimoku cloud position and sector already resolved, so the endpoint is a
+plain indexed filter/sort on a small table.
+
+Written by the indicator jobs at the end of a run:
+  - daily : cron_jobs.daily.common.base_indicator.build_indicators_for_table(signals_freq="daily")
+  - weekly: cron_jobs.weekly.common.base_weekly_indicator.build_weekly_indicators_for_table(signals_freq="weekly")
+
+Can also run standalone:
+    .venv/bin/python -m cron_jobs.signals_snapshot daily weekly
+"""
+
+import os
+import sys
+
+import psycopg2
+from dotenv import load_dotenv
+
+# freq -> (view, date column)
+SOURCES = {
+    "daily": ("daily_joined_data", "date_miladi"),
+    "weekly": ("weekly_joined_data", "week_end"),
+}
+
+SIGNALS = (
+    "ich_buy", "ich_sell", "ema_buy", "ema_sell", "rsi_buy", "rsi_sell",
+    "macd_buy", "macd_sell", "ema50100_buy", "ema50100_sell",
+)
+
+_SIGNAL_BASES = {
+    "ich_buy": "signal_ichimoku_buy",
+    "ich_sell": "signal_ichimoku_sell",
+    "ema_buy": "signal_ema_cross_buy",
+    "ema_sell": "signal_ema_cross_sell",
+    "rsi_buy": "signal_rsi_buy",
+    "rsi_sell": "signal_rsi_sell",
+    "macd_buy": "signal_macd_buy",
+    "macd_sell": "signal_macd_sell",
+    "ema50100_buy": "signal_ema50_100_buy",
+    "ema50100_sell": "signal_ema50_100_sell",
+}
+
+# (freq, currency) -> suffix of the signal columns, renko column, price column, senkou suffix
+# daily_joined_data exposes the dollar signals as *_usd, weekly_joined_data as *_d
+VARIANTS = {
+    ("daily", "rial"): ("", "renko_22", "adjust_close", ""),
+    ("daily", "usd"): ("_usd", "renko_22_usd", "adjust_close_usd", "_d"),
+    ("weekly", "rial"): ("", "renko_52", "adjust_close", ""),
+    ("weekly", "usd"): ("_d", "renko_52_d", "adjust_close_usd", "_d"),
+}
+
+
+def _num(col: str, default: str = "NULL") -> str:
+    """float8 with NaN/Infinity mapped to the default."""
+    return (
+        f"(CASE WHEN {col} IS NULL OR {col}::float8 IN ('NaN', 'Infinity', '-Infinity') "
+        f"THEN {default}::float8 ELSE {col}::float8 END)"
+    )
+
+
+def _renko(col: str) -> str:
+    """UP -> 1, DOWN -> -1, numeric text as is, anything else 0."""
+    return (
+        f"(CASE upper(trim({col}::text)) WHEN 'UP' THEN 1::float8 WHEN 'DOWN' THEN -1::float8 "
+        f"ELSE CASE WHEN {col}::text ~ '^\\s*[+-]?(\\d+(\\.\\d+)?|\\.\\d+)\\s*$' THEN {col}::text::float8 ELSE 0::float8 END END)"
+    )
+
+
+def _variant_select(freq: str, currency: str) -> str:
+    view, date_col = SOURCES[freq]
+    suffix, renko_col, price_col, senkou_suffix = VARIANTS[(freq, currency)]
+    sig_cols = ",\n            ".join(
+        f"{_num(f't.{_SIGNAL_BASES[s]}{suffix}', '0')} AS sig_{s}" for s in SIGNALS
+    )
+    return f"""
+        SELECT '{freq}', '{currency}', t.stock_ticker, t.{date_col}::date,
+            t.name, t.sector,
+            {_num(f"t.{price_col}")} AS price,
+            {sig_cols},
+            {_renko(f"t.{renko_col}")} AS renko,
+            {_num(f"t.senkou_a{senkou_suffix}")} AS senkou_a,
+            {_num(f"t.senkou_b{senkou_suffix}")} AS senkou_b
+        FROM {view} t
+        WHERE t.{date_col} = (SELECT max({date_col}) FROM {view})
+          AND t.stock_ticker IS NOT NULL
+    """
+
+
+def _insert_sql(freq: str) -> str:
+    sig_names = ", ".join(f"sig_{s}" for s in SIGNALS)
+    selects = "\n        UNION ALL\n".join(_variant_select(freq, c) for c in ("rial", "usd"))
+    return f"""
+    INSERT INTO signals_latest (
+        freq, currency, stock_ticker, date, name, sector, price,
+        {sig_names}, renko, ich_position
+    )
+    SELECT DISTINCT ON (freq, currency, stock_ticker)
+        freq, currency, stock_ticker, date, name, sector, price,
+        {sig_names}, renko,
+        CASE
+            WHEN price IS NULL OR senkou_a IS NULL OR senkou_b IS NULL THEN NULL
+            WHEN price > GREATEST(senkou_a, senkou_b) THEN 'Above Cloud'
+            WHEN price < LEAST(senkou_a, senkou_b) THEN 'Below Cloud'
+            ELSE 'Inside Cloud'
+        END
+    FROM (
+        {selects}
+    ) AS v (freq, currency, stock_ticker, date, name, sector, price, {sig_names}, renko, senkou_a, senkou_b)
+    ORDER BY freq, currency, stock_ticker
+    """
+
+
+def refresh_signals_latest(cur, freq: str):
+    """Replace the snapshot rows of one freq using an open psycopg2 cursor (caller commits)."""
+    if freq not in SOURCES:
+        raise ValueError(f"Unknown freq: {freq}")
+    cur.execute("DELETE FROM signals_latest WHERE freq = %s", (freq,))
+    cur.execute(_insert_sql(freq))
+    print(f"✅ signals_latest ({freq}): {cur.rowcount} rows")
+
+
+def _load_db_url() -> str:
+    dotenv_path = os.path.join(os.path.dirname(__file__), "../.env")
+    load_dotenv(dotenv_path)
+    db_url = os.getenv("DB_URL_SYNC")
+    if not db_url:
+        raise RuntimeError("DB_URL_SYNC not set in .env")
+    return db_url
+
+
+def main(argv=None):
+    freqs = (argv if argv is not None else sys.argv[1:]) or list(SOURCES)
+    with psycopg2.connect(_load_db_url()) as conn, conn.cursor() as cur:
+        for freq in freqs:
+            refresh_signals_latest(cur, freq)
+        conn.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -10,32 +10,25 @@ import os
 import sys
 import pandas as pd
 from typing import Set, Tuple, Dict
-from sqlalchemy import text
+
+from backend.utils.schema_catalog import schema_catalog
 
 # --- import fix for both "module" and "direct" runs ---
 try:
     from .loader import get_engine, load_table, get_last_week_end
-    from .writer import upsert_dataframe
+    from .writer import bump_daily_version, upsert_dataframe
 except ImportError:
     THIS_DIR = os.path.dirname(__file__)
     if THIS_DIR not in sys.path:
         sys.path.append(THIS_DIR)
     from loader import get_engine, load_table, get_last_week_end
-    from writer import upsert_dataframe
+    from writer import bump_daily_version, upsert_dataframe
 # --- end import fix ---
 
 
 def _get_table_columns(engine, table_name: str) -> Set[str]:
-    """دریافت نام ستون‌های جدول مقصد از information_schema."""
-    q = text("""
-        SELECT column_name
-        FROM information_schema.columns
-        WHERE table_name = :tname
-        ORDER BY ordinal_position
-    """)
-    with engine.connect() as conn:
-        rows = conn.execute(q, {"tname": table_name}).fetchall()
-    return {r[0] for r in rows}
+    """نام ستون‌های جدول مقصد از کاتالوگ مشترک schema (یکبار در هر پروسه)."""
+    return set(schema_catalog.columns_sync(engine, table_name))
 
 
 def build_weekly_haghighi_from_daily(
@@ -161,6 +154,7 @@ def build_weekly_haghighi_from_daily(
     # درج نهایی
     upsert_dataframe(out, eng, dst_table, conflict_cols=conflict_on)
     print(f"✅ {len(out)} rows upserted into '{dst_table}'.")
+    bump_daily_version(eng)
 
 
 # --- direct run ---
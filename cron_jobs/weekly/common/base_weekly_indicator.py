@@ -16,6 +16,9 @@ import psycopg2
 from psycopg2.extras import execute_values
 
 from .loader import get_engine, load_table
+from backend.utils.schema_catalog import schema_catalog
+from cron_jobs.data_version import bump_data_version
+from cron_jobs.signals_snapshot import refresh_signals_latest
 from .writer import upsert_dataframe  # اگر جای دیگری خواستی استفاده کنی، اینجا ایمپورت شده
 
 # ---------------------------------------------------------------
@@ -162,7 +165,12 @@ def _py(v):
 # ⚙️ هسته‌ی محاسبه اندیکاتورهای هفتگی
 # ==============================================================
 
-def build_weekly_indicators_for_table(source_table: str, dest_table: str, insert_mode: str = "upsert"):
+def build_weekly_indicators_for_table(
+    source_table: str,
+    dest_table: str,
+    insert_mode: str = "upsert",
+    signals_freq: str | None = None,
+):
     """
     از جدول هفتگی منبع می‌خواند، برای هر نماد اندیکاتورهای ریالی و دلاری را محاسبه می‌کند،
     سپس در جدول اندیکاتور مقصد UPSERT یا REPLACE می‌نماید.
@@ -176,6 +184,8 @@ def build_weekly_indicators_for_table(source_table: str, dest_table: str, insert
     insert_mode : {'upsert','replace_all'}
         - upsert: درگیری با ON CONFLICT
         - replace_all: قبل از درج، رکوردهای نماد حذف می‌شوند
+    signals_freq : str | None
+        اگر ست شود ("weekly")، در پایان اجرا snapshot جدول signals_latest بازسازی می‌شود
     """
     print(f"🔄 شروع محاسبه اندیکاتورهای هفتگی برای جدول: {source_table}")
 
@@ -193,13 +203,7 @@ def build_weekly_indicators_for_table(source_table: str, dest_table: str, insert
         cur = conn.cursor()
         try:
             # ✅ خواندن ستون‌های واقعی جدول مقصد
-            cur.execute("""
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_schema = current_schema()
-                  AND table_name = %s
-            """, (dest_table,))
-            dest_cols = {row[0] for row in cur.fetchall()}
+            dest_cols = set(schema_catalog.columns_sync(engine, dest_table))
             if not dest_cols:
                 raise RuntimeError(f"❌ جدول مقصد '{dest_table}' یافت نشد یا ستونی ندارد.")
             # ✅ اطمینان از وجود کلیدها در جدول مقصد
@@ -358,6 +362,15 @@ def build_weekly_indicators_for_table(source_table: str, dest_table: str, insert
 
             conn.commit()
             print(f"✅ {total_rows} ردیف اندیکاتور در {dest_table} درج یا به‌روزرسانی شد.")
+
+            # snapshot آخرین سیگنال‌ها برای /api/signals/table (یکبار در هر اجرا)
+            if signals_freq:
+                refresh_signals_latest(cur, signals_freq)
+                conn.commit()
+
+            # کش روت‌های هفتگی API (مثل /signals/table?freq=weekly) روی نسخهٔ daily است
+            bump_data_version(cur, "daily")
+            conn.commit()
         finally:
             cur.close()
     finally:
@@ -6,7 +6,7 @@ Generic weekly builder from daily tables (modular, using precomputed USD columns
 
 import pandas as pd
 from .loader import get_engine, load_table, get_last_week_end
-from .writer import upsert_dataframe
+from .writer import bump_daily_version, upsert_dataframe, upsert_week_calendar
 
 def build_weekly_from_daily(
     src_table: str,
@@ -32,7 +32,10 @@ def build_weekly_from_daily(
     dollar_rate_col="dollar_rate",  # optional carry-forward (e.g., 'last' of week)
 
     extra_identity_cols=None,
-    conflict_on=("stock_ticker", "week_end")
+    conflict_on=("stock_ticker", "week_end"),
+
+    # optional week dimension (week_calendar) refreshed from the same trading dates
+    calendar_table=None,
 ):
     eng = get_engine()
     print(f"🔄 Building weekly data for: {src_table} → {dst_table}")
@@ -50,6 +53,9 @@ def build_weekly_from_daily(
     df[date_col] = pd.to_datetime(df[date_col], errors="coerce")
     df = df.dropna(subset=[date_col, symbol_col]).sort_values([symbol_col, date_col])
 
+    if calendar_table:
+        upsert_week_calendar(df[date_col], eng, table_name=calendar_table)
+
     # build an aggregation map dynamically (only for columns that actually exist)
     # OHLC rules: first/max/min/last on adjusted/unadjusted; sum on value/volume; USD same as Rial rules
     agg_map = {}
@@ -135,6 +141,8 @@ def build_weekly_from_daily(
 
     if not all_weekly:
         print("📭 No new weekly rows to insert.")
+        if calendar_table:
+            bump_daily_version(eng)
         return
 
     out = pd.concat(all_weekly, ignore_index=True)
@@ -145,3 +153,4 @@ def build_weekly_from_daily(
 
     upsert_dataframe(out, eng, dst_table, conflict_cols=conflict_on)
     print(f"✅ {len(out)} rows upserted into '{dst_table}'.")
+    bump_daily_version(eng)
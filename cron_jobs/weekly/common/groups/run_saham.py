@@ -7,5 +7,6 @@ if __name__ == "__main__":
         date_col="date_miladi",
         symbol_col="stock_ticker",
         extra_identity_cols=["name", "market"],    # مطابق اسکریپت قبلی‌ات
-        conflict_on=("stock_ticker", "week_end")
+        conflict_on=("stock_ticker", "week_end"),
+        calendar_table="week_calendar",
     )
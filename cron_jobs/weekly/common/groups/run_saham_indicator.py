@@ -12,4 +12,5 @@ if __name__ == "__main__":
         source_table="weekly_stock_data",
         dest_table="weekly_indicators",
         insert_mode="upsert",  # یا "replace_all" برای بازسازی کامل
+        signals_freq="weekly",
     )
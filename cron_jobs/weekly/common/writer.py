@@ -31,3 +31,65 @@ def upsert_dataframe(df, engine, table_name: str, conflict_cols=("stock_ticker",
         conn.execute(text(sql), df.to_dict(orient="records"))
 
     print(f"✅ {len(df)} rows upserted into {table_name}.")
+
+
+def bump_daily_version(engine):
+    """
+    bump نسخهٔ daily در پایان هر سازندهٔ هفتگی؛ روت‌های هفتگی API (پیوت نقدینگی، signals هفتگی،
+    جریان پول حقیقی هفتگی) روی همین نسخه کش می‌شوند و ساخت آخر هفته (بدون اجرای شبانه/زنده) را نمی‌دیدند.
+    """
+    from cron_jobs.data_version import bump_data_version
+
+    with engine.begin() as conn, conn.connection.cursor() as cur:
+        bump_data_version(cur, "daily")
+
+
+def upsert_week_calendar(trading_dates, engine, table_name: str = "week_calendar"):
+    """
+    جدول بُعد هفته‌ها (week_start, week_end, برچسب جلالی، تعداد روز معاملاتی)
+    با همان هفته‌بندی W-FRI سازندهٔ هفتگی؛ روت‌ها بازهٔ هفته‌ها را با یک lookup ایندکسی از این جدول می‌خوانند.
+    """
+    import jdatetime
+    import pandas as pd
+
+    dates = pd.Series(pd.to_datetime(trading_dates, errors="coerce")).dropna().dt.normalize().drop_duplicates()
+    if dates.empty:
+        print(f"⚠️ No trading dates for {table_name}")
+        return
+
+    weeks = (
+        dates.to_frame("d")
+        .groupby(pd.Grouper(key="d", freq="W-FRI", label="left", closed="left"))
+        .size()
+    )
+    weeks = weeks[weeks > 0]
+
+    def j_label(ts):
+        return jdatetime.date.fromgregorian(date=ts.date()).strftime("%Y-%m-%d")
+
+    records = [
+        {
+            "week_start": ws.date(),
+            "week_end": (ws + pd.Timedelta(days=6)).date(),
+            "j_week_start": j_label(ws),
+            "j_week_end": j_label(ws + pd.Timedelta(days=6)),
+            "trading_days": int(n),
+        }
+        for ws, n in weeks.items()
+    ]
+
+    sql = f"""
+    INSERT INTO {table_name} (week_start, week_end, j_week_start, j_week_end, trading_days)
+    VALUES (:week_start, :week_end, :j_week_start, :j_week_end, :trading_days)
+    ON CONFLICT (week_end) DO UPDATE SET
+        week_start = EXCLUDED.week_start,
+        j_week_start = EXCLUDED.j_week_start,
+        j_week_end = EXCLUDED.j_week_end,
+        trading_days = EXCLUDED.trading_days
+    WHERE ({table_name}.j_week_start, {table_name}.trading_days)
+          IS DISTINCT FROM (EXCLUDED.j_week_start, EXCLUDED.trading_days)
+    """
+    with engine.begin() as conn:
+        conn.execute(text(sql), records)
+
+    print(f"✅ {len(records)} weeks upserted into {table_name}.")